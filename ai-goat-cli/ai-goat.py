@@ -7,8 +7,9 @@ Interactive CLI for AI Server Management
 import sys
 import os
 
-# Add lib directory to path
+# Add lib directory and the repository root (shared nodectl package) to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'lib'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from textual.app import App, ComposeResult
 from textual.containers import Container, Horizontal, Vertical
@@ -17,6 +18,7 @@ from textual.reactive import reactive
 from textual import work
 from rich.text import Text
 from rich.console import RenderableType
+import argparse
 import asyncio
 from datetime import datetime, timedelta
 
@@ -26,6 +28,8 @@ from power import PowerManager
 from system import SystemManager
 from remote import RemoteManager
 from system_ui import SystemManagementUI
+from telemetry import TelemetryCollector
+from loopstall import LoopStallMonitor
 
 
 class GoatHeader(Static):
@@ -46,16 +50,22 @@ class SystemStatus(Static):
 
     status_text = reactive("")
 
-    def __init__(self):
-        super().__init__()
-        self.monitor = SystemMonitor()
-
     def on_mount(self) -> None:
-        self.update_status()
-        self.set_interval(2.0, self.update_status)
+        self.app.telemetry.subscribe(self._on_snapshot)
+        # Already on the app thread: render the latest snapshot directly
+        snapshot = self.app.telemetry.snapshot
+        if snapshot is not None:
+            self.update_status(snapshot)
 
-    def update_status(self) -> None:
-        stats = self.monitor.get_stats()
+    def on_unmount(self) -> None:
+        self.app.telemetry.unsubscribe(self._on_snapshot)
+
+    def _on_snapshot(self, snapshot) -> None:
+        """Called from the collector thread"""
+        self.app.call_from_thread(self.update_status, snapshot)
+
+    def update_status(self, snapshot) -> None:
+        stats = snapshot['stats']
 
         # Build status text with colors
         lines = [
@@ -66,6 +76,17 @@ class SystemStatus(Static):
             f"  Temp:  [bold cyan]{stats['gpu_temp']}°C[/bold cyan]",
             f"  Usage: [bold magenta]{stats['gpu_util']}%[/bold magenta]",
             f"  VRAM:  {stats['gpu_memory_used']:.1f}GB / {stats['gpu_memory_total']:.1f}GB",
+        ]
+
+        # Per-GPU breakdown on multi-GPU hosts
+        if len(stats['gpus']) > 1:
+            for gpu in stats['gpus']:
+                lines.append(
+                    f"  [dim]GPU{gpu['index']}: {gpu['utilization']:.0f}% "
+                    f"{gpu['power']:.0f}W {gpu['temperature']}°C[/dim]"
+                )
+
+        lines += [
             "",
             f"[yellow]CPU:[/yellow]",
             f"  Usage: [bold magenta]{stats['cpu_percent']}%[/bold magenta]",
@@ -91,22 +112,30 @@ class PowerStatus(Static):
 
     power_text = reactive("")
 
-    def __init__(self):
-        super().__init__()
-        self.power_mgr = PowerManager()
-
     def on_mount(self) -> None:
-        self.update_power()
-        self.set_interval(5.0, self.update_power)
+        self.app.telemetry.subscribe(self._on_snapshot)
+        # Already on the app thread: render the latest snapshot directly
+        snapshot = self.app.telemetry.snapshot
+        if snapshot is not None:
+            self.update_power(snapshot)
 
-    def update_power(self) -> None:
-        status = self.power_mgr.get_status()
+    def on_unmount(self) -> None:
+        self.app.telemetry.unsubscribe(self._on_snapshot)
+
+    def _on_snapshot(self, snapshot) -> None:
+        """Called from the collector thread"""
+        self.app.call_from_thread(self.update_power, snapshot)
+
+    def update_power(self, snapshot) -> None:
+        status = snapshot['power']
 
         # Calculate time remaining
         if status['stay_awake_active']:
             remaining = status['stay_awake_remaining']
             time_str = f"{remaining // 60}m {remaining % 60}s"
             suspend_line = f"  [bold green]Stay Awake:[/bold green] {time_str} remaining"
+            if status['stay_awake_leases'] > 1:
+                suspend_line += f" [dim]({status['stay_awake_leases']} leases)[/dim]"
         elif status['auto_suspend_enabled']:
             idle_minutes = status['idle_minutes']
             wait_minutes = status['wait_minutes']
@@ -125,11 +154,17 @@ class PowerStatus(Static):
             f"[bold cyan]═══ Power Status ═══[/bold cyan]",
             "",
             f"[yellow]Total System Power:[/yellow]",
-            f"  [bold green]{status['total_power']:.1f}W[/bold green]",
+            f"  [bold green]{status['total_power']:.1f}W[/bold green] [dim]({status['power_source']})[/dim]",
+            f"  Today: {status['energy_today_wh'] / 1000:.2f} kWh" + (
+                f", saved ~{status['energy_saved_wh'] / 1000:.2f} kWh by suspending"
+                if status['energy_saved_wh'] else ""
+            ),
             "",
             f"[yellow]Auto-Suspend:[/yellow]",
             suspend_line,
-            f"  Idle threshold: {status['wait_minutes']} min",
+            f"  Idle threshold: {status['wait_minutes']} min" + (
+                " [dim](learned for this time of day)[/dim]" if status.get('wait_learned') else ""
+            ),
             f"  Current idle: {status['idle_minutes']} min",
             "",
             f"[yellow]Conditions:[/yellow]",
@@ -144,6 +179,17 @@ class PowerStatus(Static):
         # API check is always shown (for informational purposes, doesn't affect suspend)
         lines.append(f"  No API:   {'[green]✓[/green]' if not status['api_active'] else '[red]✗[/red]'} [dim](info only)[/dim]")
 
+        # Per-service load; with ACTIVITY_SCOPE=services only the marked groups can keep the host awake
+        if status['process_groups']:
+            scope_note = "only ● counts" if status['activity_scope'] == 'services' else "● = useful work"
+            lines += ["", f"[yellow]Load by Service:[/yellow] [dim]({scope_note})[/dim]"]
+            for group in status['process_groups']:
+                marker = '[green]●[/green]' if group['useful'] else '[dim]○[/dim]'
+                line = f"  {marker} {group['name'][:24]:<24} CPU {group['cpu_percent']:5.1f}%"
+                if group['gpu_memory'] or group['gpu_sm']:
+                    line += f"  GPU {group['gpu_sm']:.0f}% {group['gpu_memory'] / 1024:.1f}GB"
+                lines.append(line)
+
         self.power_text = "\n".join(lines)
 
     def render(self) -> RenderableType:
@@ -158,9 +204,20 @@ class RemoteControl(Static):
         self.remote_mgr = RemoteManager()
 
     def compose(self) -> ComposeResult:
+        yield Static("[dim]Loading remote control information...[/dim]", id="remote-info")
+
+    def on_mount(self) -> None:
+        self.load_info()
+
+    @work(thread=True)
+    def load_info(self) -> None:
+        """Gather interface/IP details (several subprocesses) off the event loop"""
         info = self.remote_mgr.get_info()
+        self.app.call_from_thread(self.show_info, info)
 
-        yield Static(f"""[bold cyan]═══ Remote Control ═══[/bold cyan]
+    def show_info(self, info) -> None:
+        """Render remote control information"""
+        self.query_one("#remote-info", Static).update(f"""[bold cyan]═══ Remote Control ═══[/bold cyan]
 
 [yellow]Wake-on-LAN:[/yellow]
   MAC Address: [bold]{info['mac_address']}[/bold]
@@ -266,6 +323,32 @@ class AIGoatApp(App):
         ("3", "show_remote", "Remote"),
     ]
 
+    def __init__(self, refresh_interval: float = 2.0, stall_report: bool = False):
+        super().__init__()
+        # One collector feeds every dashboard widget
+        self.telemetry = TelemetryCollector(interval=refresh_interval)
+        # Measures event-loop stalls caused by blocking work on the UI thread
+        self.stall_monitor = LoopStallMonitor()
+        self.stall_report = stall_report
+
+    def on_mount(self) -> None:
+        self.telemetry.start()
+        self.stall_monitor.start()
+        if self.stall_report:
+            self.set_interval(2.0, self.show_stalls)
+
+    def on_unmount(self) -> None:
+        self.telemetry.stop()
+        self.stall_monitor.stop()
+
+    def show_stalls(self) -> None:
+        """Show UI-loop stall statistics in the header"""
+        summary = self.stall_monitor.summary()
+        self.sub_title = (
+            f"UI stall p99 {summary['p99_ms']:.0f}ms, max {summary['max_ms']:.0f}ms, "
+            f"{summary['stalls']} stalls"
+        )
+
     def compose(self) -> ComposeResult:
         yield GoatHeader()
         yield Header(show_clock=True)
@@ -303,9 +386,31 @@ class AIGoatApp(App):
 
 def main():
     """Main entry point"""
-    app = AIGoatApp()
+    parser = argparse.ArgumentParser(description="AI GOAT - AI Server Command Center")
+    parser.add_argument(
+        '--refresh',
+        type=float,
+        default=float(os.getenv('AI_GOAT_REFRESH', '2.0')),
+        help='Dashboard sampling interval in seconds (default: 2.0, env AI_GOAT_REFRESH)',
+    )
+    parser.add_argument(
+        '--stall-report',
+        action='store_true',
+        help='Show UI event-loop stall statistics in the header and print them on exit',
+    )
+    args = parser.parse_args()
+
+    app = AIGoatApp(refresh_interval=args.refresh, stall_report=args.stall_report)
     app.run()
 
+    if args.stall_report:
+        summary = app.stall_monitor.summary()
+        print(
+            f"UI event loop: {summary['samples']} samples, p50 {summary['p50_ms']:.1f}ms, "
+            f"p99 {summary['p99_ms']:.1f}ms, max {summary['max_ms']:.1f}ms, "
+            f"{summary['stalls']} stalls >= {app.stall_monitor.threshold * 1000:.0f}ms"
+        )
+
 
 if __name__ == "__main__":
     main()
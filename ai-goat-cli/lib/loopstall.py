@@ -0,0 +1,60 @@
+"""
+Event Loop Stall Module
+Measures how late the UI event loop wakes up, to catch blocking calls on the UI thread
+"""
+
+import asyncio
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+
+class LoopStallMonitor:
+    """Sleep for a fixed period on the event loop and record how late each wakeup is"""
+
+    def __init__(self, period: float = 0.05, threshold: float = 0.1, history: int = 1200,
+                 on_stall: Optional[Callable[[float], None]] = None):
+        self.period = period
+        self.threshold = threshold
+        self.on_stall = on_stall
+        self.lags: deque = deque(maxlen=history)
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        """Measurement loop"""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.period)
+            lag = max(0.0, loop.time() - started - self.period)
+            self.lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                self.stalls += 1
+                if self.on_stall:
+                    self.on_stall(lag)
+
+    def start(self):
+        """Start measuring on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self):
+        """Stop measuring"""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def summary(self) -> Dict[str, Any]:
+        """Stall statistics over the recent history (milliseconds)"""
+        ordered = sorted(self.lags)
+        if not ordered:
+            return {'samples': 0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0, 'stalls': 0}
+        return {
+            'samples': len(ordered),
+            'p50_ms': ordered[len(ordered) // 2] * 1000,
+            'p99_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000,
+            'max_ms': self.max_lag * 1000,
+            'stalls': self.stalls,
+        }
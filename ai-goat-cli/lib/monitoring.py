@@ -4,70 +4,61 @@ Provides real-time system stats (GPU, CPU, Memory, Services)
 """
 
 import psutil
-import subprocess
 import os
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
+
+from nodectl.docker import DockerClient
+from nodectl.energy import BASE_WATTS, PowerMeter
+from nodectl.gpu import GpuTelemetry
+from nodectl.metrics import read_snapshot
+from nodectl import tsdb
+from services import ServiceStateBackend
+
+# Units reported in the stats, queried together once per sample
+MONITORED_SERVICES = ['localai.service', 'ollama.service', 'ai-auto-suspend.service']
+
+METRICS_DIR = os.environ.get('AI_GOAT_METRICS_DIR', os.path.expanduser('~/.local/state/ai-goat/metrics'))
+# The auto-suspend monitor's measured power is used if it is at most this old (seconds)
+SNAPSHOT_MAX_AGE = 300
+# Same default as the auto-suspend GPU_USAGE_MAX
+GPU_IDLE_UTIL = 10
 
 
 class SystemMonitor:
     """Monitor system resources and services"""
 
     def __init__(self):
-        self.has_gpu = self._check_gpu()
-
-    def _check_gpu(self) -> bool:
-        """Check if NVIDIA GPU is available"""
-        try:
-            subprocess.run(['nvidia-smi'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            return True
-        except FileNotFoundError:
-            return False
+        self.gpu = GpuTelemetry()
+        self.has_gpu = self.gpu.has_gpu
+        self.services = ServiceStateBackend(MONITORED_SERVICES)
+        self.docker = DockerClient()
+        # Container start/stop events invalidate the cached container list
+        self.docker.watch_events()
+        self.metrics = tsdb.open_store(METRICS_DIR)
+        self.power_meter = PowerMeter(self.gpu)
+        # Prime psutil so later non-blocking calls report usage since the previous sample
+        psutil.cpu_percent(interval=None)
 
     def _get_gpu_stats(self) -> Dict[str, Any]:
-        """Get GPU statistics using nvidia-smi"""
-        if not self.has_gpu:
-            return {
-                'gpu_power': 0.0,
-                'gpu_power_limit': 0.0,
-                'gpu_temp': 0,
-                'gpu_util': 0,
-                'gpu_memory_used': 0.0,
-                'gpu_memory_total': 0.0,
-            }
+        """Get GPU statistics for all GPUs from the shared telemetry engine"""
+        gpus = self.gpu.sample() if self.has_gpu else []
 
-        try:
-            # Query GPU stats
-            cmd = [
-                'nvidia-smi',
-                '--query-gpu=power.draw,power.limit,temperature.gpu,utilization.gpu,memory.used,memory.total',
-                '--format=csv,noheader,nounits'
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            values = result.stdout.strip().split(', ')
-
-            return {
-                'gpu_power': float(values[0]),
-                'gpu_power_limit': float(values[1]),
-                'gpu_temp': int(float(values[2])),
-                'gpu_util': int(float(values[3])),
-                'gpu_memory_used': float(values[4]) / 1024,  # Convert MB to GB
-                'gpu_memory_total': float(values[5]) / 1024,  # Convert MB to GB
-            }
-        except Exception as e:
-            print(f"Error getting GPU stats: {e}")
-            return {
-                'gpu_power': 0.0,
-                'gpu_power_limit': 0.0,
-                'gpu_temp': 0,
-                'gpu_util': 0,
-                'gpu_memory_used': 0.0,
-                'gpu_memory_total': 0.0,
-            }
+        # Summary values keep the single-GPU keys used by the dashboard
+        return {
+            'gpu_power': sum(gpu['power'] for gpu in gpus),
+            'gpu_power_limit': sum(gpu['power_limit'] for gpu in gpus),
+            'gpu_temp': max((gpu['temperature'] for gpu in gpus), default=0),
+            'gpu_util': int(self.gpu.max_utilization(gpus)),
+            'gpu_memory_used': sum(gpu['memory_used'] for gpu in gpus) / 1024,  # Convert MB to GB
+            'gpu_memory_total': sum(gpu['memory_total'] for gpu in gpus) / 1024,  # Convert MB to GB
+            'gpus': gpus,
+        }
 
     def _get_cpu_stats(self) -> Dict[str, Any]:
-        """Get CPU statistics"""
+        """Get CPU statistics (usage since the previous call, never blocks)"""
         return {
-            'cpu_percent': psutil.cpu_percent(interval=1),
+            'cpu_percent': psutil.cpu_percent(interval=None),
             'cpu_count': psutil.cpu_count(),
         }
 
@@ -81,27 +72,25 @@ class SystemMonitor:
             'memory_percent': mem.percent,
         }
 
+    def _get_service_states(self) -> Dict[str, bool]:
+        """Check which monitored systemd services are running (one query for all units)"""
+        try:
+            states = self.services.query()
+            return {unit: state['active'] for unit, state in states.items()}
+        except Exception:
+            return {unit: False for unit in MONITORED_SERVICES}
+
     def _check_service_running(self, service_name: str) -> bool:
         """Check if a systemd service is running"""
         try:
-            result = subprocess.run(
-                ['systemctl', 'is-active', service_name],
-                capture_output=True,
-                text=True
-            )
-            return result.stdout.strip() == 'active'
+            return self.services.query([service_name])[service_name]['active']
         except Exception:
             return False
 
     def _check_container_running(self, container_name: str) -> bool:
-        """Check if a Docker container is running"""
+        """Check if a Docker container is running (cached container list from the Docker API)"""
         try:
-            result = subprocess.run(
-                ['docker', 'ps', '--filter', f'name={container_name}', '--format', '{{.Names}}'],
-                capture_output=True,
-                text=True
-            )
-            return container_name in result.stdout
+            return self.docker.is_running(container_name)
         except Exception:
             return False
 
@@ -119,26 +108,47 @@ class SystemMonitor:
         stats.update(self._get_memory_stats())
 
         # Service status
-        stats['localai_running'] = self._check_service_running('localai.service') or \
+        services = self._get_service_states()
+        stats['localai_running'] = services['localai.service'] or \
                                      self._check_container_running('localai')
-        stats['ollama_running'] = self._check_service_running('ollama.service') or \
+        stats['ollama_running'] = services['ollama.service'] or \
                                    self._check_container_running('ollama')
+        stats['auto_suspend_running'] = services['ai-auto-suspend.service']
 
+        self._record_metrics(stats)
         return stats
 
-    def get_total_power(self) -> float:
-        """Estimate total system power consumption"""
-        stats = self.get_stats()
-
-        # GPU power
-        gpu_power = stats['gpu_power']
-
-        # Estimate CPU power (rough estimate based on TDP)
-        # Typical desktop CPU: 65-125W TDP
-        # Scale by CPU usage
+    def _record_metrics(self, stats: Dict[str, Any]):
+        """Append a sample to the local metrics store"""
+        if self.metrics is None:
+            return
+        flags = (
+            (tsdb.FLAG_GPU_IDLE if stats['gpu_util'] <= GPU_IDLE_UTIL else 0) |
+            (tsdb.FLAG_SERVICE if stats['localai_running'] or stats['ollama_running'] else 0)
+        )
+        try:
+            self.metrics.record(time.time(), 100 - stats['cpu_percent'], stats['gpu_util'],
+                                stats['gpu_temp'], stats['gpu_power'], flags)
+        except Exception as e:
+            print(f"Error recording metrics: {e}")
+
+    def get_power(self, stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Total system power and where it came from: measured, monitor (measured as root) or estimated"""
+        reading = self.power_meter.sample()
+        if reading['valid']:
+            return {'watts': reading['total_watts'], 'source': 'measured', 'reading': reading}
+
+        # RAPL counters are root-only on most kernels; the auto-suspend monitor publishes its reading
+        snapshot = read_snapshot()
+        if snapshot and snapshot.get('power') and time.time() - snapshot.get('timestamp', 0) < SNAPSHOT_MAX_AGE:
+            return {'watts': snapshot['power']['total'], 'source': 'monitor', 'reading': snapshot['power']}
+
+        if stats is None:
+            stats = self.get_stats()
+        # Rough estimate: GPU draw, CPU scaled from a typical 100W desktop TDP, plus the rest of the box
         cpu_power = 100 * (stats['cpu_percent'] / 100.0)
+        return {'watts': stats['gpu_power'] + cpu_power + BASE_WATTS, 'source': 'estimated', 'reading': None}
 
-        # Estimate other components (motherboard, RAM, drives, etc.)
-        base_power = 50  # Watts
-
-        return gpu_power + cpu_power + base_power
+    def get_total_power(self, stats: Optional[Dict[str, Any]] = None) -> float:
+        """Total system power in watts (reusing already collected stats if given)"""
+        return self.get_power(stats)['watts']
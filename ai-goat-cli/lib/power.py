@@ -6,8 +6,19 @@ Monitors auto-suspend status and provides power control
 import subprocess
 import os
 import time
-from typing import Dict, Any
-from monitoring import SystemMonitor
+import urllib.request
+from typing import Dict, Any, List, Optional
+from monitoring import SNAPSHOT_MAX_AGE, SystemMonitor
+from nodectl.conntrack import ConnectionTracker
+from nodectl.energy import ENERGY_LEDGER_FILE, EnergyLedger
+from nodectl.leases import read_store
+from nodectl.metrics import read_snapshot
+from nodectl.procacct import DEFAULT_USEFUL_GROUPS, ProcessAccounting
+
+SSH_PORT = 22
+API_PORTS = [8080, 11434, 3000, 9876]
+# stay-awake-server.py (listens on its PORT, 9876 by default); it owns the lease store
+STAY_AWAKE_URL = os.environ.get('AI_GOAT_STAY_AWAKE_URL', 'http://localhost:9876')
 
 
 class PowerManager:
@@ -15,7 +26,9 @@ class PowerManager:
 
     def __init__(self):
         self.monitor = SystemMonitor()
+        self.connections = ConnectionTracker([SSH_PORT] + API_PORTS)
         self.stay_awake_file = "/run/ai-nodectl/stay_awake_until"
+        self.accounting = ProcessAccounting(gpu=self.monitor.gpu, container_names=self._container_names)
 
     def _get_auto_suspend_config(self) -> Dict[str, Any]:
         """Get auto-suspend configuration"""
@@ -24,6 +37,8 @@ class PowerManager:
             'cpu_threshold': 90,
             'gpu_threshold': 10,
             'check_ssh': False,  # Default: SSH checks disabled
+            'activity_scope': 'system',
+            'useful_groups': list(DEFAULT_USEFUL_GROUPS),
         }
 
         try:
@@ -49,63 +64,58 @@ class PowerManager:
                             config['gpu_threshold'] = int(value)
                         elif key == 'CHECK_SSH':
                             config['check_ssh'] = value.lower() == 'true'
+                        elif key == 'ACTIVITY_SCOPE':
+                            config['activity_scope'] = value.lower()
+                        elif key == 'USEFUL_WORK_GROUPS':
+                            config['useful_groups'] = [group for group in value.split(',') if group]
         except Exception:
             pass
 
         return config
 
-    def _check_stay_awake(self) -> tuple[bool, int]:
-        """Check if stay-awake is active and return remaining seconds"""
-        if not os.path.exists(self.stay_awake_file):
-            return False, 0
+    def _check_stay_awake(self) -> tuple[bool, int, int]:
+        """Check if stay-awake is active; returns (active, remaining seconds, active leases)"""
+        deadline, leases = read_store(self.stay_awake_file)
 
-        try:
-            with open(self.stay_awake_file, 'r') as f:
-                until_timestamp = int(f.read().strip())
+        now = int(time.time())
+        remaining = deadline - now
+        active_leases = sum(1 for until in leases.values() if until > now)
 
-            now = int(time.time())
-            remaining = until_timestamp - now
+        if remaining > 0:
+            return True, remaining, active_leases
+        else:
+            return False, 0, 0
 
-            if remaining > 0:
-                return True, remaining
-            else:
-                return False, 0
-        except Exception:
-            return False, 0
+    def _container_names(self) -> Dict[str, str]:
+        """Container id -> name, so docker cgroups show up by name"""
+        return {
+            container['Id']: container['Names'][0].lstrip('/')
+            for container in self.monitor.docker.containers()
+            if container.get('Names')
+        }
 
-    def _check_ssh_active(self) -> bool:
-        """Check if SSH sessions are active"""
+    def _get_process_groups(self, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Busiest services/containers since the previous status, flagged if they count as useful work"""
         try:
-            result = subprocess.run(
-                ['ss', '-tna'],
-                capture_output=True,
-                text=True
-            )
-            for line in result.stdout.splitlines():
-                if 'ESTAB' in line and ':22' in line:
-                    return True
-            return False
+            result = self.accounting.sample()
         except Exception:
-            return False
-
-    def _check_api_active(self) -> bool:
-        """Check if API ports have active connections"""
-        api_ports = ['8080', '11434', '3000', '9876']
+            return []
+        return ProcessAccounting.top_groups(result, config['useful_groups'], 6)
 
+    def _get_connection_counts(self) -> Dict[int, int]:
+        """Get established connection counts for the SSH and API ports"""
         try:
-            result = subprocess.run(
-                ['ss', '-tna'],
-                capture_output=True,
-                text=True
-            )
-            for line in result.stdout.splitlines():
-                if 'ESTAB' in line:
-                    for port in api_ports:
-                        if f':{port}' in line:
-                            return True
-            return False
+            return self.connections.established_counts()
         except Exception:
-            return False
+            return {}
+
+    def _check_ssh_active(self, counts: Dict[int, int]) -> bool:
+        """Check if SSH sessions are active"""
+        return counts.get(SSH_PORT, 0) > 0
+
+    def _check_api_active(self, counts: Dict[int, int]) -> bool:
+        """Check if API ports have active connections"""
+        return any(counts.get(port, 0) > 0 for port in API_PORTS)
 
     def _estimate_idle_minutes(self, stats: Dict[str, Any], config: Dict[str, int]) -> int:
         """Get actual idle minutes from auto-suspend service state"""
@@ -130,14 +140,25 @@ class PowerManager:
         except Exception:
             return 0
 
-    def get_status(self) -> Dict[str, Any]:
-        """Get current power management status"""
-        stats = self.monitor.get_stats()
+    def _learned_wait_minutes(self) -> Optional[int]:
+        """Idle wait the monitor picked for the current time of week (None until it has learned one)"""
+        snapshot = read_snapshot()
+        if not snapshot or time.time() - snapshot.get('timestamp', 0) >= SNAPSHOT_MAX_AGE:
+            return None
+        if snapshot.get('activity_chance') is None or snapshot.get('wait_minutes') is None:
+            return None
+        return int(round(snapshot['wait_minutes']))
+
+    def get_status(self, stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Get current power management status (reusing already collected stats if given)"""
+        if stats is None:
+            stats = self.monitor.get_stats()
         config = self._get_auto_suspend_config()
-        stay_awake_active, stay_awake_remaining = self._check_stay_awake()
+        stay_awake_active, stay_awake_remaining, stay_awake_leases = self._check_stay_awake()
 
-        # Calculate total system power
-        total_power = self.monitor.get_total_power()
+        # Measured (RAPL/NVML) where possible, estimated otherwise
+        power = self.monitor.get_power(stats)
+        energy = EnergyLedger(ENERGY_LEDGER_FILE).summary()
 
         # Check conditions
         cpu_idle_percent = 100 - stats['cpu_percent']
@@ -145,21 +166,32 @@ class PowerManager:
         gpu_idle = stats['gpu_util'] <= config['gpu_threshold']
 
         # Only check SSH if enabled in config
-        ssh_active = self._check_ssh_active() if config.get('check_ssh', False) else False
-        api_active = self._check_api_active()
+        connections = self._get_connection_counts()
+        ssh_active = self._check_ssh_active(connections) if config.get('check_ssh', False) else False
+        api_active = self._check_api_active(connections)
+
+        # The predictive monitor overrides WAIT_MINUTES per time of week
+        learned_wait = self._learned_wait_minutes()
 
         # Estimate idle minutes
         idle_minutes = self._estimate_idle_minutes(stats, config)
 
-        # Check if auto-suspend is enabled
-        auto_suspend_enabled = self._check_service_running('ai-auto-suspend.service')
+        # Check if auto-suspend is enabled (already part of the monitor's batched service query)
+        auto_suspend_enabled = stats.get('auto_suspend_running')
+        if auto_suspend_enabled is None:
+            auto_suspend_enabled = self._check_service_running('ai-auto-suspend.service')
 
         return {
-            'total_power': total_power,
+            'total_power': power['watts'],
+            'power_source': power['source'],
+            'energy_today_wh': energy['wh'],
+            'energy_saved_wh': energy['saved_wh'],
             'stay_awake_active': stay_awake_active,
             'stay_awake_remaining': stay_awake_remaining,
+            'stay_awake_leases': stay_awake_leases,
             'auto_suspend_enabled': auto_suspend_enabled,
-            'wait_minutes': config['wait_minutes'],
+            'wait_minutes': learned_wait if learned_wait is not None else config['wait_minutes'],
+            'wait_learned': learned_wait is not None,
             'idle_minutes': idle_minutes,
             'cpu_idle': cpu_idle,
             'cpu_idle_percent': cpu_idle_percent,
@@ -170,6 +202,9 @@ class PowerManager:
             'ssh_active': ssh_active,
             'check_ssh_enabled': config.get('check_ssh', False),  # Add this so UI knows whether to show SSH
             'api_active': api_active,
+            'connections': connections,
+            'activity_scope': config['activity_scope'],
+            'process_groups': self._get_process_groups(config),
         }
 
     def _check_service_running(self, service_name: str) -> bool:
@@ -185,16 +220,12 @@ class PowerManager:
             return False
 
     def activate_stay_awake(self, seconds: int) -> bool:
-        """Activate stay-awake for specified seconds"""
+        """Activate stay-awake for specified seconds (as the 'ai-goat' lease)"""
         try:
-            until_timestamp = int(time.time()) + seconds
-
-            os.makedirs(os.path.dirname(self.stay_awake_file), exist_ok=True)
-
-            with open(self.stay_awake_file, 'w') as f:
-                f.write(str(until_timestamp))
+            url = f"{STAY_AWAKE_URL}/stay?s={seconds}&id=ai-goat"
 
-            return True
+            with urllib.request.urlopen(url, timeout=5) as response:
+                return response.status == 200
         except Exception as e:
             print(f"Error activating stay-awake: {e}")
             return False
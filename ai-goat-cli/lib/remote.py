@@ -7,6 +7,7 @@ import subprocess
 import socket
 import os
 from typing import Dict, Any
+from nodectl.wol import send_magic_packet
 
 
 class RemoteManager:
@@ -151,17 +152,8 @@ class RemoteManager:
     def send_wol_packet(self, mac_address: str, broadcast: str = "255.255.255.255") -> bool:
         """Send WOL magic packet"""
         try:
-            # Create magic packet
-            mac_bytes = bytes.fromhex(mac_address.replace(':', '').replace('-', ''))
-            magic_packet = b'\xff' * 6 + mac_bytes * 16
-
-            # Send packet
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-            sock.sendto(magic_packet, (broadcast, 9))
-            sock.close()
-
+            send_magic_packet(mac_address, broadcast)
             return True
-        except Exception as e:
+        except (OSError, ValueError) as e:
             print(f"Error sending WOL packet: {e}")
             return False
@@ -0,0 +1,168 @@
+"""
+Streaming Command Runner Module
+Runs installer and manager scripts, streaming output lines with bounded memory and a full log on disk
+"""
+
+import asyncio
+import os
+import re
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, List, Optional
+
+LOG_DIR = os.environ.get('AI_GOAT_LOG_DIR', os.path.expanduser('~/.local/state/ai-goat/logs'))
+
+# ANSI escape codes (colors, cursor movement) written by the scripts' logging helpers
+ANSI_ESCAPE_PATTERN = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+# `log` in scripts/lib/logging.sh prints "[+] message" at the start of each install step
+PHASE_PATTERN = re.compile(r'^\[\+\]\s*(.+)$')
+
+READ_CHUNK = 64 * 1024
+# Progress callbacks keep firing this often while a step is silent (e.g. a multi-GB image pull)
+HEARTBEAT_INTERVAL = 1.0
+
+
+class StreamingRunner:
+    """Run a command, keep the last lines in a ring buffer and spool everything to a log file"""
+
+    def __init__(self, cmd: List[str], name: str, timeout: float = 600, ring_lines: int = 200,
+                 log_dir: str = LOG_DIR, cwd: Optional[str] = None):
+        self.cmd = cmd
+        self.timeout = timeout
+        self.cwd = cwd
+        self.lines: deque = deque(maxlen=ring_lines)
+        self.phase = ''
+        self.phase_count = 0
+        self.line_count = 0
+        self.returncode: Optional[int] = None
+        self.timed_out = False
+        self.started = 0.0
+
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        self.log_path = os.path.join(log_dir, f'{name}-{stamp}.log')
+        self._log_dir = log_dir
+        # The last ring entry ended in '\r' (spinner/progress bar) and gets overwritten by the next one
+        self._transient = False
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the command started"""
+        return time.monotonic() - self.started if self.started else 0.0
+
+    def tail(self, count: int = 20) -> List[str]:
+        """The most recent output lines"""
+        return list(self.lines)[-count:]
+
+    def _add_line(self, raw: str, transient: bool) -> Optional[str]:
+        """Record one cleaned output line; returns it unless it was blank"""
+        line = ANSI_ESCAPE_PATTERN.sub('', raw).rstrip()
+        if not line.strip():
+            if not transient:
+                # A bare newline after a progress update keeps the last update
+                self._transient = False
+            return None
+
+        if self._transient and self.lines:
+            self.lines[-1] = line
+        else:
+            self.lines.append(line)
+            self.line_count += 1
+        self._transient = transient
+
+        match = PHASE_PATTERN.match(line.strip())
+        if match:
+            self.phase = match.group(1)
+            self.phase_count += 1
+        return line
+
+    async def stream(self) -> AsyncIterator[str]:
+        """Start the command and yield cleaned output lines (stdout and stderr) as they arrive"""
+        os.makedirs(self._log_dir, exist_ok=True)
+        self.started = time.monotonic()
+        deadline = self.started + self.timeout
+
+        process = await asyncio.create_subprocess_exec(
+            *self.cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            cwd=self.cwd,
+        )
+
+        pending = ''
+        with open(self.log_path, 'wb') as log:
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError
+                    chunk = await asyncio.wait_for(process.stdout.read(READ_CHUNK), remaining)
+                    if not chunk:
+                        break
+                    log.write(chunk)
+
+                    pending += chunk.decode(errors='replace')
+                    # Split on both newline and carriage return so progress bars stream too
+                    segments = re.split(r'(\r\n|\n|\r)', pending)
+                    pending = segments.pop()
+                    if len(pending) > READ_CHUNK:
+                        # Never buffer an unterminated line without bound
+                        segments += [pending, '\n']
+                        pending = ''
+                    for text, separator in zip(segments[::2], segments[1::2]):
+                        line = self._add_line(text, transient=separator == '\r')
+                        if line is not None:
+                            yield line
+
+                if pending:
+                    line = self._add_line(pending, transient=False)
+                    if line is not None:
+                        yield line
+                self.returncode = await process.wait()
+            except asyncio.TimeoutError:
+                self.timed_out = True
+                process.kill()
+                self.returncode = await process.wait()
+                if self.timeout >= 60:
+                    message = f"Timed out after {self.timeout / 60:.0f} minutes"
+                else:
+                    message = f"Timed out after {self.timeout:.0f} seconds"
+                log.write(f"\n{message}\n".encode())
+                self._add_line(message, transient=False)
+                yield message
+            finally:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+
+    async def run(self, on_output: Optional[Callable[['StreamingRunner'], None]] = None,
+                  min_update_interval: float = 0.1) -> bool:
+        """Run to completion, calling on_output at most every min_update_interval; returns success"""
+        last_update = 0.0
+        heartbeat = asyncio.ensure_future(self._heartbeat(on_output)) if on_output else None
+        try:
+            async for _ in self.stream():
+                now = time.monotonic()
+                if on_output and now - last_update >= min_update_interval:
+                    last_update = now
+                    on_output(self)
+        finally:
+            if heartbeat:
+                heartbeat.cancel()
+        if on_output:
+            on_output(self)
+        return self.returncode == 0 and not self.timed_out
+
+    async def _heartbeat(self, on_output: Callable[['StreamingRunner'], None]):
+        """Report progress periodically even when the command prints nothing"""
+        while True:
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+            on_output(self)
+
+    def summary(self, count: int = 40) -> str:
+        """Tail of the output plus where the full log is"""
+        lines = self.tail(count)
+        if self.line_count > len(lines):
+            lines.insert(0, f"... ({self.line_count - len(lines)} earlier lines in the log)")
+        lines.append(f"\nFull log: {self.log_path}")
+        return "\n".join(lines)
@@ -0,0 +1,163 @@
+"""
+Service State Module
+Batched systemd unit state queries over D-Bus (one `systemctl show` call as fallback)
+"""
+
+import subprocess
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    from jeepney import DBusAddress, MatchRule, Properties, new_method_call
+    from jeepney.bus_messages import message_bus
+    from jeepney.io.blocking import open_dbus_connection
+    HAS_DBUS = True
+except ImportError:
+    HAS_DBUS = False
+
+SYSTEMD_BUS_NAME = 'org.freedesktop.systemd1'
+SYSTEMD_PATH = '/org/freedesktop/systemd1'
+UNIT_PATH_PREFIX = '/org/freedesktop/systemd1/unit/'
+
+SHOW_PROPERTIES = 'Id,LoadState,ActiveState,UnitFileState'
+
+
+def unit_state(load_state: str, active_state: str, unit_file_state: str) -> Dict[str, bool]:
+    """Translate raw systemd properties into the status dict used by the UI"""
+    return {
+        'active': active_state == 'active',
+        'enabled': unit_file_state == 'enabled',
+        'exists': bool(load_state) and load_state != 'not-found',
+    }
+
+
+def unit_object_path(unit: str) -> str:
+    """systemd's D-Bus object path for a unit name (non-alphanumerics escaped as _xx)"""
+    escaped = ''.join(c if c.isalnum() else f'_{ord(c):02x}' for c in unit)
+    return UNIT_PATH_PREFIX + escaped
+
+
+def parse_systemctl_show(output: str) -> Dict[str, Dict[str, str]]:
+    """Parse `systemctl show -p ... unit...` output (blank-line separated blocks) keyed by Id"""
+    units = {}
+    for block in output.strip().split('\n\n'):
+        props = {}
+        for line in block.splitlines():
+            if '=' in line:
+                key, value = line.split('=', 1)
+                props[key] = value
+        if props.get('Id'):
+            units[props['Id']] = props
+    return units
+
+
+class ServiceStateBackend:
+    """Query the state of several units in one round trip, and optionally watch for changes"""
+
+    def __init__(self, units: Iterable[str]):
+        self.units: List[str] = list(units)
+        self.use_dbus = HAS_DBUS
+        self._conn = None
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+
+    def query(self, units: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, bool]]:
+        """Return {unit: {'active', 'enabled', 'exists'}} for the given (or configured) units"""
+        units = list(units) if units is not None else self.units
+        if self.use_dbus:
+            try:
+                return self._query_dbus(units)
+            except Exception:
+                # No system bus (containers, minimal hosts): fall back to systemctl
+                self.use_dbus = False
+                self._conn = None
+        return self._query_systemctl(units)
+
+    def _query_dbus(self, units: List[str]) -> Dict[str, Dict[str, bool]]:
+        """Read unit properties from systemd over a persistent system bus connection"""
+        with self._lock:
+            if self._conn is None:
+                self._conn = open_dbus_connection(bus='SYSTEM')
+            manager = DBusAddress(SYSTEMD_PATH, bus_name=SYSTEMD_BUS_NAME,
+                                  interface='org.freedesktop.systemd1.Manager')
+
+            states = {}
+            for unit in units:
+                # LoadUnit also answers for units that do not exist (LoadState=not-found)
+                reply = self._conn.send_and_get_reply(new_method_call(manager, 'LoadUnit', 's', (unit,)))
+                obj = DBusAddress(reply.body[0], bus_name=SYSTEMD_BUS_NAME,
+                                  interface='org.freedesktop.systemd1.Unit')
+                props = self._conn.send_and_get_reply(Properties(obj).get_all()).body[0]
+                states[unit] = unit_state(
+                    props.get('LoadState', ('s', ''))[1],
+                    props.get('ActiveState', ('s', ''))[1],
+                    props.get('UnitFileState', ('s', ''))[1],
+                )
+            return states
+
+    def _query_systemctl(self, units: List[str]) -> Dict[str, Dict[str, bool]]:
+        """Read every unit's state with a single `systemctl show` invocation"""
+        try:
+            result = subprocess.run(
+                ['systemctl', 'show', '-p', SHOW_PROPERTIES, *units],
+                capture_output=True,
+                text=True,
+                timeout=10
+            )
+            parsed = parse_systemctl_show(result.stdout)
+        except Exception:
+            parsed = {}
+
+        states = {}
+        for unit in units:
+            props = parsed.get(unit, {})
+            states[unit] = unit_state(
+                props.get('LoadState', ''),
+                props.get('ActiveState', ''),
+                props.get('UnitFileState', ''),
+            )
+        return states
+
+    def watch(self, callback: Callable[[str], None]) -> bool:
+        """Call callback(unit) from a background thread when systemd reports a property change
+
+        Returns False when D-Bus is unavailable; callers should keep polling then.
+        """
+        if not self.use_dbus:
+            return False
+        try:
+            conn = open_dbus_connection(bus='SYSTEM')
+        except Exception:
+            return False
+
+        self._watcher = threading.Thread(target=self._watch_loop, args=(conn, callback), daemon=True)
+        self._watcher.start()
+        return True
+
+    def _watch_loop(self, conn, callback: Callable[[str], None]):
+        """Subscribe to systemd and forward PropertiesChanged signals for our units"""
+        paths = {unit_object_path(unit): unit for unit in self.units}
+        manager = DBusAddress(SYSTEMD_PATH, bus_name=SYSTEMD_BUS_NAME,
+                              interface='org.freedesktop.systemd1.Manager')
+        rule = MatchRule(
+            type='signal',
+            sender=SYSTEMD_BUS_NAME,
+            interface='org.freedesktop.DBus.Properties',
+            member='PropertiesChanged',
+            path_namespace=UNIT_PATH_PREFIX.rstrip('/'),
+        )
+
+        try:
+            # systemd only emits unit change signals while at least one client is subscribed
+            conn.send_and_get_reply(new_method_call(manager, 'Subscribe'))
+            conn.send_and_get_reply(message_bus.AddMatch(rule))
+            with conn.filter(rule) as queue:
+                while True:
+                    message = conn.recv_until_filtered(queue)
+                    unit = paths.get(message.header.fields.get(1))  # HeaderFields.path
+                    if unit is not None:
+                        callback(unit)
+        except Exception as e:
+            print(f"Service watcher stopped: {e}")
+        finally:
+            conn.close()
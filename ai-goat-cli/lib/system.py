@@ -5,7 +5,18 @@ Provides installation, repair, and service management
 
 import subprocess
 import os
-from typing import Dict, List, Any
+import urllib.request
+from typing import Callable, Dict, Iterator, List, Any, Optional
+
+from nodectl.docker import DockerClient
+from power import STAY_AWAKE_URL
+from runner import StreamingRunner
+from services import ServiceStateBackend
+
+OutputCallback = Callable[[StreamingRunner], None]
+
+# Units shown on the system management screen
+MANAGED_SERVICES = ['localai', 'ollama', 'ai-auto-suspend']
 
 
 class SystemManager:
@@ -13,6 +24,8 @@ class SystemManager:
 
     def __init__(self):
         self.base_dir = self._find_base_dir()
+        self.services = ServiceStateBackend(f'{service}.service' for service in MANAGED_SERVICES)
+        self.docker = DockerClient()
 
     def _find_base_dir(self) -> str:
         """Find the ai-server base directory"""
@@ -28,8 +41,9 @@ class SystemManager:
         # Default to home directory
         return os.path.expanduser('~/ai-server')
 
-    def run_installer(self, script: str, args: List[str] = None) -> tuple[bool, str]:
-        """Run an installation script"""
+    async def run_installer(self, script: str, args: List[str] = None,
+                            on_output: Optional[OutputCallback] = None) -> tuple[bool, str]:
+        """Run an installation script, streaming its output to on_output"""
         script_path = os.path.join(self.base_dir, script)
 
         if not os.path.exists(script_path):
@@ -39,20 +53,21 @@ class SystemManager:
         if args:
             cmd.extend(args)
 
+        name = os.path.splitext(script)[0]
+        return await self._run_streaming(cmd, name, 600, on_output)  # 10 minute timeout
+
+    async def _run_streaming(self, cmd: List[str], name: str, timeout: float,
+                             on_output: Optional[OutputCallback]) -> tuple[bool, str]:
+        """Run a command through the streaming runner; returns (success, output tail + log path)"""
+        runner = StreamingRunner(cmd, name, timeout=timeout, cwd=self.base_dir)
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=600  # 10 minute timeout
-            )
-            return result.returncode == 0, result.stdout + result.stderr
-        except subprocess.TimeoutExpired:
-            return False, "Installation timed out after 10 minutes"
+            success = await runner.run(on_output)
         except Exception as e:
-            return False, f"Error running installer: {e}"
+            return False, f"Error running {name}: {e}"
+        return success, runner.summary()
 
-    def install_localai(self, cpu_only: bool = False, non_interactive: bool = True) -> tuple[bool, str]:
+    async def install_localai(self, cpu_only: bool = False, non_interactive: bool = True,
+                             on_output: Optional[OutputCallback] = None) -> tuple[bool, str]:
         """Install LocalAI"""
         args = []
         if cpu_only:
@@ -60,9 +75,10 @@ class SystemManager:
         if non_interactive:
             args.append('--non-interactive')
 
-        return self.run_installer('install.sh', args)
+        return await self.run_installer('install.sh', args, on_output)
 
-    def install_ollama(self, cpu_only: bool = False, non_interactive: bool = True) -> tuple[bool, str]:
+    async def install_ollama(self, cpu_only: bool = False, non_interactive: bool = True,
+                            on_output: Optional[OutputCallback] = None) -> tuple[bool, str]:
         """Install Ollama"""
         args = []
         if cpu_only:
@@ -70,14 +86,15 @@ class SystemManager:
         if non_interactive:
             args.append('--non-interactive')
 
-        return self.run_installer('install-ollama.sh', args)
+        return await self.run_installer('install-ollama.sh', args, on_output)
 
-    def repair_installation(self, service: str = 'localai') -> tuple[bool, str]:
+    async def repair_installation(self, service: str = 'localai',
+                                  on_output: Optional[OutputCallback] = None) -> tuple[bool, str]:
         """Repair an installation"""
         if service == 'localai':
-            return self.run_installer('install.sh', ['--repair', '--non-interactive'])
+            return await self.run_installer('install.sh', ['--repair', '--non-interactive'], on_output)
         elif service == 'ollama':
-            return self.run_installer('install-ollama.sh', ['--repair', '--non-interactive'])
+            return await self.run_installer('install-ollama.sh', ['--repair', '--non-interactive'], on_output)
         else:
             return False, f"Unknown service: {service}"
 
@@ -132,15 +149,14 @@ class SystemManager:
     def get_container_logs(self, container: str, lines: int = 50) -> str:
         """Get Docker container logs"""
         try:
-            result = subprocess.run(
-                ['docker', 'logs', '--tail', str(lines), container],
-                capture_output=True,
-                text=True
-            )
-            return result.stdout + result.stderr
+            return self.docker.logs(container, tail=lines)
         except Exception as e:
             return f"Error getting container logs: {e}"
 
+    def stream_container_logs(self, container: str, lines: int = 50) -> Iterator[str]:
+        """Follow Docker container logs line by line"""
+        return self.docker.stream_logs(container, tail=lines, follow=True)
+
     def enable_service(self, service: str) -> tuple[bool, str]:
         """Enable a systemd service"""
         try:
@@ -167,45 +183,26 @@ class SystemManager:
 
     def get_service_status(self, service: str) -> Dict[str, Any]:
         """Get detailed service status"""
-        try:
-            # Check if service is active
-            result = subprocess.run(
-                ['systemctl', 'is-active', f'{service}.service'],
-                capture_output=True,
-                text=True
-            )
-            is_active = result.stdout.strip() == 'active'
-
-            # Check if service is enabled
-            result = subprocess.run(
-                ['systemctl', 'is-enabled', f'{service}.service'],
-                capture_output=True,
-                text=True
-            )
-            is_enabled = result.stdout.strip() == 'enabled'
+        return self.get_services_status([service])[service]
 
-            return {
-                'active': is_active,
-                'enabled': is_enabled,
-                'exists': True
-            }
+    def get_services_status(self, services: List[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Get the status of several services in one systemd round trip"""
+        services = services or MANAGED_SERVICES
+        try:
+            states = self.services.query(f'{service}.service' for service in services)
+            return {service: states[f'{service}.service'] for service in services}
         except Exception:
-            return {
-                'active': False,
-                'enabled': False,
-                'exists': False
-            }
+            return {service: {'active': False, 'enabled': False, 'exists': False} for service in services}
 
-    def install_auto_suspend(self) -> tuple[bool, str]:
+    async def install_auto_suspend(self, on_output: Optional[OutputCallback] = None) -> tuple[bool, str]:
         """Install auto-suspend system"""
-        return self.run_installer('install-auto-suspend.sh')
+        return await self.run_installer('install-auto-suspend.sh', on_output=on_output)
 
     def activate_stay_awake(self, hours: int = 1) -> tuple[bool, str]:
         """Activate stay-awake via HTTP request"""
         try:
-            import urllib.request
             seconds = hours * 3600
-            url = f"http://localhost:9876/stay?s={seconds}"
+            url = f"{STAY_AWAKE_URL}/stay?s={seconds}&id=ai-goat"
 
             req = urllib.request.Request(url)
             with urllib.request.urlopen(req, timeout=5) as response:
@@ -214,20 +211,12 @@ class SystemManager:
         except Exception as e:
             return False, f"Error activating stay-awake: {e}"
 
-    def run_ai_server_command(self, command: str) -> tuple[bool, str]:
-        """Run ai-server-manager.sh command"""
+    async def run_ai_server_command(self, command: str,
+                                    on_output: Optional[OutputCallback] = None) -> tuple[bool, str]:
+        """Run ai-server-manager.sh command, streaming its output to on_output"""
         script_path = os.path.join(self.base_dir, 'ai-server-manager.sh')
 
         if not os.path.exists(script_path):
             return False, f"Script not found: {script_path}"
 
-        try:
-            result = subprocess.run(
-                ['bash', script_path, command],
-                capture_output=True,
-                text=True,
-                timeout=300
-            )
-            return result.returncode == 0, result.stdout + result.stderr
-        except Exception as e:
-            return False, f"Error running command: {e}"
+        return await self._run_streaming(['bash', script_path, command], f'ai-server-{command}', 300, on_output)
@@ -4,13 +4,19 @@ Interactive system management interface
 """
 
 import re
+from typing import Callable
+from rich.markup import escape
 from textual.app import ComposeResult
 from textual.containers import Container, Horizontal, Vertical, Grid
 from textual.widgets import Button, Static, Label
 from textual.reactive import reactive
 from textual import work
+from runner import StreamingRunner
 from system import SystemManager
 
+# Output lines shown live under a running command
+PROGRESS_LINES = 15
+
 
 class SystemManagementUI(Container):
     """Interactive system management interface"""
@@ -63,16 +69,34 @@ class SystemManagementUI(Container):
 
     def on_mount(self) -> None:
         self.update_status()
-        # Update status more frequently for better responsiveness
-        self.set_interval(2.0, self.update_status)
+        if self.system_mgr.services.watch(self._on_service_change):
+            # systemd pushes changes; the slow poll only covers missed signals
+            self.set_interval(30.0, self.update_status)
+        else:
+            # Update status more frequently for better responsiveness
+            self.set_interval(2.0, self.update_status)
+
+    def _on_service_change(self, unit: str) -> None:
+        """Refresh the status display when systemd reports a unit change (watcher thread)"""
+        self.app.call_from_thread(self.update_status)
 
+    @work(thread=True, exclusive=True, group="service-status")
     def update_status(self) -> None:
+        """Query service status off the event loop, then render it on the UI thread"""
+        try:
+            statuses = self.system_mgr.get_services_status(['localai', 'ollama', 'ai-auto-suspend'])
+        except Exception:
+            return
+        self.app.call_from_thread(
+            self._render_status,
+            statuses['localai'],
+            statuses['ollama'],
+            statuses['ai-auto-suspend'],
+        )
+
+    def _render_status(self, localai_status, ollama_status, autosuspend_status) -> None:
         """Update service status display"""
         try:
-            localai_status = self.system_mgr.get_service_status('localai')
-            ollama_status = self.system_mgr.get_service_status('ollama')
-            autosuspend_status = self.system_mgr.get_service_status('ai-auto-suspend')
-
             # Format service status with installation state
             def format_status(status):
                 if not status['exists']:
@@ -107,97 +131,114 @@ class SystemManagementUI(Container):
         """Handle button presses"""
         button_id = event.button.id
 
-        # Disable button during operation
-        event.button.disabled = True
+        # Disable button during operation (widgets are only touched on the UI thread)
+        self.app.call_from_thread(setattr, event.button, 'disabled', True)
 
         try:
             output_widget = self.query_one("#system-output", Static)
+            progress = self._progress_reporter(output_widget, event.button.label.plain.strip())
 
             if button_id == "btn-install-localai":
-                output_widget.update("[yellow]Installing LocalAI... (this may take a while)[/yellow]\n\n[dim]Running: sudo bash install.sh --non-interactive[/dim]")
-                success, output = self.system_mgr.install_localai()
+                self._update_output(output_widget, "[yellow]Installing LocalAI... (this may take a while)[/yellow]\n\n[dim]Running: sudo bash install.sh --non-interactive[/dim]")
+                success, output = await self.system_mgr.install_localai(on_output=progress)
                 self._show_result(output_widget, success, "LocalAI Installation", output)
 
             elif button_id == "btn-install-ollama":
-                output_widget.update("[yellow]Installing Ollama... (this may take a while)[/yellow]\n\n[dim]Running: sudo bash install-ollama.sh --non-interactive[/dim]")
-                success, output = self.system_mgr.install_ollama()
+                self._update_output(output_widget, "[yellow]Installing Ollama... (this may take a while)[/yellow]\n\n[dim]Running: sudo bash install-ollama.sh --non-interactive[/dim]")
+                success, output = await self.system_mgr.install_ollama(on_output=progress)
                 self._show_result(output_widget, success, "Ollama Installation", output)
 
             elif button_id == "btn-install-autosuspend":
-                output_widget.update("[yellow]Installing Auto-Suspend system...[/yellow]\n\n[dim]Running: sudo bash install-auto-suspend.sh[/dim]")
-                success, output = self.system_mgr.install_auto_suspend()
+                self._update_output(output_widget, "[yellow]Installing Auto-Suspend system...[/yellow]\n\n[dim]Running: sudo bash install-auto-suspend.sh[/dim]")
+                success, output = await self.system_mgr.install_auto_suspend(on_output=progress)
                 self._show_result(output_widget, success, "Auto-Suspend Installation", output)
 
             elif button_id == "btn-start-both":
-                output_widget.update("[yellow]Starting both services...[/yellow]\n\n[dim]Running: bash ai-server-manager.sh both[/dim]")
-                success, output = self.system_mgr.run_ai_server_command('both')
+                self._update_output(output_widget, "[yellow]Starting both services...[/yellow]\n\n[dim]Running: bash ai-server-manager.sh both[/dim]")
+                success, output = await self.system_mgr.run_ai_server_command('both', progress)
                 self._show_result(output_widget, success, "Start Services", output)
 
             elif button_id == "btn-start-localai":
-                output_widget.update("[yellow]Starting LocalAI...[/yellow]\n\n[dim]Running: bash ai-server-manager.sh localai[/dim]")
-                success, output = self.system_mgr.run_ai_server_command('localai')
+                self._update_output(output_widget, "[yellow]Starting LocalAI...[/yellow]\n\n[dim]Running: bash ai-server-manager.sh localai[/dim]")
+                success, output = await self.system_mgr.run_ai_server_command('localai', progress)
                 self._show_result(output_widget, success, "Start LocalAI", output)
 
             elif button_id == "btn-start-ollama":
-                output_widget.update("[yellow]Starting Ollama...[/yellow]\n\n[dim]Running: bash ai-server-manager.sh ollama[/dim]")
-                success, output = self.system_mgr.run_ai_server_command('ollama')
+                self._update_output(output_widget, "[yellow]Starting Ollama...[/yellow]\n\n[dim]Running: bash ai-server-manager.sh ollama[/dim]")
+                success, output = await self.system_mgr.run_ai_server_command('ollama', progress)
                 self._show_result(output_widget, success, "Start Ollama", output)
 
             elif button_id == "btn-stop-all":
-                output_widget.update("[yellow]Stopping all services...[/yellow]")
-                success, output = self.system_mgr.run_ai_server_command('stop')
+                self._update_output(output_widget, "[yellow]Stopping all services...[/yellow]")
+                success, output = await self.system_mgr.run_ai_server_command('stop', progress)
                 self._show_result(output_widget, success, "Stop Services", output)
 
             elif button_id == "btn-stop-localai":
-                output_widget.update("[yellow]Stopping LocalAI...[/yellow]")
+                self._update_output(output_widget, "[yellow]Stopping LocalAI...[/yellow]")
                 success, output = self.system_mgr.stop_service('localai')
                 self._show_result(output_widget, success, "Stop LocalAI", output)
 
             elif button_id == "btn-stop-ollama":
-                output_widget.update("[yellow]Stopping Ollama...[/yellow]")
+                self._update_output(output_widget, "[yellow]Stopping Ollama...[/yellow]")
                 success, output = self.system_mgr.stop_service('ollama')
                 self._show_result(output_widget, success, "Stop Ollama", output)
 
             elif button_id == "btn-enable-autosuspend":
-                output_widget.update("[yellow]Enabling Auto-Suspend...[/yellow]\n\n[dim]Running: systemctl enable ai-auto-suspend && systemctl start ai-auto-suspend[/dim]")
+                self._update_output(output_widget, "[yellow]Enabling Auto-Suspend...[/yellow]\n\n[dim]Running: systemctl enable ai-auto-suspend && systemctl start ai-auto-suspend[/dim]")
                 success1, output1 = self.system_mgr.enable_service('ai-auto-suspend')
                 success2, output2 = self.system_mgr.start_service('ai-auto-suspend')
                 self._show_result(output_widget, success1 and success2, "Enable Auto-Suspend",
                                 output1 + "\n" + output2)
 
             elif button_id == "btn-disable-autosuspend":
-                output_widget.update("[yellow]Disabling Auto-Suspend...[/yellow]\n\n[dim]Running: systemctl stop ai-auto-suspend && systemctl disable ai-auto-suspend[/dim]")
+                self._update_output(output_widget, "[yellow]Disabling Auto-Suspend...[/yellow]\n\n[dim]Running: systemctl stop ai-auto-suspend && systemctl disable ai-auto-suspend[/dim]")
                 success1, output1 = self.system_mgr.stop_service('ai-auto-suspend')
                 success2, output2 = self.system_mgr.disable_service('ai-auto-suspend')
                 self._show_result(output_widget, success1 and success2, "Disable Auto-Suspend",
                                 output1 + "\n" + output2)
 
             elif button_id == "btn-stay-1h":
-                output_widget.update("[yellow]Activating stay-awake for 1 hour...[/yellow]\n\n[dim]Sending HTTP request to stay-awake server[/dim]")
+                self._update_output(output_widget, "[yellow]Activating stay-awake for 1 hour...[/yellow]\n\n[dim]Sending HTTP request to stay-awake server[/dim]")
                 success, output = self.system_mgr.activate_stay_awake(1)
                 self._show_result(output_widget, success, "Stay Awake (1 hour)", output)
 
             elif button_id == "btn-stay-2h":
-                output_widget.update("[yellow]Activating stay-awake for 2 hours...[/yellow]\n\n[dim]Sending HTTP request to stay-awake server[/dim]")
+                self._update_output(output_widget, "[yellow]Activating stay-awake for 2 hours...[/yellow]\n\n[dim]Sending HTTP request to stay-awake server[/dim]")
                 success, output = self.system_mgr.activate_stay_awake(2)
                 self._show_result(output_widget, success, "Stay Awake (2 hours)", output)
 
             elif button_id == "btn-stay-4h":
-                output_widget.update("[yellow]Activating stay-awake for 4 hours...[/yellow]\n\n[dim]Sending HTTP request to stay-awake server[/dim]")
+                self._update_output(output_widget, "[yellow]Activating stay-awake for 4 hours...[/yellow]\n\n[dim]Sending HTTP request to stay-awake server[/dim]")
                 success, output = self.system_mgr.activate_stay_awake(4)
                 self._show_result(output_widget, success, "Stay Awake (4 hours)", output)
 
             elif button_id == "btn-check-status":
-                output_widget.update("[yellow]Checking status...[/yellow]")
-                success, output = self.system_mgr.run_ai_server_command('status')
+                self._update_output(output_widget, "[yellow]Checking status...[/yellow]")
+                success, output = await self.system_mgr.run_ai_server_command('status', progress)
                 self._show_result(output_widget, success, "System Status", output)
 
             # Update status after operation
-            self.update_status()
+            self.app.call_from_thread(self.update_status)
 
         finally:
             # Re-enable button
-            event.button.disabled = False
+            self.app.call_from_thread(setattr, event.button, 'disabled', False)
+
+    def _update_output(self, widget: Static, text: str):
+        """Update an output widget from the worker thread"""
+        self.app.call_from_thread(widget.update, text)
+
+    def _progress_reporter(self, widget: Static, title: str) -> Callable[[StreamingRunner], None]:
+        """Build an on_output callback that renders live command progress into widget"""
+        def report(runner: StreamingRunner):
+            minutes, seconds = divmod(int(runner.elapsed), 60)
+            lines = [f"[yellow]{escape(title)}... {minutes}:{seconds:02d}[/yellow]"]
+            if runner.phase:
+                lines.append(f"[bold]Step {runner.phase_count}:[/bold] {escape(runner.phase)}")
+            lines.append("")
+            lines += [f"[dim]{escape(line)}[/dim]" for line in runner.tail(PROGRESS_LINES)]
+            self._update_output(widget, "\n".join(lines))
+        return report
 
     def _show_result(self, widget: Static, success: bool, title: str, output: str):
         """Show operation result"""
@@ -206,11 +247,7 @@ class SystemManagementUI(Container):
         else:
             result = f"[bold red]✗ {title} - Failed[/bold red]\n\n"
 
-        # Strip ANSI escape codes from output
-        clean_output = self.strip_ansi_codes(output)
-
-        # Limit output length
-        if len(clean_output) > 1000:
-            clean_output = clean_output[:1000] + "\n\n[dim]... (output truncated)[/dim]"
+        # Strip ANSI escape codes from output (streamed output only carries its tail and log path)
+        clean_output = escape(self.strip_ansi_codes(output))
 
-        widget.update(result + clean_output)
+        self._update_output(widget, result + clean_output)
@@ -0,0 +1,86 @@
+"""
+Telemetry Collector Module
+One background sampler per app that publishes immutable snapshots to subscribed widgets
+"""
+
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Callable, List, Mapping, Optional
+
+from power import PowerManager
+
+
+def freeze(value: Any) -> Any:
+    """Recursively turn dicts into read-only mappings and lists into tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class TelemetryCollector:
+    """Sample system and power status once per interval, regardless of how many widgets listen"""
+
+    def __init__(self, power_mgr: Optional[PowerManager] = None, interval: float = 2.0):
+        self.power_mgr = power_mgr or PowerManager()
+        self.interval = interval
+        self.snapshot: Optional[Mapping[str, Any]] = None
+
+        self._subscribers: List[Callable[[Mapping[str, Any]], None]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def subscribe(self, callback: Callable[[Mapping[str, Any]], None]):
+        """Register a callback for new snapshots (called from the collector thread only)"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[Mapping[str, Any]], None]):
+        """Remove a previously registered callback"""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def collect(self) -> Mapping[str, Any]:
+        """Take one sample: system stats once, power status derived from the same stats"""
+        stats = self.power_mgr.monitor.get_stats()
+        power = self.power_mgr.get_status(stats)
+        return freeze({
+            'timestamp': time.time(),
+            'stats': stats,
+            'power': power,
+        })
+
+    def _publish(self, snapshot: Mapping[str, Any]):
+        """Store the snapshot and hand it to every subscriber"""
+        with self._lock:
+            self.snapshot = snapshot
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                print(f"Error delivering telemetry snapshot: {e}")
+
+    def _run(self):
+        """Collector loop"""
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self._publish(self.collect())
+            except Exception as e:
+                print(f"Error collecting telemetry: {e}")
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        """Start the background collector thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the collector thread"""
+        self._stop.set()
@@ -8,9 +8,28 @@ import os
 import time
 import subprocess
 import logging
-from typing import Dict, Any
+import signal
+import threading
+from typing import Any, Callable, Dict, Optional
 from datetime import datetime
 
+from nodectl.cgroups import DEFAULT_CGROUPS, CgroupLoad, PressureTriggers
+from nodectl.cpu import CpuSampler
+from nodectl.energy import EnergyLedger, PowerMeter
+from nodectl.gpu import GpuTelemetry
+from nodectl.conntrack import ConnectionTracker
+from nodectl.inference import InferenceActivity
+from nodectl.instrument import PROFILE_FILE, TIMINGS_FILE, Instrumentation
+from nodectl.policy import SuspendPolicy, read_probes
+from nodectl.predict import ActivityModel, schedule_rtc_wake
+from nodectl.procacct import DEFAULT_USEFUL_GROUPS, ProcessAccounting
+from nodectl.quiesce import DRAIN_FILE, Drainer, SuspendPipeline, clear_drain_flag, write_drain_flag
+from nodectl.warmcache import ModelUsage, ModelWarmer, ResumeWatcher
+from nodectl.stayawake import StayAwakeWatcher
+from nodectl.scheduler import CheckScheduler
+from nodectl import tsdb
+from nodectl.metrics import MONITOR_SNAPSHOT_FILE, write_snapshot
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -21,21 +40,132 @@ logger = logging.getLogger(__name__)
 # Configuration from environment variables
 WAIT_MINUTES = int(os.getenv('WAIT_MINUTES', '5'))
 CPU_IDLE_THRESHOLD = int(os.getenv('CPU_IDLE_THRESHOLD', '90'))  # CPU must be >90% idle
+CPU_CORE_IDLE_MIN = int(os.getenv('CPU_CORE_IDLE_MIN', '10'))  # Every core must be >10% idle
 GPU_USAGE_MAX = int(os.getenv('GPU_USAGE_MAX', '10'))  # GPU usage must be <10%
 CHECK_INTERVAL = int(os.getenv('CHECK_INTERVAL', '60'))  # Check every 60 seconds
+CHECK_INTERVAL_MIN = int(os.getenv('CHECK_INTERVAL_MIN', '5'))  # Densest sampling near the threshold
+CHECK_INTERVAL_BUSY = int(os.getenv('CHECK_INTERVAL_BUSY', '180'))  # Back-off while clearly busy
+BUSY_GPU_USAGE = int(os.getenv('BUSY_GPU_USAGE', '50'))  # GPU usage at/above this is "clearly busy"
+BUSY_CPU_IDLE = int(os.getenv('BUSY_CPU_IDLE', '50'))  # CPU idle at/below this is "clearly busy"
 CHECK_SSH = os.getenv('CHECK_SSH', 'false').lower() == 'true'  # Optional: check SSH connections
+CHECK_INFERENCE = os.getenv('CHECK_INFERENCE', 'true').lower() == 'true'  # Ollama/LocalAI requests keep awake
+INFERENCE_GRACE_MINUTES = int(os.getenv('INFERENCE_GRACE_MINUTES', '10'))  # Stay awake this long after a request
+CHECK_CGROUPS = os.getenv('CHECK_CGROUPS', 'true').lower() == 'true'  # Model server cgroup load/pressure keeps awake
+IDLE_CGROUPS = [
+    path.strip() for path in os.getenv('IDLE_CGROUPS', ','.join(DEFAULT_CGROUPS)).split(',') if path.strip()
+]
+CGROUP_CPU_MAX = float(os.getenv('CGROUP_CPU_MAX', '10'))  # Model server CPU must be <10% of one core
+CGROUP_PRESSURE_MAX = float(os.getenv('CGROUP_PRESSURE_MAX', '5'))  # ...and stalled <5% of the time
+ACTIVITY_SCOPE = os.getenv('ACTIVITY_SCOPE', 'system').lower()  # 'services': only USEFUL_WORK_GROUPS count as load
+USEFUL_WORK_GROUPS = [
+    group.strip() for group in os.getenv('USEFUL_WORK_GROUPS', ','.join(DEFAULT_USEFUL_GROUPS)).split(',')
+    if group.strip()
+]
+WARM_ON_RESUME = os.getenv('WARM_ON_RESUME', 'true').lower() == 'true'  # Reload frequently used models after resume
+WARM_MODELS = int(os.getenv('WARM_MODELS', '2'))  # At most this many models
+WARM_VRAM_FRACTION = float(os.getenv('WARM_VRAM_FRACTION', '0.9'))  # Share of GPU memory they may fill
+WARM_KEEP_ALIVE = os.getenv('WARM_KEEP_ALIVE', '30m')  # How long Ollama keeps a re-warmed model loaded
+DRAIN_TIMEOUT = int(os.getenv('DRAIN_TIMEOUT', '60'))  # Longest wait for in-flight requests before suspend
+OLLAMA_MODELS_DIR = os.getenv('OLLAMA_MODELS_DIR', '/opt/ollama/models/models')
+PREDICTIVE_WAIT = os.getenv('PREDICTIVE_WAIT', 'true').lower() == 'true'  # Learn the wait window per time of week
+MIN_WAIT_MINUTES = float(os.getenv('MIN_WAIT_MINUTES', '2'))  # Wait when activity is unlikely to return soon
+MAX_WAIT_MINUTES = float(os.getenv('MAX_WAIT_MINUTES', '30'))  # Wait when activity is almost certain to return
+RTC_WAKE = os.getenv('RTC_WAKE', 'false').lower() == 'true'  # Wake via RTC alarm before predicted busy periods
+RTC_WAKE_THRESHOLD = float(os.getenv('RTC_WAKE_THRESHOLD', '0.5'))  # Chance of activity that counts as busy
+RTC_WAKE_LEAD_MINUTES = float(os.getenv('RTC_WAKE_LEAD_MINUTES', '10'))  # Wake this long before it
+SLOW_CHECK_SECONDS = float(os.getenv('SLOW_CHECK_SECONDS', '2'))  # Warn when probing takes longer than this
+PROFILE_CYCLES = int(os.getenv('PROFILE_CYCLES', '10'))  # Check cycles profiled after SIGUSR2
+
+SSH_PORT = 22
+API_PORTS = [8080, 11434, 3000]
+# Model server ports whose in-flight requests are drained before suspend
+DRAIN_PORTS = [8080, 11434]
 
 STAY_AWAKE_FILE = "/run/ai-nodectl/stay_awake_until"
 STATE_FILE = "/var/lib/ai-auto-suspend/idle_since"
+METRICS_DIR = os.getenv('METRICS_DIR', '/var/lib/ai-auto-suspend/metrics')
+ENERGY_LEDGER_FILE = os.getenv('ENERGY_LEDGER_FILE', '/var/lib/ai-auto-suspend/energy.json')
+# The energy ledger is written every this many checks (and before every suspend)
+ENERGY_SAVE_CHECKS = 10
+MODEL_USAGE_FILE = os.getenv('MODEL_USAGE_FILE', '/var/lib/ai-auto-suspend/models.json')
+ACTIVITY_MODEL_FILE = os.getenv('ACTIVITY_MODEL_FILE', '/var/lib/ai-auto-suspend/activity-model.json')
+# The activity model is written every this many checks (and before every suspend)
+ACTIVITY_SAVE_CHECKS = 30
+# Gaps between checks longer than this (a suspend, a stalled loop) are not booked as observed time
+MAX_OBSERVATION_SECONDS = 600
 
 
 class AutoSuspendMonitor:
     """Monitor system activity and trigger suspend when appropriate"""
 
-    def __init__(self):
+    def __init__(self, clock: Callable[[], float] = time.time,
+                 probes: Optional[Dict[str, Callable[[], Any]]] = None):
+        self.clock = clock
+        self.instrument = Instrumentation()
         self.idle_since = None
+        self.checks_total = 0
+        self.suspends_total = 0
+        self.cpu_sampler = CpuSampler()
+        self.gpu = GpuTelemetry()
+        self.accounting = ProcessAccounting(gpu=self.gpu) if ACTIVITY_SCOPE == 'services' else None
+        self.cpu_count = os.cpu_count() or 1
+        self.cgroup_load = CgroupLoad(IDLE_CGROUPS) if CHECK_CGROUPS else None
+        self.pressure = PressureTriggers(self._on_pressure) if CHECK_CGROUPS else None
+        self.connections = ConnectionTracker([SSH_PORT] + API_PORTS)
+        self.inference = InferenceActivity() if CHECK_INFERENCE else None
+        self.models_resident = []
+        self.wakeup = threading.Event()
+        self.stay_awake = StayAwakeWatcher(STAY_AWAKE_FILE, on_change=self._on_stay_awake_change)
+        self.scheduler = CheckScheduler(
+            wait_seconds=WAIT_MINUTES * 60,
+            interval=CHECK_INTERVAL,
+            min_interval=CHECK_INTERVAL_MIN,
+            busy_interval=CHECK_INTERVAL_BUSY,
+            busy_gpu_usage=BUSY_GPU_USAGE,
+            busy_cpu_idle=BUSY_CPU_IDLE,
+        )
         self._ensure_state_dir()
         self._load_state()
+        self.metrics = tsdb.open_store(METRICS_DIR)
+        self.power_meter = PowerMeter(self.gpu)
+        self.energy = EnergyLedger(ENERGY_LEDGER_FILE)
+        self.power_watts = None
+        self.activity_model = ActivityModel(ACTIVITY_MODEL_FILE) if PREDICTIVE_WAIT else None
+        self.wait_minutes = float(WAIT_MINUTES)
+        self.activity_chance = None
+        self.last_observed = None
+        self.model_usage = ModelUsage(MODEL_USAGE_FILE) if CHECK_INFERENCE and WARM_ON_RESUME else None
+        self.warmer = ModelWarmer(models_dir=OLLAMA_MODELS_DIR, keep_alive=WARM_KEEP_ALIVE)
+        self.resume_watcher = ResumeWatcher(self._on_resume)
+        self.drainer = Drainer(
+            ConnectionTracker(DRAIN_PORTS).established_counts,
+            inference=self.inference,
+            stay_awake_active=self.stay_awake.active,
+            timeout=DRAIN_TIMEOUT,
+            wakeup=self.wakeup,
+        )
+        self.policy = SuspendPolicy(
+            cpu_idle_threshold=CPU_IDLE_THRESHOLD,
+            cpu_core_idle_min=CPU_CORE_IDLE_MIN,
+            gpu_usage_max=GPU_USAGE_MAX,
+            check_ssh=CHECK_SSH,
+            cgroup_cpu_max=CGROUP_CPU_MAX,
+            cgroup_pressure_max=CGROUP_PRESSURE_MAX,
+            cpu_count=self.cpu_count,
+            ssh_port=SSH_PORT,
+            api_ports=API_PORTS,
+        )
+        # Readings fed to the policy, by name; tests and the simulator replace them
+        self.probes = {
+            'cpu': self._get_cpu_idle,
+            'gpu': self._get_gpu_usage,
+            'useful': self._get_useful_load,
+            'connections': self._get_connection_counts,
+            'stay_awake': self._check_stay_awake,
+            'inference': self._get_inference_activity,
+            'cgroups': self._get_cgroup_load,
+        }
+        self.probes.update(probes or {})
 
     def _ensure_state_dir(self):
         """Ensure state directory exists"""
@@ -65,221 +195,406 @@ class AutoSuspendMonitor:
         except Exception as e:
             logger.error(f"Error saving state: {e}")
 
-    def _check_stay_awake(self) -> bool:
-        """Check if stay-awake is active"""
-        if not os.path.exists(STAY_AWAKE_FILE):
-            return False
-
-        try:
-            with open(STAY_AWAKE_FILE, 'r') as f:
-                until_timestamp = int(f.read().strip())
-
-            now = int(time.time())
-            if until_timestamp > now:
-                remaining = until_timestamp - now
-                logger.info(f"Stay-awake active: {remaining}s remaining")
-                return True
-            else:
-                # Clean up expired file
-                os.remove(STAY_AWAKE_FILE)
-                return False
-        except Exception as e:
-            logger.warning(f"Error checking stay-awake: {e}")
-            return False
+    def _on_stay_awake_change(self, deadline: int):
+        """Wake the check loop as soon as the stay-awake deadline changes"""
+        if deadline > self.clock():
+            logger.info(f"Stay-awake updated: until {datetime.fromtimestamp(deadline)}")
+        self.wakeup.set()
 
-    def _get_cpu_idle(self) -> float:
-        """Get CPU idle percentage"""
+    def _check_stay_awake(self) -> bool:
+        """Check if stay-awake is active (deadline cached by the watcher)"""
+        remaining = self.stay_awake.remaining()
+        if remaining > 0:
+            logger.info(f"Stay-awake active: {remaining}s remaining")
+            return True
+        return False
+
+    def _get_cpu_idle(self) -> Dict[str, Any]:
+        """Get CPU idle percentages since the previous check"""
         try:
-            # Use top to get CPU idle
-            result = subprocess.run(
-                ['top', '-bn1'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-
-            for line in result.stdout.splitlines():
-                if 'Cpu(s)' in line or '%Cpu' in line:
-                    # Parse line like: "%Cpu(s):  0.3 us,  0.2 sy,  0.0 ni, 99.5 id,  0.0 wa"
-                    parts = line.split(',')
-                    for part in parts:
-                        if 'id' in part:
-                            idle_str = part.strip().split()[0]
-                            return float(idle_str)
-
-            return 0.0
+            return self.cpu_sampler.sample()
         except Exception as e:
             logger.error(f"Error getting CPU idle: {e}")
-            return 0.0
+            return {'idle': 0.0, 'per_core': [], 'min_core_idle': 0.0, 'valid': False}
 
     def _get_gpu_usage(self) -> float:
-        """Get GPU usage percentage"""
-        try:
-            result = subprocess.run(
-                ['nvidia-smi', '--query-gpu=utilization.gpu', '--format=csv,noheader,nounits'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
+        """Get the highest GPU usage percentage across all GPUs"""
+        return self.gpu.max_utilization(self.gpu.sample())
 
-            if result.returncode == 0:
-                usage = float(result.stdout.strip().split('\n')[0])
-                return usage
-            else:
-                return 0.0
-        except FileNotFoundError:
-            # No NVIDIA GPU
-            return 0.0
+    def _get_useful_load(self) -> Optional[Dict[str, Any]]:
+        """CPU/GPU usage of the useful-work groups since the previous check (None unless ACTIVITY_SCOPE=services)"""
+        if self.accounting is None:
+            return None
+        try:
+            result = self.accounting.sample()
         except Exception as e:
-            logger.error(f"Error getting GPU usage: {e}")
-            return 0.0
-
-    def _check_ssh_active(self) -> bool:
-        """Check if SSH sessions are active"""
+            logger.error(f"Error sampling per-process usage: {e}")
+            return None
+        if not result['valid']:
+            return None
+        load = ProcessAccounting.useful_load(result, USEFUL_WORK_GROUPS)
+        load['gpu_attributed'] = result['gpu_attributed']
+        load['top_groups'] = ProcessAccounting.top_groups(result, USEFUL_WORK_GROUPS, 5)
+        return load
+
+    def _get_cgroup_load(self) -> Dict[str, Any]:
+        """Exact CPU time and stall time of the model server cgroups since the previous check"""
+        if self.cgroup_load is None:
+            return {'valid': False, 'cpu_percent': 0.0, 'stall': 0.0}
         try:
-            result = subprocess.run(
-                ['ss', '-tna'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-
-            for line in result.stdout.splitlines():
-                if 'ESTAB' in line and ':22' in line:
-                    return True
-            return False
+            load = self.cgroup_load.sample()
         except Exception as e:
-            logger.error(f"Error checking SSH: {e}")
-            return False
-
-    def _check_api_active(self) -> bool:
-        """Check if API ports have active connections"""
-        api_ports = ['8080', '11434', '3000']
-
+            logger.error(f"Error reading cgroup load: {e}")
+            return {'valid': False, 'cpu_percent': 0.0, 'stall': 0.0}
+        load['stall'] = max(load['cpu_stall'], load['io_stall'], load['memory_stall'])
+        return load
+
+    def _on_pressure(self, path: str):
+        """A PSI trigger fired: load started in a model server cgroup, check right away"""
+        logger.info(f"Load started in {os.path.basename(path)}")
+        self.wakeup.set()
+
+    def _update_pressure_triggers(self):
+        """Let the kernel wake us only while we are counting down to a suspend"""
+        if self.pressure is None:
+            return
+        if self.idle_since is not None:
+            self.pressure.arm(self.cgroup_load.paths())
+        elif self.pressure.armed:
+            self.pressure.disarm()
+
+    def _get_connection_counts(self) -> Dict[int, int]:
+        """Get established connection counts for the SSH and API ports"""
         try:
-            result = subprocess.run(
-                ['ss', '-tna'],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
+            return self.connections.established_counts()
+        except Exception as e:
+            logger.error(f"Error checking connections: {e}")
+            return {}
 
-            for line in result.stdout.splitlines():
-                if 'ESTAB' in line:
-                    for port in api_ports:
-                        if f':{port}' in line:
-                            return True
-            return False
+    def _get_inference_activity(self) -> Dict[str, Any]:
+        """Get resident models, requests in flight and the last request time from the model servers"""
+        if self.inference is None:
+            return {'models_resident': [], 'requests_in_flight': 0, 'last_request': None, 'active': False}
+        try:
+            # The resume warm-up's own loads would otherwise keep the host awake for the grace period
+            activity = self.inference.sample(exclude=self.warmer.recently_loaded())
+            activity['active'] = self.inference.is_active(activity, INFERENCE_GRACE_MINUTES * 60)
+            self._observe_model_usage(activity)
+            return activity
         except Exception as e:
-            logger.error(f"Error checking API connections: {e}")
-            return False
+            logger.error(f"Error checking inference activity: {e}")
+            return {'models_resident': [], 'requests_in_flight': 0, 'last_request': None, 'active': False}
+
+    def _observe_model_usage(self, activity: Dict[str, Any]):
+        """Count model requests for the resume warm-up (the warmer's own loads are already excluded from the sample)"""
+        self.models_resident = activity['models_resident']
+        if self.model_usage is None:
+            return
+        if self.model_usage.observe(activity):
+            try:
+                self.model_usage.save()
+            except OSError as e:
+                logger.error(f"Error saving model usage: {e}")
+
+    def _warm_vram_budget(self) -> int:
+        """Bytes of GPU memory re-warmed models may occupy (0 if the GPU size is unknown)"""
+        _, gpus = self.gpu.latest()
+        total = sum(gpu.get('memory_total', 0) for gpu in gpus)
+        return int(total * 1024 * 1024 * WARM_VRAM_FRACTION)
+
+    def _on_resume(self, suspended: float):
+        """Book the suspended time and re-warm the most likely models after the host resumed"""
+        logger.info(f"Resumed after {suspended / 60:.1f} minutes suspended")
+        # Energy counters are not comparable across the suspend: start a new baseline
+        self.power_meter.reset()
+        self.wakeup.set()
+        self.energy.add_suspended(self.clock(), suspended)
+        self._save_energy()
+        if self.model_usage is None:
+            return
+        models = self.model_usage.plan(WARM_MODELS, self._warm_vram_budget())
+        if not models:
+            return
+        logger.info(f"Re-warming models: {', '.join(models)}")
+        self.warmer.warm_async(models, on_done=lambda summary: logger.info(
+            f"Model warm-up done in {summary['seconds']:.1f}s: loaded {', '.join(summary['loaded']) or 'none'}, "
+            f"prefetched {summary['prefetched_bytes'] / 1024 ** 3:.1f} GiB"
+        ))
 
     def check_conditions(self) -> Dict[str, Any]:
         """Check all suspend conditions"""
-        cpu_idle = self._get_cpu_idle()
-        gpu_usage = self._get_gpu_usage()
-        ssh_active = self._check_ssh_active() if CHECK_SSH else False
-        api_active = self._check_api_active()  # Still check but don't use in conditions
-        stay_awake = self._check_stay_awake()
-
-        cpu_idle_ok = cpu_idle >= CPU_IDLE_THRESHOLD
-        gpu_idle_ok = gpu_usage <= GPU_USAGE_MAX
-        no_ssh = not ssh_active
-        no_api = not api_active
-        no_stay_awake = not stay_awake
-
-        # Primary conditions: CPU and GPU idle + stay_awake flag
-        # API connections are ignored - they don't prevent suspend
-        # SSH is optional (controlled by CHECK_SSH environment variable)
-        if CHECK_SSH:
-            all_conditions_met = (
-                cpu_idle_ok and
-                gpu_idle_ok and
-                no_ssh and
-                no_stay_awake
-            )
-        else:
-            all_conditions_met = (
-                cpu_idle_ok and
-                gpu_idle_ok and
-                no_stay_awake
+        with self.instrument.span('probes'):
+            readings = read_probes(self.probes, self.instrument)
+        return self.policy.evaluate(readings)
+
+    def _record_metrics(self, conditions: Dict[str, Any]):
+        """Append the evaluated conditions to the metrics store"""
+        if self.metrics is None:
+            return
+        _, gpus = self.gpu.latest()
+        flags = (
+            (tsdb.FLAG_IDLE if conditions['all_conditions_met'] else 0) |
+            (tsdb.FLAG_STAY_AWAKE if conditions['stay_awake'] else 0) |
+            (tsdb.FLAG_SSH if conditions['connections'].get(SSH_PORT, 0) else 0) |
+            (tsdb.FLAG_API if conditions['api_active'] else 0) |
+            (tsdb.FLAG_GPU_IDLE if conditions['gpu_idle_ok'] else 0) |
+            (tsdb.FLAG_CPU_IDLE if conditions['cpu_idle_ok'] else 0)
+        )
+        try:
+            self.metrics.record(
+                self.clock(),
+                conditions['cpu_idle'],
+                conditions['gpu_usage'],
+                gpu_temp=max((gpu['temperature'] for gpu in gpus), default=0),
+                gpu_power=sum(gpu['power'] for gpu in gpus),
+                flags=flags,
             )
+        except Exception as e:
+            logger.error(f"Error recording metrics: {e}")
 
-        return {
-            'cpu_idle': cpu_idle,
-            'cpu_idle_ok': cpu_idle_ok,
-            'gpu_usage': gpu_usage,
-            'gpu_idle_ok': gpu_idle_ok,
-            'ssh_active': ssh_active,
-            'no_ssh': no_ssh,
-            'api_active': api_active,
-            'no_api': no_api,
-            'stay_awake': stay_awake,
-            'no_stay_awake': no_stay_awake,
-            'all_conditions_met': all_conditions_met,
+    def _record_energy(self, conditions: Dict[str, Any]):
+        """Meter power since the previous check and book it in the energy ledger"""
+        try:
+            reading = self.power_meter.sample()
+        except Exception as e:
+            logger.error(f"Error reading energy counters: {e}")
+            return
+        self.power_watts = reading if reading['valid'] else None
+        self.energy.add(self.clock(), reading, conditions['all_conditions_met'])
+        if self.checks_total % ENERGY_SAVE_CHECKS == 0:
+            self._save_energy()
+
+    def _save_energy(self):
+        """Persist the energy ledger"""
+        try:
+            self.energy.save()
+        except OSError as e:
+            logger.error(f"Error saving energy ledger: {e}")
+
+    def _update_wait_window(self, conditions: Dict[str, Any]):
+        """Learn from this check and pick the idle wait for the current time of week"""
+        if self.activity_model is None:
+            return
+        now = self.clock()
+        monotonic = time.monotonic()
+        if self.last_observed is not None and monotonic - self.last_observed <= MAX_OBSERVATION_SECONDS:
+            self.activity_model.observe(now, not conditions['all_conditions_met'], monotonic - self.last_observed)
+        self.last_observed = monotonic
+
+        self.wait_minutes, self.activity_chance = self.activity_model.wait_minutes(
+            now, WAIT_MINUTES, MIN_WAIT_MINUTES, MAX_WAIT_MINUTES
+        )
+        self.scheduler.wait_seconds = self.wait_minutes * 60
+        if self.checks_total % ACTIVITY_SAVE_CHECKS == 0:
+            self._save_activity_model()
+
+    def _save_activity_model(self):
+        """Persist the activity model"""
+        if self.activity_model is None:
+            return
+        try:
+            self.activity_model.save()
+        except OSError as e:
+            logger.error(f"Error saving activity model: {e}")
+
+    def _publish_snapshot(self, conditions: Dict[str, Any]):
+        """Write the latest check for the stay-awake server's /metrics endpoint"""
+        _, gpus = self.gpu.latest()
+        snapshot = {
+            'timestamp': self.clock(),
+            'cpu_idle': conditions['cpu_idle'],
+            'cpu_min_core_idle': conditions['cpu_min_core_idle'],
+            'gpus': gpus,
+            'connections': conditions['connections'],
+            'all_conditions_met': conditions['all_conditions_met'],
+            'inference_active': conditions['inference_active'],
+            'models_resident': conditions['models_resident'],
+            'requests_in_flight': conditions['requests_in_flight'],
+            'last_inference_request': conditions['last_inference_request'],
+            'idle_since': self.idle_since,
+            'checks_total': self.checks_total,
+            'suspends_total': self.suspends_total,
+            'power': {
+                'cpu': self.power_watts['cpu_watts'],
+                'gpu': self.power_watts['gpu_watts'],
+                'total': self.power_watts['total_watts'],
+            } if self.power_watts else None,
+            'energy_today': self.energy.summary(),
+            'wait_minutes': self.wait_minutes,
+            'activity_chance': self.activity_chance,
+            'timings': self.instrument.snapshot(),
         }
+        try:
+            write_snapshot(MONITOR_SNAPSHOT_FILE, snapshot)
+        except Exception as e:
+            logger.error(f"Error publishing monitor snapshot: {e}")
+
+    def _announce_drain(self) -> Optional[str]:
+        """Publish the drain flag so health checks stop routing new work here"""
+        write_drain_flag(DRAIN_FILE, self.clock() + DRAIN_TIMEOUT)
+        return None
+
+    def _flush_state(self) -> Optional[str]:
+        """Persist metrics rollups and model usage before the host goes down"""
+        if self.metrics is not None:
+            self.metrics.flush()
+        if self.model_usage is not None:
+            self.model_usage.mark_suspend(self.models_resident)
+        self.energy.save()
+        if self.activity_model is not None:
+            self.activity_model.save()
+        return None
+
+    def _sync_disks(self) -> Optional[str]:
+        """Write back dirty pages (model downloads, caches) so resume does not start with I/O"""
+        os.sync()
+        return None
+
+    def _schedule_wake(self) -> Optional[str]:
+        """Program an RTC wake shortly before the next predicted busy period"""
+        if not RTC_WAKE or self.activity_model is None:
+            return None
+        now = self.clock()
+        busy = self.activity_model.next_busy(now, RTC_WAKE_THRESHOLD)
+        if busy is None or busy - RTC_WAKE_LEAD_MINUTES * 60 <= now:
+            return None
+        wake_at = busy - RTC_WAKE_LEAD_MINUTES * 60
+        if schedule_rtc_wake(wake_at):
+            logger.info(
+                f"RTC wake scheduled for {datetime.fromtimestamp(wake_at)} "
+                f"(activity expected from {datetime.fromtimestamp(busy)})"
+            )
+        # A missing alarm only costs a cold wake later; never block the suspend on it
+        return None
+
+    def _suspend(self) -> Optional[str]:
+        """Final stay-awake check, then suspend"""
+        if self.stay_awake.active():
+            # Stay-awake arrived after the drain
+            return "stay-awake lease"
+        subprocess.run(
+            ['systemctl', 'suspend'],
+            check=True,
+            timeout=10
+        )
+        self.suspends_total += 1
+        return None
 
     def trigger_suspend(self):
-        """Trigger system suspend"""
+        """Trigger system suspend through the quiesce pipeline"""
+        if self.stay_awake.active():
+            # Stay-awake arrived between the check and now
+            logger.info("Stay-awake activated - suspend cancelled")
+            return
+
         logger.info("Triggering system suspend...")
 
-        try:
-            subprocess.run(
-                ['systemctl', 'suspend'],
-                check=True,
-                timeout=10
-            )
-        except Exception as e:
-            logger.error(f"Error triggering suspend: {e}")
+        pipeline = SuspendPipeline([
+            ('announce', self._announce_drain),
+            ('drain', self.drainer.drain),
+            ('flush', self._flush_state),
+            ('sync', self._sync_disks),
+            ('rtc', self._schedule_wake),
+            ('suspend', self._suspend),
+        ], cleanup=lambda: clear_drain_flag(DRAIN_FILE))
+        result = pipeline.run()
+        if result['completed']:
+            logger.info(f"Suspend pipeline took {sum(result['durations'].values()):.2f}s")
+        else:
+            logger.info(f"Suspend cancelled: {result['reason']}")
 
-    def run_check(self):
-        """Run a single check cycle"""
+    def _check_and_record(self) -> Dict[str, Any]:
+        """Probe, log and record one check (everything before the idle-timer decision)"""
+        started = time.perf_counter()
         conditions = self.check_conditions()
+        elapsed = time.perf_counter() - started
+        if elapsed >= SLOW_CHECK_SECONDS:
+            # The idle timer only advances between checks, so slow probes delay suspends too
+            logger.warning(f"Slow check: probes took {elapsed:.2f}s (send SIGUSR1 for per-probe timings)")
 
         log_msg = (
             f"Check: CPU idle={conditions['cpu_idle']:.1f}% (need >={CPU_IDLE_THRESHOLD}%), "
+            f"busiest core idle={conditions['cpu_min_core_idle']:.1f}% (need >={CPU_CORE_IDLE_MIN}%), "
             f"GPU usage={conditions['gpu_usage']:.1f}% (need <={GPU_USAGE_MAX}%), "
             f"stay_awake={conditions['stay_awake']}"
         )
         if CHECK_SSH:
             log_msg += f", SSH={conditions['ssh_active']}"
+        if CHECK_INFERENCE:
+            log_msg += (
+                f", inference={conditions['inference_active']} "
+                f"(models={len(conditions['models_resident'])}, in flight={conditions['requests_in_flight']})"
+            )
 
-        logger.info(log_msg)
-
-        if conditions['all_conditions_met']:
-            # System is idle
-            now = time.time()
+        if self.cgroup_load is not None:
+            log_msg += (
+                f", model server cgroups CPU={conditions['cgroup_cpu_percent']:.1f}% "
+                f"stall={conditions['cgroup_stall']:.1f}%"
+            )
+        if conditions['activity_groups']:
+            log_msg += ", load by group: " + ", ".join(
+                f"{group['name']}{'*' if group['useful'] else ''}={group['cpu_percent']:.0f}%"
+                for group in conditions['activity_groups']
+            )
 
-            if self.idle_since is None:
-                # Start idle timer
-                self.idle_since = now
-                self._save_state()
-                logger.info(f"System became idle at {datetime.fromtimestamp(now)}")
-            else:
-                # Check if idle long enough
-                idle_duration = now - self.idle_since
-                idle_minutes = idle_duration / 60
-
-                logger.info(
-                    f"System idle for {idle_minutes:.1f} minutes "
-                    f"(threshold: {WAIT_MINUTES} minutes)"
-                )
-
-                if idle_minutes >= WAIT_MINUTES:
-                    logger.info("Idle threshold reached - suspending system")
-                    self.trigger_suspend()
-                    # Reset state after suspend
-                    self.idle_since = None
-                    self._save_state()
-        else:
-            # System is active
-            if self.idle_since is not None:
-                idle_duration = time.time() - self.idle_since
-                logger.info(
-                    f"System became active after {idle_duration / 60:.1f} minutes of idle"
-                )
+        logger.info(log_msg)
+        with self.instrument.span('record'):
+            self._record_metrics(conditions)
+            self._record_energy(conditions)
+            self._update_wait_window(conditions)
+        return conditions
+
+    def run_check(self) -> Dict[str, Any]:
+        """Run a single check cycle and return the evaluated conditions"""
+        self.instrument.cycle_started()
+        self.checks_total += 1
+        with self.instrument.span('cycle'):
+            conditions = self._check_and_record()
+
+        now = self.clock()
+        decision = self.policy.decide(conditions, self.idle_since, now, self.wait_minutes * 60)
+        action = decision['action']
+        if action == 'idle_start':
+            self.idle_since = now
+            self._save_state()
+            logger.info(f"System became idle at {datetime.fromtimestamp(now)}")
+        elif action in ('idle', 'suspend'):
+            logger.info(
+                f"System idle for {decision['idle_seconds'] / 60:.1f} minutes "
+                f"(threshold: {self.wait_minutes:.1f} minutes)"
+            )
+            if action == 'suspend':
+                logger.info("Idle threshold reached - suspending system")
+                self.trigger_suspend()
+                # Reset state after suspend
                 self.idle_since = None
                 self._save_state()
+        elif action == 'active':
+            logger.info(f"System became active after {decision['idle_seconds'] / 60:.1f} minutes of idle")
+            self.idle_since = None
+            self._save_state()
+
+        with self.instrument.span('publish'):
+            self._publish_snapshot(conditions)
+        profile = self.instrument.cycle_finished()
+        if profile:
+            logger.info(f"Profile of the last {PROFILE_CYCLES} check cycles written to {profile}")
+        return conditions
+
+    def _dump_timings(self, signum, frame):
+        """SIGUSR1: log the per-span timings and write them to TIMINGS_FILE"""
+        logger.info(self.instrument.report())
+        try:
+            self.instrument.dump(TIMINGS_FILE)
+        except OSError as e:
+            logger.error(f"Error writing timings: {e}")
+
+    def _request_profile(self, signum, frame):
+        """SIGUSR2: profile the next PROFILE_CYCLES check cycles with cProfile"""
+        if self.instrument.profiling:
+            return
+        logger.info(f"Profiling the next {PROFILE_CYCLES} check cycles (written to {PROFILE_FILE})")
+        self.instrument.profile(PROFILE_CYCLES, PROFILE_FILE)
 
     def run(self):
         """Main monitoring loop"""
@@ -287,18 +602,56 @@ class AutoSuspendMonitor:
         logger.info(f"Configuration:")
         logger.info(f"  Wait time: {WAIT_MINUTES} minutes")
         logger.info(f"  CPU idle threshold: >={CPU_IDLE_THRESHOLD}%")
+        logger.info(f"  Per-core idle minimum: >={CPU_CORE_IDLE_MIN}%")
         logger.info(f"  GPU usage threshold: <={GPU_USAGE_MAX}%")
-        logger.info(f"  Check interval: {CHECK_INTERVAL} seconds")
+        logger.info(
+            f"  Check interval: {CHECK_INTERVAL} seconds "
+            f"({CHECK_INTERVAL_MIN}s near threshold, {CHECK_INTERVAL_BUSY}s while busy)"
+        )
         logger.info(f"  Check SSH connections: {CHECK_SSH}")
+        logger.info(f"  Check inference activity: {CHECK_INFERENCE} (grace: {INFERENCE_GRACE_MINUTES} minutes)")
         logger.info(f"  API connections: ignored (do not prevent suspend)")
+        rapl_zones = ', '.join(zone.name for zone in self.power_meter.zones) or 'unavailable'
+        logger.info(f"  Power metering: RAPL {rapl_zones}, GPU energy via {type(self.gpu.backend).__name__}")
+        if CHECK_CGROUPS:
+            logger.info(
+                f"  Model server cgroups: CPU <={CGROUP_CPU_MAX:.0f}% of a core, "
+                f"stall <={CGROUP_PRESSURE_MAX:.0f}% ({', '.join(IDLE_CGROUPS)})"
+            )
+        if ACTIVITY_SCOPE == 'services':
+            logger.info(f"  Activity scope: services ({', '.join(USEFUL_WORK_GROUPS)})")
+        logger.info(f"  Drain before suspend: ports {DRAIN_PORTS}, up to {DRAIN_TIMEOUT} seconds")
+        logger.info(
+            f"  Instrumentation: SIGUSR1 dumps probe timings to {TIMINGS_FILE}, "
+            f"SIGUSR2 profiles {PROFILE_CYCLES} cycles to {PROFILE_FILE}"
+        )
+        if self.activity_model is not None:
+            logger.info(f"  Predictive wait: {MIN_WAIT_MINUTES:g}-{MAX_WAIT_MINUTES:g} minutes by time of week")
+        if RTC_WAKE:
+            logger.info(
+                f"  RTC wake: {RTC_WAKE_LEAD_MINUTES:g} minutes before periods with >={RTC_WAKE_THRESHOLD:.0%} activity"
+            )
+        if self.model_usage is not None:
+            logger.info(f"  Warm on resume: up to {WARM_MODELS} models, {WARM_VRAM_FRACTION:.0%} of GPU memory")
+
+        signal.signal(signal.SIGUSR1, self._dump_timings)
+        signal.signal(signal.SIGUSR2, self._request_profile)
+        self.instrument.count_forks()
+        self.stay_awake.start()
+        self.resume_watcher.start()
 
         while True:
+            delay = CHECK_INTERVAL
             try:
-                self.run_check()
+                conditions = self.run_check()
+                delay = self.scheduler.next_delay(conditions, self.idle_since, self.clock())
+                self._update_pressure_triggers()
             except Exception as e:
                 logger.error(f"Error in check cycle: {e}")
 
-            time.sleep(CHECK_INTERVAL)
+            # Sleep until the next check, or until the stay-awake state changes
+            self.wakeup.wait(delay)
+            self.wakeup.clear()
 
 
 def main():
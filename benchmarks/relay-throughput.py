@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Relay Throughput Benchmark
+Streams data through the wake-on-request relay on loopback, comparing splice(2) with user-space copying
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from nodectl.relay import HAS_SPLICE, connect, relay  # noqa: E402
+
+CHUNK = 1024 * 1024
+
+
+async def run(megabytes: int, zero_copy: bool):
+    """Upstream streams megabytes to a client through one relayed connection; returns (seconds, CPU seconds)"""
+    loop = asyncio.get_running_loop()
+    upstream_listener = socket.create_server(('127.0.0.1', 0))
+    upstream_listener.setblocking(False)
+    front = socket.create_server(('127.0.0.1', 0))
+    front.setblocking(False)
+    block = os.urandom(CHUNK)
+
+    async def source():
+        sock, _ = await loop.sock_accept(upstream_listener)
+        sock.setblocking(False)
+        for _ in range(megabytes):
+            await loop.sock_sendall(sock, block)
+        sock.close()
+
+    async def proxy():
+        client, _ = await loop.sock_accept(front)
+        client.setblocking(False)
+        upstream = await connect('127.0.0.1', upstream_listener.getsockname()[1])
+        await relay(client, upstream, zero_copy)
+        client.close()
+        upstream.close()
+
+    async def sink():
+        sock = await connect('127.0.0.1', front.getsockname()[1])
+        sock.shutdown(socket.SHUT_WR)
+        received = 0
+        buffer = bytearray(CHUNK)
+        while True:
+            count = await loop.sock_recv_into(sock, buffer)
+            if not count:
+                break
+            received += count
+        sock.close()
+        return received
+
+    started, cpu_started = time.perf_counter(), time.process_time()
+    _, _, received = await asyncio.gather(source(), proxy(), sink())
+    if received != megabytes * CHUNK:
+        raise SystemExit(f"Relay lost data: {received} of {megabytes * CHUNK} bytes")
+    return time.perf_counter() - started, time.process_time() - cpu_started
+
+
+def main():
+    """Print throughput and CPU time per mode (source and sink run in the same process)"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    parser.add_argument('--megabytes', type=int, default=512, help='Data streamed per run')
+    parser.add_argument('--runs', type=int, default=3, help='Runs per mode (best is reported)')
+    args = parser.parse_args()
+
+    modes = [('copy', False)] + ([('splice', True)] if HAS_SPLICE else [])
+    for name, zero_copy in modes:
+        results = [asyncio.run(run(args.megabytes, zero_copy)) for _ in range(args.runs)]
+        seconds, cpu = min(results)
+        print(f"  {name:7} {args.megabytes / seconds:9.0f} MB/s  {cpu:6.2f}s CPU for {args.megabytes} MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Idle Policy Replay
+Scores fixed suspend waits against the predictive policy on a recorded or synthetic activity trace
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from nodectl.predict import ActivityModel, FixedWaitPolicy, PredictivePolicy, replay  # noqa: E402
+
+INTERVAL = 60
+
+
+def trace_from_metrics(directory: str, days: int) -> List[Tuple[float, bool]]:
+    """Minute trace from the monitor's 1m rollups (minutes with any non-idle time are active)"""
+    from nodectl import tsdb
+
+    store = tsdb.open_store(directory, writable=False)
+    if store is None:
+        raise SystemExit(f"Cannot open metrics store {directory}")
+    minutes = store.query(time.time() - days * 86400, resolution='1m')
+    store.close()
+    if not len(minutes):
+        raise SystemExit(f"No minute rollups in {directory}")
+
+    recorded = {int(row['ts']) // INTERVAL * INTERVAL: row['idle_seconds'] < row['seconds'] for row in minutes}
+    start, end = min(recorded), max(recorded)
+    # Minutes without samples were spent suspended or powered off: count them as inactive
+    return [(float(ts), bool(recorded.get(ts, False))) for ts in range(start, end + INTERVAL, INTERVAL)]
+
+
+def trace_from_jsonl(path: str) -> List[Tuple[float, bool]]:
+    """Trace from JSON lines with 'ts' and 'active' fields, one per INTERVAL"""
+    with open(path, 'r') as f:
+        return [(float(row['ts']), bool(row['active'])) for row in map(json.loads, f) if row]
+
+
+def synthetic_trace(days: int, seed: int) -> List[Tuple[float, bool]]:
+    """Office hours: bursts of requests on weekdays 09:00-18:00, occasional evening use, quiet weekends"""
+    rng = random.Random(seed)
+    start = time.mktime(time.strptime('2024-01-01', '%Y-%m-%d'))  # a Monday
+    trace = []
+    for minute in range(days * 24 * 60):
+        ts = start + minute * INTERVAL
+        local = time.localtime(ts)
+        if local.tm_wday < 5 and 9 <= local.tm_hour < 18:
+            chance = 0.6 if local.tm_hour != 12 else 0.2
+        elif local.tm_wday < 5 and 19 <= local.tm_hour < 22:
+            chance = 0.05
+        else:
+            chance = 0.002
+        trace.append((ts, rng.random() < chance))
+    return trace
+
+
+def main():
+    """Replay the trace under each policy and print a comparison table"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--metrics-dir', help='Monitor metrics store to read 1m rollups from')
+    source.add_argument('--trace', help='JSON lines trace ({"ts": ..., "active": ...} per minute)')
+    parser.add_argument('--days', type=int, default=28, help='Days of history (or of synthetic trace)')
+    parser.add_argument('--seed', type=int, default=1, help='Synthetic trace seed')
+    parser.add_argument('--fixed', default='2,5,10,30', help='Fixed wait windows to compare (minutes)')
+    parser.add_argument('--default-wait', type=float, default=5, help='Predictive wait until a slot has data')
+    parser.add_argument('--min-wait', type=float, default=2, help='Predictive policy shortest wait')
+    parser.add_argument('--max-wait', type=float, default=30, help='Predictive policy longest wait')
+    parser.add_argument('--rtc-threshold', type=float, default=0.5, help='Chance of activity that triggers RTC wake')
+    parser.add_argument('--idle-watts', type=float, default=80, help='Draw while awake and idle')
+    parser.add_argument('--resume-seconds', type=float, default=90, help='Resume plus model reload time')
+    args = parser.parse_args()
+
+    if args.metrics_dir:
+        trace = trace_from_metrics(args.metrics_dir, args.days)
+    elif args.trace:
+        trace = trace_from_jsonl(args.trace)
+    else:
+        trace = synthetic_trace(args.days, args.seed)
+
+    policies = [FixedWaitPolicy(float(minutes)) for minutes in args.fixed.split(',') if minutes.strip()]
+    policies.append(PredictivePolicy(ActivityModel(), args.default_wait, args.min_wait, args.max_wait))
+    policies.append(PredictivePolicy(ActivityModel(), args.default_wait, args.min_wait, args.max_wait,
+                                     rtc_threshold=args.rtc_threshold))
+
+    active_minutes = sum(1 for _, active in trace if active)
+    print(f"{len(trace)} samples ({len(trace) * INTERVAL / 86400:.1f} days), {active_minutes} active")
+    print(f"  {'policy':32} {'kWh':>8} {'suspends':>9} {'cold wakes':>11} {'RTC wakes':>10} {'waited (min)':>13}")
+    for policy in policies:
+        started = time.perf_counter()
+        result = replay(trace, policy, INTERVAL, idle_watts=args.idle_watts, resume_seconds=args.resume_seconds)
+        elapsed = time.perf_counter() - started
+        print(f"  {result['policy']:32} {result['energy_wh'] / 1000:8.2f} {result['suspends']:9} "
+              f"{result['cold_wakes']:11} {result['rtc_wakes']:10} "
+              f"{result['wake_latency_seconds'] / 60:13.1f}  ({elapsed:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Suspend Policy Simulator
+Replays recorded or synthetic activity through the auto-suspend decision engine, and times the live probe stack
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from nodectl.policy import SuspendPolicy, simulate  # noqa: E402
+from nodectl.scheduler import CheckScheduler  # noqa: E402
+
+SAMPLE_SECONDS = 10
+API_PORT = 11434
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def trace_from_metrics(directory: str, days: int) -> List[Dict[str, Any]]:
+    """Trace from the monitor's raw samples; a resume after a gap counts as one request to a suspended host"""
+    from nodectl import tsdb
+
+    store = tsdb.open_store(directory, writable=False)
+    if store is None:
+        raise SystemExit(f"Cannot open metrics store {directory}")
+    samples = store.query(time.time() - days * 86400)
+    store.close()
+
+    trace: List[Dict[str, Any]] = []
+    for row in samples:
+        ts = float(row['ts'])
+        resumed = bool(trace) and ts - trace[-1]['ts'] > tsdb.MAX_SAMPLE_GAP
+        if resumed:
+            # The host was down: nothing ran until whatever woke it
+            trace.append({'ts': trace[-1]['ts'] + SAMPLE_SECONDS, 'cpu_idle': 100.0, 'gpu_usage': 0.0})
+        flags = int(row['flags'])
+        trace.append({
+            'ts': ts,
+            'cpu_idle': float(row['cpu_idle']),
+            'gpu_usage': float(row['gpu_util']),
+            'ssh': bool(flags & tsdb.FLAG_SSH),
+            'stay_awake': bool(flags & tsdb.FLAG_STAY_AWAKE),
+            'connections': {API_PORT: 1} if flags & tsdb.FLAG_API else {},
+            'requests': 1 if resumed else 0,
+        })
+    if not trace:
+        raise SystemExit(f"No samples in {directory}")
+    return trace
+
+
+def trace_from_jsonl(path: str) -> List[Dict[str, Any]]:
+    """Trace from JSON lines with ts, cpu_idle, gpu_usage, ssh, stay_awake, inference_active and requests"""
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def synthetic_trace(days: int, seed: int) -> List[Dict[str, Any]]:
+    """Office-hours request bursts (GPU busy while serving), occasional evening use, idle nights"""
+    rng = random.Random(seed)
+    start = time.mktime(time.strptime('2024-01-01', '%Y-%m-%d'))  # a Monday
+    trace = []
+    busy_until = 0.0
+    for step in range(days * 86400 // SAMPLE_SECONDS):
+        ts = start + step * SAMPLE_SECONDS
+        local = time.localtime(ts)
+        if local.tm_wday < 5 and 9 <= local.tm_hour < 18:
+            rate = 1 / 600  # a request every ~10 minutes
+        elif local.tm_wday < 5 and 19 <= local.tm_hour < 22:
+            rate = 1 / 3600
+        else:
+            rate = 1 / 43200
+        requests = 1 if rng.random() < rate * SAMPLE_SECONDS else 0
+        if requests:
+            busy_until = ts + rng.uniform(20, 180)
+        busy = ts < busy_until
+        trace.append({
+            'ts': ts,
+            'cpu_idle': rng.uniform(60, 80) if busy else rng.uniform(95, 99),
+            'gpu_usage': rng.uniform(70, 100) if busy else 0.0,
+            'inference_active': busy,
+            'requests': requests,
+        })
+    return trace
+
+
+def probe_overhead(cycles: int, interval: float):
+    """Time each live probe of the monitor's stack on this host"""
+    from nodectl.cgroups import CgroupLoad
+    from nodectl.conntrack import ConnectionTracker
+    from nodectl.cpu import CpuSampler
+    from nodectl.gpu import GpuTelemetry
+    from nodectl.inference import InferenceActivity
+
+    gpu = GpuTelemetry()
+    probes = {
+        'cpu': CpuSampler().sample,
+        'gpu': gpu.sample,
+        'connections': ConnectionTracker([22, 8080, 11434, 3000]).established_counts,
+        'inference': InferenceActivity().sample,
+        'cgroups': CgroupLoad().sample,
+    }
+    timings: Dict[str, List[float]] = {name: [] for name in probes}
+    totals: List[float] = []
+    for _ in range(cycles):
+        cycle_start = time.perf_counter()
+        for name, probe in probes.items():
+            start = time.perf_counter()
+            try:
+                probe()
+            except Exception as e:
+                print(f"  {name}: {e}")
+            timings[name].append(time.perf_counter() - start)
+        totals.append(time.perf_counter() - cycle_start)
+        time.sleep(interval)
+
+    print(f"Probe stack, {cycles} cycles (GPU backend: {type(gpu.backend).__name__})")
+    for name, values in list(timings.items()) + [('cycle', totals)]:
+        print(f"  {name:12} p50={percentile(values, 50) * 1000:8.2f}ms  "
+              f"p95={percentile(values, 95) * 1000:8.2f}ms  max={max(values) * 1000:8.2f}ms")
+
+
+def main():
+    """Simulate each wait setting on the trace and print a comparison table"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--metrics-dir', help='Monitor metrics store to read raw samples from')
+    source.add_argument('--trace', help='JSON lines trace, one probe sample per line')
+    parser.add_argument('--days', type=int, default=14, help='Days of history (or of synthetic trace)')
+    parser.add_argument('--seed', type=int, default=1, help='Synthetic trace seed')
+    parser.add_argument('--wait', default='5,10,30', help='WAIT_MINUTES values to compare')
+    parser.add_argument('--cpu-idle', type=float, default=90, help='CPU_IDLE_THRESHOLD')
+    parser.add_argument('--gpu-max', type=float, default=10, help='GPU_USAGE_MAX')
+    parser.add_argument('--interval', type=float, default=60, help='CHECK_INTERVAL (adaptive, as in the monitor)')
+    parser.add_argument('--resume-seconds', type=float, default=90, help='Resume plus model reload time')
+    parser.add_argument('--probe-cycles', type=int, default=0, help='Also time N cycles of the live probe stack')
+    args = parser.parse_args()
+
+    if args.metrics_dir:
+        trace = trace_from_metrics(args.metrics_dir, args.days)
+    elif args.trace:
+        trace = trace_from_jsonl(args.trace)
+    else:
+        trace = synthetic_trace(args.days, args.seed)
+
+    policy = SuspendPolicy(cpu_idle_threshold=args.cpu_idle, gpu_usage_max=args.gpu_max)
+    print(f"{len(trace)} samples over {(trace[-1]['ts'] - trace[0]['ts']) / 86400:.1f} days, "
+          f"{sum(int(sample.get('requests', 0)) for sample in trace)} requests")
+    print(f"  {'wait':>6} {'suspends':>9} {'hit asleep':>11} {'kWh':>7} {'saved kWh':>10} {'checks':>8} "
+          f"{'decide p50/p95/max (us)':>24} {'speedup':>9}")
+    for wait in (float(minutes) for minutes in args.wait.split(',') if minutes.strip()):
+        scheduler = CheckScheduler(wait * 60, args.interval, 5, 180, 50, 50)
+        result = simulate(trace, policy, wait * 60, scheduler=scheduler, resume_seconds=args.resume_seconds)
+        latency = result['decision_us']
+        print(f"  {wait:5g}m {result['suspends']:9} {result['requests_while_suspended']:11} "
+              f"{result['energy_wh'] / 1000:7.2f} {result['saved_wh'] / 1000:10.2f} {result['checks']:8} "
+              f"{latency['p50']:8.1f}/{latency['p95']:6.1f}/{latency['max']:7.1f} {result['speedup']:8.0f}x")
+
+    if args.probe_cycles:
+        probe_overhead(args.probe_cycles, 0.2)
+
+
+if __name__ == '__main__':
+    main()
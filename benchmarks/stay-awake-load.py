@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Stay-Awake Load Benchmark
+Hammers /stay and /status from many keep-alive clients and reports requests/sec and latency percentiles
+"""
+
+import argparse
+import http.client
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import urlparse
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_client(host: str, port: int, requests: int, client_id: int,
+               latencies: Dict[str, List[float]], errors: List[str], lock: threading.Lock):
+    """One client: a single keep-alive connection alternating /stay and /status"""
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    local = {'/stay': [], '/status': []}
+    local_errors = []
+
+    for i in range(requests):
+        endpoint = '/stay' if i % 2 == 0 else '/status'
+        path = f'/stay?s=600&id=bench-{client_id}' if endpoint == '/stay' else '/status'
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                local_errors.append(f"{path}: HTTP {response.status}")
+        except Exception as e:
+            local_errors.append(f"{path}: {e}")
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=10)
+            continue
+        local[endpoint].append(time.perf_counter() - start)
+
+    conn.close()
+    with lock:
+        for endpoint, values in local.items():
+            latencies[endpoint].extend(values)
+        errors.extend(local_errors)
+
+
+def main():
+    """Run the benchmark against a running stay-awake server"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[-1])
+    parser.add_argument('--url', default='http://127.0.0.1:9876', help='Stay-awake server base URL')
+    parser.add_argument('--clients', type=int, default=50, help='Concurrent keep-alive clients')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per client')
+    args = parser.parse_args()
+
+    target = urlparse(args.url)
+    latencies: Dict[str, List[float]] = {'/stay': [], '/status': []}
+    errors: List[str] = []
+    lock = threading.Lock()
+
+    threads = [
+        threading.Thread(target=run_client,
+                         args=(target.hostname, target.port or 80, args.requests, i, latencies, errors, lock))
+        for i in range(args.clients)
+    ]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{args.clients} clients x {args.requests} requests in {elapsed:.2f}s "
+          f"-> {total / elapsed:.0f} req/s, {len(errors)} errors")
+    for endpoint, values in latencies.items():
+        print(f"  {endpoint:8} n={len(values):6}  "
+              f"p50={percentile(values, 50) * 1000:7.2f}ms  "
+              f"p99={percentile(values, 99) * 1000:7.2f}ms  "
+              f"max={max(values, default=0.0) * 1000:7.2f}ms")
+    for error in errors[:5]:
+        print(f"  error: {error}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+AI Fleet Controller
+Routes OpenAI/Ollama API requests across AI server nodes and wakes suspended nodes on demand
+"""
+
+import asyncio
+import os
+import logging
+
+from nodectl.fleet import FLEET_CONFIG, SERVICES, FleetProxy, FleetRegistry
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+FLEET_CONFIG_FILE = os.getenv('FLEET_CONFIG', FLEET_CONFIG)
+BIND = os.getenv('FLEET_BIND', '0.0.0.0')
+# service=port pairs the controller listens on (forwarded to the same service on the node)
+LISTEN = os.getenv('FLEET_LISTEN', ','.join(f'{service}={port}' for service, port in SERVICES.items()))
+POLL_INTERVAL = float(os.getenv('POLL_INTERVAL', '10'))
+WAKE_TIMEOUT = float(os.getenv('WAKE_TIMEOUT', '180'))
+
+
+async def serve():
+    """Poll the fleet and proxy API requests until stopped"""
+    registry = FleetRegistry.load(FLEET_CONFIG_FILE)
+    listeners = {}
+    for pair in LISTEN.split(','):
+        if '=' in pair:
+            service, port = pair.split('=', 1)
+            listeners[service.strip()] = int(port)
+    logger.info(f"Fleet of {len(registry.nodes)} node(s) from {FLEET_CONFIG_FILE}")
+
+    await registry.poll_all()
+    for node in registry.nodes:
+        logger.info(f"  {node.name} ({node.host}): {node.state}, models: {', '.join(node.models) or '-'}")
+    servers = await FleetProxy(registry, WAKE_TIMEOUT).start(BIND, listeners)
+    await asyncio.gather(
+        registry.poll_forever(POLL_INTERVAL),
+        *(server.serve_forever() for server in servers)
+    )
+
+
+def main():
+    """Start the fleet controller"""
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        logger.info("Shutting down fleet controller")
+
+
+if __name__ == '__main__':
+    main()
@@ -35,6 +35,9 @@ mkdir -p "$RUN_DIR"
 echo -e "${GREEN}[+] Copying scripts...${NC}"
 cp "$SCRIPT_DIR/stay-awake-server.py" "$INSTALL_DIR/"
 cp "$SCRIPT_DIR/auto-suspend-monitor.py" "$INSTALL_DIR/"
+rm -rf "$INSTALL_DIR/nodectl"
+cp -r "$SCRIPT_DIR/nodectl" "$INSTALL_DIR/"
+find "$INSTALL_DIR/nodectl" -name '__pycache__' -prune -exec rm -rf {} +
 chmod +x "$INSTALL_DIR/stay-awake-server.py"
 chmod +x "$INSTALL_DIR/auto-suspend-monitor.py"
 
@@ -0,0 +1,4 @@
+"""
+AI Node Control
+Shared probes and state helpers for the auto-suspend monitor, stay-awake server and AI GOAT CLI
+"""
@@ -0,0 +1,198 @@
+"""
+Cgroup Load Module
+Exact per-service busy time from cgroup v2 cpu.stat and PSI pressure, with kernel pressure triggers
+"""
+
+import glob
+import logging
+import os
+import select
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+# Model server cgroups (systemd units and Docker containers), relative to the cgroup root
+DEFAULT_CGROUPS = (
+    'system.slice/ollama.service',
+    'system.slice/localai.service',
+    'system.slice/docker-*.scope',
+)
+
+PRESSURE_RESOURCES = ('cpu', 'io', 'memory')
+
+
+def read_cpu_usage(path: str) -> Optional[int]:
+    """usage_usec from a cgroup's cpu.stat (None if unavailable)"""
+    try:
+        with open(os.path.join(path, 'cpu.stat'), 'r') as f:
+            for line in f:
+                key, _, value = line.partition(' ')
+                if key == 'usage_usec':
+                    return int(value)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def read_pressure(path: str, resource: str) -> Optional[int]:
+    """Total microseconds some task in the cgroup stalled on a resource (None if PSI is unavailable)"""
+    try:
+        with open(os.path.join(path, f'{resource}.pressure'), 'r') as f:
+            for line in f:
+                if line.startswith('some '):
+                    for field in line.split()[1:]:
+                        key, _, value = field.partition('=')
+                        if key == 'total':
+                            return int(value)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+class CgroupLoad:
+    """CPU time and stall time of the model server cgroups between two samples"""
+
+    def __init__(self, patterns: Iterable[str] = DEFAULT_CGROUPS, root: str = CGROUP_ROOT):
+        self.patterns = list(patterns)
+        self.root = root
+        self._previous: Dict[str, Dict[str, Optional[int]]] = {}
+        self._last_sample: Optional[float] = None
+
+    def paths(self) -> List[str]:
+        """Cgroup directories currently matching the patterns (containers come and go)"""
+        found = []
+        for pattern in self.patterns:
+            found.extend(path for path in glob.glob(os.path.join(self.root, pattern)) if os.path.isdir(path))
+        return sorted(set(found))
+
+    def _read(self, path: str) -> Dict[str, Optional[int]]:
+        """Raw counters of one cgroup"""
+        counters = {'cpu': read_cpu_usage(path)}
+        for resource in PRESSURE_RESOURCES:
+            counters[f'{resource}_stall'] = read_pressure(path, resource)
+        return counters
+
+    def sample(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Busy and stall percentages (of one CPU / of wall time) per cgroup and in total"""
+        now = time.monotonic() if now is None else now
+        elapsed_usec = (now - self._last_sample) * 1e6 if self._last_sample is not None else 0.0
+        self._last_sample = now
+
+        current = {path: self._read(path) for path in self.paths()}
+        groups: Dict[str, Dict[str, float]] = {}
+        for path, counters in current.items():
+            previous = self._previous.get(path)
+            if previous is None or elapsed_usec <= 0:
+                # New cgroup: no window to compare against yet
+                continue
+            group = {}
+            for key, value in counters.items():
+                before = previous.get(key)
+                delta = value - before if value is not None and before is not None else 0
+                # Counters restart when a container is recreated under the same name
+                group[key] = 100.0 * max(0, delta) / elapsed_usec
+            groups[os.path.relpath(path, self.root)] = group
+        self._previous = current
+
+        return {
+            'valid': bool(groups),
+            'groups': groups,
+            'cpu_percent': sum(group['cpu'] for group in groups.values()),
+            'cpu_stall': max((group['cpu_stall'] for group in groups.values()), default=0.0),
+            'io_stall': max((group['io_stall'] for group in groups.values()), default=0.0),
+            'memory_stall': max((group['memory_stall'] for group in groups.values()), default=0.0),
+        }
+
+
+class PressureTriggers:
+    """Kernel PSI triggers on the model server cgroups; on_trigger runs when load starts"""
+
+    def __init__(self, on_trigger: Callable[[str], None], threshold_us: int = 100000,
+                 window_us: int = 2000000, resources: Iterable[str] = PRESSURE_RESOURCES):
+        self.on_trigger = on_trigger
+        self.threshold_us = threshold_us
+        self.window_us = window_us
+        # Same resources as the stall check: a model load can stall on io or memory before using any CPU
+        self.resources = tuple(resources)
+        # One trigger per (cgroup, resource)
+        self._fds: Dict[int, Tuple[str, str]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        # Self-pipe so arm()/disarm() can interrupt the poll
+        self._wake_read, self._wake_write = os.pipe()
+        os.set_blocking(self._wake_read, False)
+
+    @property
+    def armed(self) -> bool:
+        """Whether any trigger is registered"""
+        with self._lock:
+            return bool(self._fds)
+
+    def arm(self, paths: Iterable[str]) -> int:
+        """(Re)register triggers on exactly these cgroups; returns how many are active"""
+        paths = set(paths)
+        with self._lock:
+            for fd, (path, _) in list(self._fds.items()):
+                if path not in paths:
+                    os.close(fd)
+                    del self._fds[fd]
+            wanted = {(path, resource) for path in paths for resource in self.resources}
+            for path, resource in sorted(wanted - set(self._fds.values())):
+                try:
+                    fd = os.open(os.path.join(path, f'{resource}.pressure'), os.O_RDWR | os.O_NONBLOCK)
+                except OSError as e:
+                    logger.debug(f"No {resource} PSI trigger for {path}: {e}")
+                    continue
+                try:
+                    # Fire when tasks stall for threshold_us within any window_us
+                    os.write(fd, f'some {self.threshold_us} {self.window_us}\0'.encode())
+                except OSError as e:
+                    logger.debug(f"{resource} PSI trigger rejected for {path}: {e}")
+                    os.close(fd)
+                    continue
+                self._fds[fd] = (path, resource)
+            count = len(self._fds)
+        if count and self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        os.write(self._wake_write, b'\0')
+        return count
+
+    def disarm(self):
+        """Drop every trigger"""
+        with self._lock:
+            for fd in self._fds:
+                os.close(fd)
+            self._fds = {}
+        os.write(self._wake_write, b'\0')
+
+    def _run(self):
+        """Wait for trigger events (POLLPRI) and report them"""
+        while True:
+            poller = select.poll()
+            poller.register(self._wake_read, select.POLLIN)
+            with self._lock:
+                fds = dict(self._fds)
+            for fd in fds:
+                poller.register(fd, select.POLLPRI)
+            for fd, events in poller.poll():
+                if fd == self._wake_read:
+                    try:
+                        os.read(self._wake_read, 64)
+                    except BlockingIOError:
+                        pass
+                elif events & select.POLLERR:
+                    # The cgroup went away; the next arm() drops it
+                    with self._lock:
+                        if fd in self._fds:
+                            os.close(fd)
+                            del self._fds[fd]
+                elif events & select.POLLPRI and fd in fds:
+                    try:
+                        self.on_trigger(fds[fd][0])
+                    except Exception as e:
+                        logger.error(f"Pressure trigger callback failed: {e}")
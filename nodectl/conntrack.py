@@ -0,0 +1,108 @@
+"""
+Connection Tracking Module
+Counts established TCP connections per local port via inet_diag netlink (/proc/net/tcp fallback)
+"""
+
+import logging
+import os
+import socket
+import struct
+from typing import Dict, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+NETLINK_SOCK_DIAG = 4
+SOCK_DIAG_BY_FAMILY = 20
+NLM_F_REQUEST = 0x01
+NLM_F_DUMP = 0x300
+NLMSG_ERROR = 0x02
+NLMSG_DONE = 0x03
+
+TCP_ESTABLISHED = 1
+
+_NLMSGHDR = struct.Struct('=IHHII')
+# inet_diag_req_v2: family, protocol, ext, pad, states + inet_diag_sockid (48 bytes)
+_INET_DIAG_REQ_V2 = struct.Struct('=BBBBI48s')
+# inet_diag_msg: family, state, timer, retrans, then the big-endian source port
+_INET_DIAG_MSG_HEAD = struct.Struct('=BBBB')
+_BE_PORT = struct.Struct('!H')
+
+PROC_NET_TCP = ('/proc/net/tcp', '/proc/net/tcp6')
+
+
+def _netlink_dump(sock: socket.socket, family: int, seq: int) -> Iterator[int]:
+    """Dump established TCP sockets of one address family and yield their local ports"""
+    request = _INET_DIAG_REQ_V2.pack(family, socket.IPPROTO_TCP, 0, 0, 1 << TCP_ESTABLISHED, b'')
+    header = _NLMSGHDR.pack(_NLMSGHDR.size + len(request), SOCK_DIAG_BY_FAMILY,
+                            NLM_F_REQUEST | NLM_F_DUMP, seq, 0)
+    sock.send(header + request)
+
+    while True:
+        data = sock.recv(1 << 16)
+        offset = 0
+        while offset + _NLMSGHDR.size <= len(data):
+            length, msg_type, _, _, _ = _NLMSGHDR.unpack_from(data, offset)
+            if length < _NLMSGHDR.size:
+                return
+            if msg_type == NLMSG_DONE:
+                return
+            if msg_type == NLMSG_ERROR:
+                errno = -struct.unpack_from('=i', data, offset + _NLMSGHDR.size)[0]
+                raise OSError(errno, os.strerror(errno))
+
+            body = offset + _NLMSGHDR.size
+            _, state, _, _ = _INET_DIAG_MSG_HEAD.unpack_from(data, body)
+            if state == TCP_ESTABLISHED:
+                yield _BE_PORT.unpack_from(data, body + _INET_DIAG_MSG_HEAD.size)[0]
+
+            # Messages are 4-byte aligned
+            offset += (length + 3) & ~3
+
+
+def netlink_established_ports() -> Iterator[int]:
+    """Yield the local port of every established TCP socket using inet_diag"""
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_SOCK_DIAG) as sock:
+        yield from _netlink_dump(sock, socket.AF_INET, 1)
+        yield from _netlink_dump(sock, socket.AF_INET6, 2)
+
+
+def proc_established_ports(paths: Iterable[str] = PROC_NET_TCP) -> Iterator[int]:
+    """Yield the local port of every established TCP socket from /proc/net/tcp{,6}"""
+    for path in paths:
+        try:
+            with open(path, 'r') as f:
+                next(f, None)  # Header line
+                for line in f:
+                    parts = line.split()
+                    # sl local_address rem_address st ...
+                    if len(parts) > 3 and parts[3] == '01':
+                        yield int(parts[1].rsplit(':', 1)[1], 16)
+        except FileNotFoundError:
+            # IPv6 disabled
+            continue
+
+
+class ConnectionTracker:
+    """Count established connections on a fixed set of local ports, one dump per call"""
+
+    def __init__(self, ports: Iterable[int], use_netlink: bool = True):
+        self.ports = frozenset(int(port) for port in ports)
+        self.use_netlink = use_netlink
+
+    def _count(self, ports: Iterable[int]) -> Dict[int, int]:
+        """Count the tracked ports in a stream of local ports"""
+        counts = {port: 0 for port in self.ports}
+        for port in ports:
+            if port in counts:
+                counts[port] += 1
+        return counts
+
+    def established_counts(self) -> Dict[int, int]:
+        """Return {port: established connection count} for every tracked port"""
+        if self.use_netlink:
+            try:
+                return self._count(netlink_established_ports())
+            except OSError as e:
+                logger.warning(f"inet_diag netlink unavailable, using /proc/net/tcp: {e}")
+                self.use_netlink = False
+        return self._count(proc_established_ports())
@@ -0,0 +1,68 @@
+"""
+CPU Sampling Module
+Computes CPU idle percentages from /proc/stat jiffy deltas between samples
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+
+PROC_STAT = "/proc/stat"
+
+# user nice system idle iowait irq softirq steal (guest time is already in user/nice)
+_TOTAL_FIELDS = 8
+_IDLE_FIELD = 3
+
+
+class CpuSampler:
+    """Keep the previous /proc/stat counters and report idle time since the last sample"""
+
+    def __init__(self, stat_path: str = PROC_STAT):
+        self.stat_path = stat_path
+        self._previous = self._read_counters()
+
+    def _read_counters(self) -> Dict[str, Tuple[int, int]]:
+        """Read (total, idle) jiffies for the aggregate line and every core"""
+        counters = {}
+        with open(self.stat_path, 'r') as f:
+            for line in f:
+                if not line.startswith('cpu'):
+                    # cpu lines always come first
+                    break
+                parts = line.split()
+                values = [int(v) for v in parts[1:_TOTAL_FIELDS + 1]]
+                counters[parts[0]] = (sum(values), values[_IDLE_FIELD])
+        return counters
+
+    @staticmethod
+    def _idle_percent(current: Tuple[int, int], previous: Optional[Tuple[int, int]]) -> Optional[float]:
+        """Idle percentage between two (total, idle) readings"""
+        if previous is None:
+            return None
+        total = current[0] - previous[0]
+        idle = current[1] - previous[1]
+        if total <= 0 or idle < 0:
+            # No time elapsed or counters reset (CPU hotplug)
+            return None
+        return 100.0 * idle / total
+
+    def sample(self) -> Dict[str, Any]:
+        """Return aggregate and per-core idle percentages since the previous sample"""
+        current = self._read_counters()
+        previous = self._previous
+        self._previous = current
+
+        idle = self._idle_percent(current['cpu'], previous.get('cpu'))
+
+        per_core: List[float] = []
+        for name, counters in current.items():
+            if name == 'cpu':
+                continue
+            core_idle = self._idle_percent(counters, previous.get(name))
+            if core_idle is not None:
+                per_core.append(core_idle)
+
+        return {
+            'idle': idle if idle is not None else 0.0,
+            'per_core': per_core,
+            'min_core_idle': min(per_core) if per_core else 0.0,
+            'valid': idle is not None,
+        }
@@ -0,0 +1,265 @@
+"""
+Docker Engine API Module
+Pooled HTTP client for the Docker Unix socket (container list, logs, events)
+"""
+
+import http.client
+import json
+import logging
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+logger = logging.getLogger(__name__)
+
+DOCKER_SOCKET = os.environ.get('DOCKER_SOCKET', '/var/run/docker.sock')
+
+# Without an events subscription the container list is trusted this long
+CACHE_TTL = 2.0
+# With one, events invalidate the cache; this only bounds how stale a missed event can leave it
+EVENTS_CACHE_TTL = 30.0
+
+# Multiplexed log frames: stream type (1 = stdout, 2 = stderr), 3 pad bytes, big-endian length
+_FRAME_HEADER = struct.Struct('>BxxxI')
+
+
+class DockerError(Exception):
+    """Docker API request failed"""
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP/1.1 connection over a Unix domain socket"""
+
+    def __init__(self, socket_path: str, timeout: float = 5.0):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+def demux_logs(data: bytes) -> bytes:
+    """Strip the 8-byte frame headers from a multiplexed (non-TTY) log stream"""
+    chunks = []
+    offset = 0
+    while offset + _FRAME_HEADER.size <= len(data):
+        stream, size = _FRAME_HEADER.unpack_from(data, offset)
+        if stream > 2:
+            # Not a multiplexed stream after all (TTY container): return it untouched
+            return data
+        offset += _FRAME_HEADER.size
+        chunks.append(data[offset:offset + size])
+        offset += size
+    return b''.join(chunks)
+
+
+def _is_multiplexed(content_type: str) -> bool:
+    """Whether a logs response carries frame headers (containers without a TTY)"""
+    return content_type != 'application/vnd.docker.raw-stream'
+
+
+class DockerClient:
+    """Docker Engine API client with pooled keep-alive connections and a cached container list"""
+
+    def __init__(self, socket_path: str = DOCKER_SOCKET, cache_ttl: float = CACHE_TTL,
+                 pool_size: int = 4, timeout: float = 5.0):
+        self.socket_path = socket_path
+        self.cache_ttl = cache_ttl
+        self.timeout = timeout
+        self._pool: queue.LifoQueue = queue.LifoQueue(maxsize=pool_size)
+        self._cache: Optional[List[Dict[str, Any]]] = None
+        self._cache_time = 0.0
+        self._cache_lock = threading.Lock()
+        self._events: Optional[threading.Thread] = None
+        self._events_conn: Optional[UnixHTTPConnection] = None
+        self._stop = threading.Event()
+
+    @property
+    def available(self) -> bool:
+        """Whether the Docker socket exists"""
+        return os.path.exists(self.socket_path)
+
+    def _get_connection(self) -> UnixHTTPConnection:
+        """Take an idle connection from the pool, or open a new one"""
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return UnixHTTPConnection(self.socket_path, self.timeout)
+
+    def _put_connection(self, conn: UnixHTTPConnection):
+        """Return a connection to the pool (closing it if the pool is full)"""
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def request(self, method: str, path: str) -> Tuple[int, bytes, str]:
+        """Send one request on a pooled connection; returns (status, body, content type)"""
+        for attempt in range(2):
+            conn = self._get_connection()
+            reused = conn.sock is not None
+            try:
+                conn.request(method, path)
+                response = conn.getresponse()
+                body = response.read()
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                # An idle pooled connection may have been closed by the daemon; retry once fresh
+                if reused and attempt == 0:
+                    continue
+                raise DockerError(f"{method} {path}: {e}") from e
+
+            content_type = response.getheader('Content-Type', '')
+            if response.will_close:
+                conn.close()
+            else:
+                self._put_connection(conn)
+            return response.status, body, content_type
+        raise DockerError(f"{method} {path}: connection failed")
+
+    def get_json(self, path: str) -> Any:
+        """GET a JSON document"""
+        status, body, _ = self.request('GET', path)
+        if status != 200:
+            raise DockerError(f"GET {path}: HTTP {status}")
+        return json.loads(body)
+
+    def invalidate(self):
+        """Drop the cached container list"""
+        with self._cache_lock:
+            self._cache = None
+
+    def containers(self) -> List[Dict[str, Any]]:
+        """Running containers (one request for all of them, cached)"""
+        ttl = EVENTS_CACHE_TTL if self.watching else self.cache_ttl
+        with self._cache_lock:
+            if self._cache is not None and time.monotonic() - self._cache_time < ttl:
+                return self._cache
+
+        containers = self.get_json('/containers/json')
+        with self._cache_lock:
+            self._cache = containers
+            self._cache_time = time.monotonic()
+        return containers
+
+    def running_names(self) -> List[str]:
+        """Names of all running containers"""
+        return [name.lstrip('/') for container in self.containers() for name in container.get('Names', [])]
+
+    def is_running(self, name: str) -> bool:
+        """Whether a running container's name contains name (like `docker ps --filter name=`)"""
+        return any(name in running for running in self.running_names())
+
+    def logs(self, container: str, tail: int = 50) -> str:
+        """Last lines of a container's stdout and stderr"""
+        query = urlencode({'stdout': 1, 'stderr': 1, 'tail': tail})
+        status, body, content_type = self.request('GET', f'/containers/{quote(container)}/logs?{query}')
+        if status != 200:
+            raise DockerError(f"logs {container}: HTTP {status} {body.decode(errors='replace').strip()}")
+        if _is_multiplexed(content_type):
+            body = demux_logs(body)
+        return body.decode(errors='replace')
+
+    def stream_logs(self, container: str, tail: int = 50, follow: bool = True) -> Iterator[str]:
+        """Yield log lines as the container writes them (dedicated connection, not pooled)"""
+        query = urlencode({'stdout': 1, 'stderr': 1, 'tail': tail, 'follow': int(follow)})
+        conn = UnixHTTPConnection(self.socket_path, timeout=None)
+        try:
+            conn.request('GET', f'/containers/{quote(container)}/logs?{query}')
+            response = conn.getresponse()
+            if response.status != 200:
+                raise DockerError(f"logs {container}: HTTP {response.status}")
+
+            if not _is_multiplexed(response.getheader('Content-Type', '')):
+                for line in response:
+                    yield line.decode(errors='replace').rstrip('\n')
+                return
+
+            pending = b''
+            while True:
+                header = response.read(_FRAME_HEADER.size)
+                if len(header) < _FRAME_HEADER.size:
+                    break
+                _, size = _FRAME_HEADER.unpack(header)
+                pending += response.read(size)
+                *lines, pending = pending.split(b'\n')
+                for line in lines:
+                    yield line.decode(errors='replace')
+            if pending:
+                yield pending.decode(errors='replace')
+        finally:
+            conn.close()
+
+    @property
+    def watching(self) -> bool:
+        """Whether the events subscription is alive"""
+        return self._events is not None and self._events.is_alive()
+
+    def watch_events(self, callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> bool:
+        """Subscribe to container events in a background thread; events invalidate the cache
+
+        Returns False if the Docker socket is not there.
+        """
+        if self.watching:
+            return True
+        if not self.available:
+            return False
+        self._stop.clear()
+        self._events = threading.Thread(target=self._watch_loop, args=(callback,), daemon=True)
+        self._events.start()
+        return True
+
+    def _watch_loop(self, callback: Optional[Callable[[Dict[str, Any]], None]]):
+        """Read the /events stream until stopped or the daemon goes away"""
+        query = urlencode({'filters': json.dumps({'type': ['container']})})
+        conn = UnixHTTPConnection(self.socket_path, timeout=None)
+        self._events_conn = conn
+        try:
+            conn.request('GET', f'/events?{query}')
+            response = conn.getresponse()
+            if response.status != 200:
+                logger.warning(f"Docker events subscription failed: HTTP {response.status}")
+                return
+            # The daemon writes one JSON object per line
+            for line in response:
+                if self._stop.is_set():
+                    break
+                if not line.strip():
+                    continue
+                self.invalidate()
+                if callback:
+                    try:
+                        callback(json.loads(line))
+                    except Exception as e:
+                        logger.warning(f"Docker event callback failed: {e}")
+        except (http.client.HTTPException, OSError) as e:
+            logger.warning(f"Docker events subscription ended: {e}")
+        finally:
+            self._events_conn = None
+            conn.close()
+            # Fall back to TTL-only caching from here on
+            self.invalidate()
+
+    def close(self):
+        """Close pooled connections and stop watching events"""
+        self._stop.set()
+        conn = self._events_conn
+        if conn is not None and conn.sock is not None:
+            # Unblock the events reader
+            try:
+                conn.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
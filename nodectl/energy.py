@@ -0,0 +1,239 @@
+"""
+Energy Metering Module
+Measured power from RAPL (/sys/class/powercap) and NVML energy counters, with a per-day energy ledger
+"""
+
+import glob
+import json
+import logging
+import os
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+POWERCAP_ROOT = '/sys/class/powercap'
+ENERGY_LEDGER_FILE = '/var/lib/ai-auto-suspend/energy.json'
+
+# Top-level RAPL zones only (package-N, psys); subzones (core, uncore, dram) are contained in them
+ZONE_PATTERN = re.compile(r'^(intel-rapl|amd-rapl):\d+$')
+
+# Board, RAM, drives and PSU losses that neither RAPL package nor NVML see
+BASE_WATTS = 50.0
+# Counter deltas over longer gaps (a missed check, a suspend) are not averaged
+MAX_INTERVAL = 600.0
+LEDGER_DAYS = 90
+
+
+class RaplZone:
+    """One RAPL energy counter (microjoules, wraps at max_energy_range_uj)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.name = self._read('name') or os.path.basename(path)
+        self.max_range = int(self._read('max_energy_range_uj') or 0)
+
+    def _read(self, name: str) -> Optional[str]:
+        """Read one attribute"""
+        try:
+            with open(os.path.join(self.path, name), 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def energy_uj(self) -> int:
+        """Current counter value; raises OSError if unreadable (root only on most kernels)"""
+        with open(os.path.join(self.path, 'energy_uj'), 'r') as f:
+            return int(f.read())
+
+    def delta(self, current: int, previous: int) -> Optional[int]:
+        """Energy between two readings, across one counter wraparound (None if the wrap point is unknown)"""
+        if current >= previous:
+            return current - previous
+        if not self.max_range:
+            # Wrapped or reset without a readable max_energy_range_uj: the energy used is unknown
+            return None
+        return current + self.max_range - previous
+
+
+def find_rapl_zones(root: str = POWERCAP_ROOT) -> List[RaplZone]:
+    """Readable top-level RAPL zones; only the psys (whole platform) zone if there is one"""
+    zones = []
+    for path in sorted(glob.glob(os.path.join(root, '*'))):
+        if not ZONE_PATTERN.match(os.path.basename(path)):
+            continue
+        zone = RaplZone(path)
+        try:
+            zone.energy_uj()
+        except (OSError, ValueError):
+            continue
+        zones.append(zone)
+    psys = [zone for zone in zones if zone.name == 'psys']
+    return psys or zones
+
+
+class PowerMeter:
+    """Average CPU and GPU watts between samples from hardware energy counters"""
+
+    def __init__(self, gpu=None, powercap_root: str = POWERCAP_ROOT, base_watts: float = BASE_WATTS):
+        self.gpu = gpu
+        self.zones = find_rapl_zones(powercap_root)
+        # The psys zone already covers the whole platform
+        self.base_watts = 0.0 if any(zone.name == 'psys' for zone in self.zones) else base_watts
+        self._rapl: Optional[List[int]] = None
+        self._gpu_energy: Optional[List[Optional[int]]] = None
+        self._last_sample: Optional[float] = None
+
+    @property
+    def has_rapl(self) -> bool:
+        """Whether CPU energy is measured"""
+        return bool(self.zones)
+
+    def reset(self):
+        """Forget the previous sample, e.g. after a suspend (RAPL counters may restart across S3)"""
+        self._rapl = None
+        self._gpu_energy = None
+        self._last_sample = None
+
+    def _cpu_joules(self) -> Optional[float]:
+        """CPU/platform energy since the previous sample"""
+        if not self.zones:
+            return None
+        try:
+            current = [zone.energy_uj() for zone in self.zones]
+        except (OSError, ValueError) as e:
+            logger.warning(f"Error reading RAPL counters: {e}")
+            self._rapl = None
+            return None
+        previous, self._rapl = self._rapl, current
+        if previous is None:
+            return None
+        deltas = [zone.delta(now, before) for zone, now, before in zip(self.zones, current, previous)]
+        if None in deltas:
+            return None
+        return sum(deltas) / 1e6
+
+    def _gpu_joules(self, elapsed: float) -> Optional[float]:
+        """GPU energy since the previous sample; integrates the latest power reading where no counter exists"""
+        if self.gpu is None or not self.gpu.has_gpu:
+            return None
+        current = self.gpu.energy()
+        previous, self._gpu_energy = self._gpu_energy, current
+        _, gpus = self.gpu.latest()
+        if current is None or previous is None or len(previous) != len(current):
+            return sum(gpu['power'] for gpu in gpus) * elapsed if gpus else None
+
+        joules = 0.0
+        for index, (now, before) in enumerate(zip(current, previous)):
+            if now is not None and before is not None and now >= before:
+                joules += (now - before) / 1000.0  # mJ
+            elif index < len(gpus):
+                # No counter on this board, or it restarted (driver reload)
+                joules += gpus[index]['power'] * elapsed
+        return joules
+
+    def sample(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Energy (J) and average power (W) since the previous sample"""
+        # CLOCK_BOOTTIME keeps counting while suspended, so a sample spanning a suspend is not mistaken for a short one
+        now = time.clock_gettime(time.CLOCK_BOOTTIME) if now is None else now
+        elapsed = now - self._last_sample if self._last_sample is not None else 0.0
+        self._last_sample = now
+
+        cpu_joules = self._cpu_joules()
+        gpu_joules = self._gpu_joules(elapsed)
+        valid = 0 < elapsed <= MAX_INTERVAL
+        if not valid:
+            cpu_joules = gpu_joules = None
+
+        cpu_watts = cpu_joules / elapsed if cpu_joules is not None else None
+        gpu_watts = gpu_joules / elapsed if gpu_joules is not None else None
+        return {
+            'valid': valid and cpu_watts is not None,
+            'elapsed': elapsed,
+            'cpu_joules': cpu_joules,
+            'gpu_joules': gpu_joules,
+            'cpu_watts': cpu_watts,
+            'gpu_watts': gpu_watts,
+            'base_watts': self.base_watts,
+            'total_watts': (cpu_watts or 0.0) + (gpu_watts or 0.0) + self.base_watts,
+        }
+
+
+class EnergyLedger:
+    """Energy per calendar day, plus the idle power and suspended time needed to estimate savings"""
+
+    def __init__(self, path: str = ENERGY_LEDGER_FILE):
+        self.path = path
+        self.days: Dict[str, Dict[str, float]] = {}
+        try:
+            with open(path, 'r') as f:
+                self.days = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def _day(timestamp: float) -> str:
+        """Ledger key for a wall-clock time"""
+        return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d')
+
+    def _entry(self, timestamp: float) -> Dict[str, float]:
+        """Ledger entry of the day containing timestamp"""
+        return self.days.setdefault(self._day(timestamp), {
+            'wh': 0.0, 'cpu_wh': 0.0, 'gpu_wh': 0.0, 'awake_seconds': 0.0,
+            'idle_wh': 0.0, 'idle_seconds': 0.0, 'suspended_seconds': 0.0,
+        })
+
+    def add(self, timestamp: float, reading: Dict[str, Any], idle: bool):
+        """Book one power meter reading"""
+        if not reading['valid']:
+            return
+        entry = self._entry(timestamp)
+        cpu_wh = (reading['cpu_joules'] or 0.0) / 3600
+        gpu_wh = (reading['gpu_joules'] or 0.0) / 3600
+        total_wh = reading['total_watts'] * reading['elapsed'] / 3600
+        entry['cpu_wh'] += cpu_wh
+        entry['gpu_wh'] += gpu_wh
+        entry['wh'] += total_wh
+        entry['awake_seconds'] += reading['elapsed']
+        if idle:
+            entry['idle_wh'] += total_wh
+            entry['idle_seconds'] += reading['elapsed']
+
+    def add_suspended(self, timestamp: float, seconds: float):
+        """Book time spent suspended (attributed to the day of resume)"""
+        self._entry(timestamp)['suspended_seconds'] += seconds
+
+    def idle_watts(self) -> Optional[float]:
+        """Average power while idle but awake, over the whole ledger"""
+        idle_wh = sum(entry['idle_wh'] for entry in self.days.values())
+        idle_seconds = sum(entry['idle_seconds'] for entry in self.days.values())
+        return idle_wh * 3600 / idle_seconds if idle_seconds else None
+
+    def summary(self, timestamp: Optional[float] = None) -> Dict[str, Any]:
+        """Energy used and estimated energy saved by suspending on one day"""
+        timestamp = time.time() if timestamp is None else timestamp
+        entry = self.days.get(self._day(timestamp), {})
+        idle_watts = self.idle_watts()
+        suspended = entry.get('suspended_seconds', 0.0)
+        return {
+            'day': self._day(timestamp),
+            'wh': entry.get('wh', 0.0),
+            'cpu_wh': entry.get('cpu_wh', 0.0),
+            'gpu_wh': entry.get('gpu_wh', 0.0),
+            'suspended_seconds': suspended,
+            'idle_watts': idle_watts,
+            # What the host would have drawn idling instead of sleeping (suspend draw is a few watts)
+            'saved_wh': idle_watts * suspended / 3600 if idle_watts is not None else None,
+        }
+
+    def save(self):
+        """Write the ledger atomically, keeping the last LEDGER_DAYS days"""
+        for day in sorted(self.days)[:-LEDGER_DAYS]:
+            del self.days[day]
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.days, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,391 @@
+"""
+Fleet Controller Module
+Node registry, health polling and model-aware API routing that wakes suspended nodes on demand
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from nodectl.wol import BROADCAST, WOL_PORT, send_magic_packet
+
+logger = logging.getLogger(__name__)
+
+FLEET_CONFIG = '/etc/ai-fleet/nodes.json'
+STAY_AWAKE_PORT = 9876
+# API services proxied by the controller, by name, with their default node ports
+SERVICES = {'ollama': 11434, 'localai': 8080}
+
+# Node states
+AWAKE = 'awake'
+DRAINING = 'draining'  # answering /health with 503 on its way into suspend: never routed to
+ASLEEP = 'asleep'
+WAKING = 'waking'
+
+# Concurrent requests a node takes before the fleet wakes another one
+DEFAULT_CAPACITY = 4
+# Magic packets can be lost; re-send this often while a node is waking
+WOL_RESEND_SECONDS = 10
+# /health poll interval while waking
+WAKE_POLL_SECONDS = 1.0
+# Request head and body limits for the proxy
+MAX_HEAD_BYTES = 65536
+MAX_BODY_BYTES = 64 * 1024 * 1024
+RELAY_CHUNK = 65536
+# Request headers that only apply to the client hop
+HOP_HEADERS = frozenset(('connection', 'keep-alive', 'proxy-connection', 'te', 'upgrade'))
+
+REASONS = {
+    400: 'Bad Request', 404: 'Not Found', 411: 'Length Required', 413: 'Payload Too Large',
+    502: 'Bad Gateway', 503: 'Service Unavailable', 504: 'Gateway Timeout',
+}
+
+
+async def http_request(host: str, port: int, method: str, path: str, timeout: float = 2.0) -> Tuple[int, bytes]:
+    """One HTTP/1.0 request without a body; returns (status, body)"""
+    async def exchange() -> Tuple[int, bytes]:
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            writer.write(f'{method} {path} HTTP/1.0\r\nHost: {host}:{port}\r\n\r\n'.encode())
+            response = await reader.read()
+        finally:
+            writer.close()
+        head, _, body = response.partition(b'\r\n\r\n')
+        status_line = head.split(b'\r\n', 1)[0].split()
+        if len(status_line) < 2 or not status_line[1].isdigit():
+            raise ValueError(f"Malformed HTTP response from {host}:{port}")
+        return int(status_line[1]), body
+
+    return await asyncio.wait_for(exchange(), timeout)
+
+
+def request_model(body: bytes) -> Optional[str]:
+    """Model named by an OpenAI or Ollama request body ("model"), if any"""
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return None
+    model = data.get('model') if isinstance(data, dict) else None
+    return model if isinstance(model, str) and model else None
+
+
+class Node:
+    """One fleet member: static configuration plus the state learned from polling it"""
+
+    def __init__(self, name: str, mac: str, host: str, stay_awake_port: int = STAY_AWAKE_PORT,
+                 ports: Optional[Dict[str, int]] = None, broadcast: str = BROADCAST, wol_port: int = WOL_PORT,
+                 capacity: int = DEFAULT_CAPACITY):
+        self.name = name
+        self.mac = mac
+        self.host = host
+        self.stay_awake_port = stay_awake_port
+        self.ports = dict(SERVICES, **(ports or {}))
+        self.broadcast = broadcast
+        self.wol_port = wol_port
+        self.capacity = capacity
+        self.state = ASLEEP
+        # Resident models from the last successful poll; kept while asleep to prefer the node on wake
+        self.models: List[str] = []
+        self.in_flight = 0
+        self.last_seen: Optional[float] = None
+        self.wakes = 0
+        self.wake_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, entry: Dict[str, Any]) -> 'Node':
+        """Node from one registry entry (name, mac and host are required)"""
+        return cls(
+            name=entry['name'],
+            mac=entry['mac'],
+            host=entry['host'],
+            stay_awake_port=int(entry.get('stay_awake_port', STAY_AWAKE_PORT)),
+            ports={service: int(port) for service, port in entry.get('ports', {}).items()},
+            broadcast=entry.get('broadcast', BROADCAST),
+            wol_port=int(entry.get('wol_port', WOL_PORT)),
+            capacity=int(entry.get('capacity', DEFAULT_CAPACITY)),
+        )
+
+    @property
+    def has_capacity(self) -> bool:
+        """Whether another request fits under the node's concurrency limit"""
+        return self.in_flight < self.capacity
+
+    def describe(self) -> Dict[str, Any]:
+        """Registry entry with live state, for /fleet/status"""
+        return {
+            'name': self.name,
+            'mac': self.mac,
+            'host': self.host,
+            'state': self.state,
+            'models': self.models,
+            'in_flight': self.in_flight,
+            'capacity': self.capacity,
+            'last_seen': self.last_seen,
+            'wakes': self.wakes,
+        }
+
+
+class FleetRegistry:
+    """Nodes, their polled state, request placement and wake-on-demand"""
+
+    def __init__(self, nodes: List[Node], send_wol: Callable[[str, str, int], None] = send_magic_packet,
+                 poll_timeout: float = 2.0, wake_poll_seconds: float = WAKE_POLL_SECONDS,
+                 clock: Callable[[], float] = time.time):
+        self.nodes = nodes
+        self.send_wol = send_wol
+        self.poll_timeout = poll_timeout
+        self.wake_poll_seconds = wake_poll_seconds
+        self.clock = clock
+
+    @classmethod
+    def load(cls, path: str = FLEET_CONFIG, **kwargs) -> 'FleetRegistry':
+        """Registry from a JSON file {"nodes": [{"name", "mac", "host", ...}, ...]}"""
+        with open(path, 'r') as f:
+            config = json.load(f)
+        return cls([Node.from_config(entry) for entry in config.get('nodes', [])], **kwargs)
+
+    async def poll(self, node: Node) -> str:
+        """Refresh one node's state from its stay-awake /health and its resident models from Ollama"""
+        try:
+            status, _ = await http_request(node.host, node.stay_awake_port, 'GET', '/health', self.poll_timeout)
+        except (OSError, asyncio.TimeoutError, ValueError):
+            if node.state != WAKING:
+                node.state = ASLEEP
+            return node.state
+        if status != 200:
+            # 503 while the monitor drains before a suspend
+            node.state = DRAINING
+            return node.state
+        node.state = AWAKE
+        node.last_seen = self.clock()
+        if 'ollama' in node.ports:
+            node.models = await self._resident_models(node)
+        return node.state
+
+    async def _resident_models(self, node: Node) -> List[str]:
+        """Names from Ollama /api/ps; the previous list if the query fails"""
+        try:
+            status, body = await http_request(node.host, node.ports['ollama'], 'GET', '/api/ps', self.poll_timeout)
+            if status != 200:
+                return node.models
+            return [model.get('name') or model.get('model') for model in json.loads(body).get('models', [])]
+        except (OSError, asyncio.TimeoutError, ValueError, AttributeError):
+            return node.models
+
+    async def poll_all(self):
+        """Poll every node that is not being woken (wakes poll on their own schedule)"""
+        await asyncio.gather(*(self.poll(node) for node in self.nodes if node.state != WAKING))
+
+    async def poll_forever(self, interval: float):
+        """Background registry refresh"""
+        while True:
+            await self.poll_all()
+            await asyncio.sleep(interval)
+
+    def choose(self, model: Optional[str]) -> Optional[Node]:
+        """Placement for a request: awake with the model loaded, awake with room, then a node to wake
+
+        Among awake nodes the least busy wins. A suspended node is only woken when every awake
+        node is at capacity (one already waking is preferred, then one that had the model
+        loaded); with nothing left to wake the least busy awake node takes the overflow.
+        """
+        awake = [node for node in self.nodes if node.state == AWAKE]
+        open_nodes = [node for node in awake if node.has_capacity]
+        if model is not None:
+            loaded = [node for node in open_nodes if model in node.models]
+            if loaded:
+                return min(loaded, key=lambda node: node.in_flight)
+        if open_nodes:
+            return min(open_nodes, key=lambda node: node.in_flight)
+        sleeping = [node for node in self.nodes if node.state in (WAKING, ASLEEP) and node.has_capacity]
+        if sleeping:
+            # Stable order: configuration order breaks ties
+            return min(sleeping, key=lambda node: (node.state != WAKING, model not in node.models))
+        if awake:
+            return min(awake, key=lambda node: node.in_flight / max(node.capacity, 1))
+        return None
+
+    def acquire(self, model: Optional[str]) -> Optional[Node]:
+        """Choose a node and reserve a request slot on it"""
+        node = self.choose(model)
+        if node is not None:
+            node.in_flight += 1
+        return node
+
+    def release(self, node: Node):
+        """Return a request slot"""
+        node.in_flight = max(0, node.in_flight - 1)
+
+    async def wake(self, node: Node, timeout: float) -> bool:
+        """Wake a node and wait until its /health answers; concurrent callers share one wake"""
+        if node.state == AWAKE:
+            return True
+        if node.wake_task is None or node.wake_task.done():
+            node.wake_task = asyncio.ensure_future(self._wake(node, timeout))
+        return await asyncio.shield(node.wake_task)
+
+    async def _wake(self, node: Node, timeout: float) -> bool:
+        """Send magic packets until the node answers or the timeout passes"""
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        next_packet = started
+        node.state = WAKING
+        node.wakes += 1
+        logger.info(f"Waking {node.name} ({node.mac}) for queued requests")
+        while loop.time() - started < timeout:
+            if loop.time() >= next_packet:
+                try:
+                    self.send_wol(node.mac, node.broadcast, node.wol_port)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not send magic packet to {node.name}: {e}")
+                next_packet = loop.time() + WOL_RESEND_SECONDS
+            if await self.poll(node) == AWAKE:
+                logger.info(f"{node.name} is awake after {loop.time() - started:.1f}s")
+                return True
+            # A node still draining into its previous suspend is waited out like a sleeping one
+            node.state = WAKING
+            await asyncio.sleep(self.wake_poll_seconds)
+        node.state = ASLEEP
+        logger.warning(f"{node.name} did not answer /health within {timeout:.0f}s")
+        return False
+
+    def status(self) -> Dict[str, Any]:
+        """Fleet state for /fleet/status"""
+        return {'nodes': [node.describe() for node in self.nodes]}
+
+
+class FleetProxy:
+    """HTTP front end for the OpenAI/Ollama APIs; holds each request until its node can take it"""
+
+    def __init__(self, registry: FleetRegistry, wake_timeout: float = 180.0, connect_timeout: float = 5.0):
+        self.registry = registry
+        self.wake_timeout = wake_timeout
+        self.connect_timeout = connect_timeout
+
+    async def start(self, bind: str, listeners: Dict[str, int]) -> List[asyncio.AbstractServer]:
+        """Listen on one port per service; requests are forwarded to the same service on the chosen node"""
+        servers = []
+        for service, port in listeners.items():
+            async def handle(reader, writer, service=service):
+                await self.handle(reader, writer, service)
+            servers.append(await asyncio.start_server(handle, bind, port, limit=MAX_HEAD_BYTES))
+            logger.info(f"Proxying {service} on {bind}:{port}")
+        return servers
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, service: str):
+        """Serve one client connection (one request; the response closes it)"""
+        try:
+            await self._handle(reader, writer, service)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, service: str):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.LimitOverrunError:
+            await self._respond(writer, 413, 'Request head too large')
+            return
+        lines = head.decode('latin-1').split('\r\n')
+        request_line = lines[0].split()
+        if len(request_line) != 3:
+            await self._respond(writer, 400, 'Malformed request line')
+            return
+        method, path, _ = request_line
+        headers = []
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers.append((name.strip(), value.strip()))
+        fields = {name.lower(): value for name, value in headers}
+
+        if path == '/fleet/status':
+            await self._respond(writer, 200, json.dumps(self.registry.status()), 'application/json')
+            return
+        if 'chunked' in fields.get('transfer-encoding', '').lower():
+            await self._respond(writer, 411, 'Chunked request bodies are not supported')
+            return
+        try:
+            length = int(fields.get('content-length', '0'))
+        except ValueError:
+            await self._respond(writer, 400, 'Invalid Content-Length')
+            return
+        if length > MAX_BODY_BYTES:
+            await self._respond(writer, 413, 'Request body too large')
+            return
+        body = await reader.readexactly(length) if length else b''
+
+        model = request_model(body) if body else None
+        forwarded = [f'{method} {path} HTTP/1.1']
+        forwarded += [f'{name}: {value}' for name, value in headers if name.lower() not in HOP_HEADERS]
+        forwarded.append('Connection: close')
+        request = ('\r\n'.join(forwarded) + '\r\n\r\n').encode('latin-1') + body
+
+        # A node can suspend between polls: an unreachable one is re-checked and the request placed again
+        for _ in range(len(self.registry.nodes) + 1):
+            node = self.registry.acquire(model)
+            if node is None:
+                await self._respond(writer, 503, 'No fleet node available')
+                return
+            try:
+                if node.state != AWAKE and not await self.registry.wake(node, self.wake_timeout):
+                    await self._respond(writer, 504, f'{node.name} did not wake up')
+                    return
+                port = node.ports.get(service)
+                if port is None:
+                    await self._respond(writer, 404, f'{node.name} does not run {service}')
+                    return
+                try:
+                    upstream_reader, upstream_writer = await self._connect(node.host, port)
+                except (OSError, asyncio.TimeoutError) as e:
+                    if await self.registry.poll(node) == AWAKE:
+                        await self._respond(writer, 502, f'{service} on {node.name} is unreachable: {e}')
+                        return
+                    logger.info(f"{node.name} went to sleep since the last poll, placing the request again")
+                    continue
+                logger.info(f"{method} {path} model={model or '-'} -> {node.name}")
+                await self._forward(upstream_reader, upstream_writer, request, writer)
+                return
+            finally:
+                self.registry.release(node)
+        await self._respond(writer, 502, 'No fleet node could take the request')
+
+    async def _connect(self, host: str, port: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Open a backend connection, retrying refusals for up to connect_timeout"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.connect_timeout
+        while True:
+            try:
+                return await asyncio.wait_for(asyncio.open_connection(host, port), self.connect_timeout)
+            except ConnectionRefusedError:
+                # /health can answer before the model server is listening after a resume
+                if loop.time() >= deadline:
+                    raise
+                await asyncio.sleep(0.25)
+
+    async def _forward(self, upstream_reader: asyncio.StreamReader, upstream_writer: asyncio.StreamWriter,
+                       request: bytes, writer: asyncio.StreamWriter):
+        """Send the request to the node and relay the response until the backend closes"""
+        try:
+            upstream_writer.write(request)
+            await upstream_writer.drain()
+            while True:
+                chunk = await upstream_reader.read(RELAY_CHUNK)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+        finally:
+            upstream_writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body: str, content_type: str = 'text/plain'):
+        """Answer the client directly"""
+        payload = body.encode()
+        writer.write(
+            f'HTTP/1.1 {status} {REASONS.get(status, "OK")}\r\nContent-Type: {content_type}\r\n'
+            f'Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n'.encode() + payload
+        )
+        await writer.drain()
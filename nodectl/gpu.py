@@ -0,0 +1,413 @@
+"""
+GPU Telemetry Module
+Long-lived NVIDIA GPU telemetry (NVML via ctypes, nvidia-smi streaming fallback, replay for tests)
+"""
+
+import ctypes
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Per-GPU sample keys; memory is reported in MiB, power in watts
+GPU_FIELDS = (
+    'index', 'name', 'utilization', 'memory_utilization', 'power',
+    'power_limit', 'temperature', 'memory_used', 'memory_total',
+)
+
+SMI_QUERY = 'index,name,utilization.gpu,utilization.memory,power.draw,power.limit,temperature.gpu,memory.used,memory.total'
+
+
+def empty_sample(index: int = 0, name: str = '') -> Dict[str, Any]:
+    """Return a zeroed per-GPU sample"""
+    return {
+        'index': index,
+        'name': name,
+        'utilization': 0.0,
+        'memory_utilization': 0.0,
+        'power': 0.0,
+        'power_limit': 0.0,
+        'temperature': 0,
+        'memory_used': 0.0,
+        'memory_total': 0.0,
+    }
+
+
+class NvmlError(Exception):
+    """Raised when an NVML call fails"""
+
+
+class _NvmlUtilization(ctypes.Structure):
+    _fields_ = [('gpu', ctypes.c_uint), ('memory', ctypes.c_uint)]
+
+
+class _NvmlMemory(ctypes.Structure):
+    _fields_ = [('total', ctypes.c_ulonglong), ('free', ctypes.c_ulonglong), ('used', ctypes.c_ulonglong)]
+
+
+class _NvmlProcessInfo(ctypes.Structure):
+    _fields_ = [('pid', ctypes.c_uint), ('used_gpu_memory', ctypes.c_ulonglong),
+                ('gpu_instance_id', ctypes.c_uint), ('compute_instance_id', ctypes.c_uint)]
+
+
+class _NvmlProcessUtilization(ctypes.Structure):
+    _fields_ = [('pid', ctypes.c_uint), ('timestamp', ctypes.c_ulonglong), ('sm', ctypes.c_uint),
+                ('memory', ctypes.c_uint), ('encoder', ctypes.c_uint), ('decoder', ctypes.c_uint)]
+
+
+class NvmlBackend:
+    """Query GPUs through a single NVML session kept open for the process lifetime"""
+
+    NVML_SUCCESS = 0
+    NVML_ERROR_NOT_FOUND = 6
+    NVML_ERROR_INSUFFICIENT_SIZE = 7
+    NVML_TEMPERATURE_GPU = 0
+    # usedGpuMemory when the driver cannot attribute memory (e.g. no permission)
+    NVML_VALUE_NOT_AVAILABLE = 2 ** 64 - 1
+
+    def __init__(self, library: str = 'libnvidia-ml.so.1'):
+        self.lib = ctypes.CDLL(library)
+        self._call('nvmlInit_v2')
+
+        count = ctypes.c_uint()
+        self._call('nvmlDeviceGetCount_v2', ctypes.byref(count))
+
+        self.handles = []
+        self.names = []
+        for index in range(count.value):
+            handle = ctypes.c_void_p()
+            self._call('nvmlDeviceGetHandleByIndex_v2', ctypes.c_uint(index), ctypes.byref(handle))
+            name = ctypes.create_string_buffer(96)
+            try:
+                self._call('nvmlDeviceGetName', handle, name, ctypes.c_uint(len(name)))
+            except NvmlError:
+                pass
+            self.handles.append(handle)
+            self.names.append(name.value.decode(errors='replace'))
+        # Per-device timestamp of the newest process utilization sample already seen
+        self._process_seen = [0] * len(self.handles)
+
+    def _call(self, function: str, *args):
+        """Call an NVML function and raise on a non-success return code"""
+        ret = getattr(self.lib, function)(*args)
+        if ret != self.NVML_SUCCESS:
+            raise NvmlError(f"{function} failed with code {ret}")
+
+    def _uint(self, function: str, handle, *args) -> Optional[int]:
+        """Call an NVML getter with a trailing unsigned int out-parameter"""
+        value = ctypes.c_uint()
+        try:
+            self._call(function, handle, *args, ctypes.byref(value))
+        except NvmlError:
+            # Field not supported on this board (e.g. power on some consumer cards)
+            return None
+        return value.value
+
+    def read(self) -> List[Dict[str, Any]]:
+        """Read one sample for every GPU"""
+        samples = []
+        for index, handle in enumerate(self.handles):
+            sample = empty_sample(index, self.names[index])
+
+            util = _NvmlUtilization()
+            try:
+                self._call('nvmlDeviceGetUtilizationRates', handle, ctypes.byref(util))
+                sample['utilization'] = float(util.gpu)
+                sample['memory_utilization'] = float(util.memory)
+            except NvmlError:
+                pass
+
+            power = self._uint('nvmlDeviceGetPowerUsage', handle)
+            if power is not None:
+                sample['power'] = power / 1000.0  # mW -> W
+            limit = self._uint('nvmlDeviceGetEnforcedPowerLimit', handle)
+            if limit is not None:
+                sample['power_limit'] = limit / 1000.0
+            temp = self._uint('nvmlDeviceGetTemperature', handle, ctypes.c_int(self.NVML_TEMPERATURE_GPU))
+            if temp is not None:
+                sample['temperature'] = temp
+
+            memory = _NvmlMemory()
+            try:
+                self._call('nvmlDeviceGetMemoryInfo', handle, ctypes.byref(memory))
+                sample['memory_used'] = memory.used / (1024 ** 2)
+                sample['memory_total'] = memory.total / (1024 ** 2)
+            except NvmlError:
+                pass
+
+            samples.append(sample)
+        return samples
+
+    def _compute_processes(self, handle) -> List[_NvmlProcessInfo]:
+        """Compute processes with a context on one GPU"""
+        size = 32
+        while True:
+            count = ctypes.c_uint(size)
+            infos = (_NvmlProcessInfo * size)()
+            ret = self.lib.nvmlDeviceGetComputeRunningProcesses_v3(handle, ctypes.byref(count), infos)
+            if ret == self.NVML_ERROR_INSUFFICIENT_SIZE and size < 4096:
+                size = max(size * 2, count.value)
+                continue
+            if ret != self.NVML_SUCCESS:
+                raise NvmlError(f"nvmlDeviceGetComputeRunningProcesses_v3 failed with code {ret}")
+            return list(infos[:count.value])
+
+    def _process_utilization(self, index: int, handle) -> Dict[int, int]:
+        """SM utilization per pid since the previous call on this GPU"""
+        count = ctypes.c_uint(0)
+        since = ctypes.c_ulonglong(self._process_seen[index])
+        ret = self.lib.nvmlDeviceGetProcessUtilization(handle, None, ctypes.byref(count), since)
+        if ret == self.NVML_ERROR_NOT_FOUND or count.value == 0:
+            return {}
+        if ret not in (self.NVML_SUCCESS, self.NVML_ERROR_INSUFFICIENT_SIZE):
+            raise NvmlError(f"nvmlDeviceGetProcessUtilization failed with code {ret}")
+        samples = (_NvmlProcessUtilization * count.value)()
+        self._call('nvmlDeviceGetProcessUtilization', handle, samples, ctypes.byref(count), since)
+
+        utilization: Dict[int, int] = {}
+        for sample in samples[:count.value]:
+            utilization[sample.pid] = max(utilization.get(sample.pid, 0), sample.sm)
+            self._process_seen[index] = max(self._process_seen[index], sample.timestamp)
+        return utilization
+
+    def energy(self) -> List[Optional[int]]:
+        """Energy counter of every GPU in millijoules since driver load (None where unsupported, pre-Volta)"""
+        readings = []
+        for handle in self.handles:
+            value = ctypes.c_ulonglong()
+            try:
+                self._call('nvmlDeviceGetTotalEnergyConsumption', handle, ctypes.byref(value))
+                readings.append(value.value)
+            except NvmlError:
+                readings.append(None)
+        return readings
+
+    def processes(self) -> List[Dict[str, Any]]:
+        """Per-process GPU memory (MiB) and SM utilization for every GPU"""
+        processes = []
+        for index, handle in enumerate(self.handles):
+            infos = self._compute_processes(handle)
+            try:
+                utilization = self._process_utilization(index, handle)
+            except NvmlError:
+                # Not supported on every board; memory attribution still works
+                utilization = {}
+            for info in infos:
+                memory = info.used_gpu_memory
+                processes.append({
+                    'gpu': index,
+                    'pid': info.pid,
+                    'memory_used': 0.0 if memory == self.NVML_VALUE_NOT_AVAILABLE else memory / (1024 ** 2),
+                    'sm': float(utilization.get(info.pid, 0)),
+                })
+        return processes
+
+    def close(self):
+        """Shut down the NVML session"""
+        try:
+            self._call('nvmlShutdown')
+        except NvmlError:
+            pass
+
+
+class SmiStreamBackend:
+    """Keep one `nvidia-smi --loop-ms` process running and parse its CSV stream"""
+
+    def __init__(self, interval_ms: int = 1000):
+        self._latest: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.process = subprocess.Popen(
+            ['nvidia-smi', f'--query-gpu={SMI_QUERY}', '--format=csv,noheader,nounits',
+             f'--loop-ms={interval_ms}'],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        self._reader = threading.Thread(target=self._read_stream, daemon=True)
+        self._reader.start()
+
+    @staticmethod
+    def _number(value: str) -> float:
+        """Parse a CSV field, treating '[N/A]' and friends as zero"""
+        try:
+            return float(value)
+        except ValueError:
+            return 0.0
+
+    @classmethod
+    def parse_line(cls, line: str) -> Optional[Dict[str, Any]]:
+        """Parse one CSV line of the query output"""
+        values = [v.strip() for v in line.split(',')]
+        if len(values) != 9:
+            return None
+        try:
+            index = int(values[0])
+        except ValueError:
+            return None
+        return {
+            'index': index,
+            'name': values[1],
+            'utilization': cls._number(values[2]),
+            'memory_utilization': cls._number(values[3]),
+            'power': cls._number(values[4]),
+            'power_limit': cls._number(values[5]),
+            'temperature': int(cls._number(values[6])),
+            'memory_used': cls._number(values[7]),
+            'memory_total': cls._number(values[8]),
+        }
+
+    def _read_stream(self):
+        """Reader thread: keep the latest line for each GPU index"""
+        for line in self.process.stdout:
+            sample = self.parse_line(line)
+            if sample is not None:
+                with self._lock:
+                    self._latest[sample['index']] = sample
+
+    def read(self) -> List[Dict[str, Any]]:
+        """Return the most recent streamed sample for every GPU"""
+        with self._lock:
+            return [dict(self._latest[i]) for i in sorted(self._latest)]
+
+    def close(self):
+        """Stop the streaming nvidia-smi process"""
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class ReplayBackend:
+    """Replay recorded samples (JSON lines, one list of per-GPU dicts per line) in a loop"""
+
+    def __init__(self, samples: List[List[Dict[str, Any]]]):
+        if not samples:
+            raise ValueError("Replay backend needs at least one sample")
+        self.samples = samples
+        self.position = 0
+
+    @classmethod
+    def from_file(cls, path: str) -> 'ReplayBackend':
+        """Load recorded samples from a JSON lines file"""
+        samples = []
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    samples.append(json.loads(line))
+        return cls(samples)
+
+    def read(self) -> List[Dict[str, Any]]:
+        """Return the next recorded sample"""
+        recorded = self.samples[self.position]
+        self.position = (self.position + 1) % len(self.samples)
+        samples = []
+        for index, gpu in enumerate(recorded):
+            sample = empty_sample(index)
+            sample.update(gpu)
+            samples.append(sample)
+        return samples
+
+    def close(self):
+        """Nothing to release"""
+
+
+class NullBackend:
+    """Backend for hosts without an NVIDIA GPU"""
+
+    def read(self) -> List[Dict[str, Any]]:
+        return []
+
+    def close(self):
+        """Nothing to release"""
+
+
+def create_backend(kind: Optional[str] = None):
+    """Create a telemetry backend (auto, nvml, smi, replay or none)"""
+    kind = (kind or os.getenv('GPU_TELEMETRY_BACKEND', 'auto')).lower()
+
+    if kind == 'replay':
+        return ReplayBackend.from_file(os.environ['GPU_TELEMETRY_REPLAY'])
+    if kind == 'none':
+        return NullBackend()
+
+    if kind in ('auto', 'nvml'):
+        try:
+            return NvmlBackend()
+        except (OSError, AttributeError, NvmlError) as e:
+            if kind == 'nvml':
+                raise
+            logger.debug(f"NVML unavailable, falling back to nvidia-smi: {e}")
+
+    if kind in ('auto', 'smi') and shutil.which('nvidia-smi'):
+        return SmiStreamBackend()
+
+    return NullBackend()
+
+
+class GpuTelemetry:
+    """Sample every GPU through one long-lived backend and keep a ring buffer of samples"""
+
+    def __init__(self, backend=None, history: int = 300):
+        self.backend = backend if backend is not None else create_backend()
+        self.history: deque = deque(maxlen=history)
+
+    @property
+    def has_gpu(self) -> bool:
+        """Whether a real or replayed GPU backend is active"""
+        return not isinstance(self.backend, NullBackend)
+
+    def sample(self) -> List[Dict[str, Any]]:
+        """Take a sample from the backend and append it to the ring buffer"""
+        try:
+            gpus = self.backend.read()
+        except Exception as e:
+            logger.error(f"Error reading GPU telemetry: {e}")
+            gpus = []
+        self.history.append((time.time(), gpus))
+        return gpus
+
+    def latest(self) -> Tuple[float, List[Dict[str, Any]]]:
+        """Return the most recent (timestamp, samples) pair without touching the GPU"""
+        if not self.history:
+            return 0.0, []
+        return self.history[-1]
+
+    def energy(self) -> Optional[List[Optional[int]]]:
+        """Per-GPU energy counters in millijoules, or None if the backend has none"""
+        if not hasattr(self.backend, 'energy'):
+            return None
+        try:
+            return self.backend.energy()
+        except Exception as e:
+            logger.error(f"Error reading GPU energy: {e}")
+            return None
+
+    def processes(self) -> Optional[List[Dict[str, Any]]]:
+        """Per-process GPU usage, or None if the backend cannot attribute usage to processes"""
+        if not hasattr(self.backend, 'processes'):
+            return None
+        try:
+            return self.backend.processes()
+        except Exception as e:
+            logger.error(f"Error reading GPU processes: {e}")
+            return None
+
+    def max_utilization(self, gpus: Optional[List[Dict[str, Any]]] = None) -> float:
+        """Highest utilization across all GPUs"""
+        if gpus is None:
+            gpus = self.latest()[1]
+        return max((gpu['utilization'] for gpu in gpus), default=0.0)
+
+    def close(self):
+        """Release the backend handle"""
+        self.backend.close()
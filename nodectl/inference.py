@@ -0,0 +1,170 @@
+"""
+Inference Activity Module
+Detects model serving activity from the Ollama and LocalAI APIs over keep-alive HTTP connections
+"""
+
+import http.client
+import json
+import logging
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_URL = 'http://127.0.0.1:11434'
+LOCALAI_URL = 'http://127.0.0.1:8080'
+
+# LocalAI exports an "api_call" histogram; its _count series grow by one per API request
+REQUEST_COUNT_PATTERN = re.compile(r'api_call\w*_count$')
+# Gauges of requests currently being served, if the server exports one
+IN_FLIGHT_PATTERN = re.compile(r'in_?flight')
+
+_SAMPLE_LINE = re.compile(r'^([A-Za-z_:][A-Za-z0-9_:]*)(\{[^}]*\})?\s+(\S+)')
+
+
+def parse_prometheus(text: str) -> List[Tuple[str, float]]:
+    """(metric name, value) for every sample line of a Prometheus text exposition"""
+    samples = []
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = _SAMPLE_LINE.match(line)
+        if match:
+            try:
+                samples.append((match.group(1), float(match.group(3))))
+            except ValueError:
+                continue
+    return samples
+
+
+class KeepAliveClient:
+    """One persistent HTTP/1.1 connection to a local API, reopened when the server drops it"""
+
+    def __init__(self, url: str, timeout: float = 2.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def get(self, path: str) -> Tuple[int, bytes]:
+        """GET path; raises OSError/HTTPException if the server is unreachable"""
+        return self.request('GET', path)
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None) -> Tuple[int, bytes]:
+        """Send one request and read the whole response"""
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        for attempt in range(2):
+            reused = self._conn is not None
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self._conn.request(method, path, body=body, headers=headers)
+                response = self._conn.getresponse()
+                data = response.read()
+            except (http.client.HTTPException, OSError):
+                self.close()
+                # The server may have closed an idle keep-alive connection; retry once on a fresh one
+                if reused and attempt == 0:
+                    continue
+                raise
+            if response.will_close:
+                self.close()
+            return response.status, data
+        raise OSError(f"{method} {path}: connection failed")
+
+    def close(self):
+        """Close the connection"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class InferenceActivity:
+    """Track resident models, requests in flight and the last request time of the local model servers"""
+
+    def __init__(self, ollama_url: str = OLLAMA_URL, localai_url: str = LOCALAI_URL, timeout: float = 2.0):
+        self.ollama = KeepAliveClient(ollama_url, timeout) if ollama_url else None
+        self.localai = KeepAliveClient(localai_url, timeout) if localai_url else None
+        self.last_request: Optional[float] = None
+        # Models seen serving a request in the latest sample
+        self.requested_models: List[str] = []
+        # Previous observations used to spot new requests between samples
+        self._expires: Dict[str, str] = {}
+        self._ollama_seen = False
+        self._request_count: Optional[float] = None
+
+    def _sample_ollama(self, now: float, exclude: Iterable[str] = ()) -> Tuple[bool, List[Dict[str, Any]]]:
+        """Loaded Ollama models; a model's expiry moving forward means it served a request (unless excluded)"""
+        try:
+            status, body = self.ollama.get('/api/ps')
+            if status != 200:
+                return False, []
+            models = json.loads(body).get('models', [])
+        except (OSError, http.client.HTTPException, ValueError):
+            self._expires = {}
+            self._ollama_seen = False
+            return False, []
+
+        expires = {model.get('name', ''): model.get('expires_at', '') for model in models}
+        for name, expires_at in expires.items():
+            previous = self._expires.get(name)
+            # Loading a model or refreshing its expiry both mean a request reached it
+            if expires_at != previous and (previous is not None or self._ollama_seen) and name not in exclude:
+                self.last_request = now
+                self.requested_models.append(name)
+        self._expires = expires
+        self._ollama_seen = True
+        return True, models
+
+    def _sample_localai(self, now: float) -> Tuple[bool, int]:
+        """LocalAI request counter and in-flight gauge from its Prometheus endpoint"""
+        try:
+            status, body = self.localai.get('/metrics')
+            if status != 200:
+                return False, 0
+            samples = parse_prometheus(body.decode(errors='replace'))
+        except (OSError, http.client.HTTPException):
+            self._request_count = None
+            return False, 0
+
+        count = sum(value for name, value in samples if REQUEST_COUNT_PATTERN.search(name))
+        if self._request_count is not None and count > self._request_count:
+            self.last_request = now
+        self._request_count = count
+        in_flight = int(sum(value for name, value in samples if IN_FLIGHT_PATTERN.search(name)))
+        return True, in_flight
+
+    def sample(self, now: Optional[float] = None, exclude: Iterable[str] = ()) -> Dict[str, Any]:
+        """Query both servers once; loads of excluded models (our own warm-up) are not requests"""
+        now = time.time() if now is None else now
+        self.requested_models = []
+        ollama_up, models = self._sample_ollama(now, frozenset(exclude)) if self.ollama else (False, [])
+        localai_up, in_flight = self._sample_localai(now) if self.localai else (False, 0)
+
+        return {
+            'ollama_up': ollama_up,
+            'localai_up': localai_up,
+            'models_resident': [model.get('name', '') for model in models],
+            'model_sizes': {model.get('name', ''): model.get('size_vram') or model.get('size', 0) for model in models},
+            'vram_resident': sum(model.get('size_vram', 0) for model in models),
+            'requested_models': list(self.requested_models),
+            'requests_in_flight': in_flight,
+            'last_request': self.last_request,
+        }
+
+    def is_active(self, activity: Dict[str, Any], grace_seconds: float, now: Optional[float] = None) -> bool:
+        """Whether a request is in flight or one was served within the grace period"""
+        now = time.time() if now is None else now
+        if activity['requests_in_flight'] > 0:
+            return True
+        last_request = activity['last_request']
+        return last_request is not None and now - last_request < grace_seconds
+
+    def close(self):
+        """Close the API connections"""
+        for client in (self.ollama, self.localai):
+            if client:
+                client.close()
@@ -0,0 +1,173 @@
+"""
+Hot-Path Instrumentation Module
+Timing spans with cumulative p50/p95/max histograms, per-span fork counts and on-demand cProfile for the check cycle
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+TIMINGS_FILE = '/run/ai-nodectl/monitor-timings.json'
+PROFILE_FILE = '/run/ai-nodectl/monitor.prof'
+
+# Audit events that start a child process (subprocess's own posix_spawn path is already counted as Popen)
+FORK_EVENTS = frozenset(('subprocess.Popen', 'os.fork', 'os.forkpty', 'os.system'))
+
+# Bucket i counts durations below 2**i microseconds (the last one is open-ended, about 2^31 us = 36 minutes)
+BUCKETS = 32
+
+
+class Histogram:
+    """Cumulative log2-bucketed durations; percentiles are bucket upper bounds, max and total are exact"""
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        """Record one duration"""
+        micros = int(seconds * 1e6)
+        self.buckets[min(BUCKETS - 1, micros.bit_length())] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, pct: float) -> float:
+        """Upper bound (seconds) of the bucket holding the pct-th percentile, capped at the observed max"""
+        if not self.count:
+            return 0.0
+        rank = max(1, int(round(pct / 100.0 * self.count)))
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(self.max, (1 << index) / 1e6)
+        return self.max
+
+
+class Instrumentation:
+    """Named timing spans for one process; spans may nest and fork counts go to the innermost one"""
+
+    def __init__(self):
+        self.spans: Dict[str, Histogram] = {}
+        self.forks: Dict[str, int] = {}
+        self.started = time.time()
+        # Reentrant: the SIGUSR1 handler reads a snapshot on the main thread, possibly while span() holds the lock
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._profiler: Optional[cProfile.Profile] = None
+        self._profile_request: Optional[Tuple[int, str]] = None
+        self._profile_cycles = 0
+        self._profile_path = PROFILE_FILE
+        self._counting_forks = False
+
+    def _stack(self) -> List[str]:
+        """Open spans of the calling thread"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the enclosed block under name"""
+        stack = self._stack()
+        stack.append(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            stack.pop()
+            with self._lock:
+                histogram = self.spans.get(name)
+                if histogram is None:
+                    histogram = self.spans[name] = Histogram()
+                histogram.add(elapsed)
+
+    def count_forks(self):
+        """Attribute every child process started from now on to the span that started it (audit hook, irreversible)"""
+        if self._counting_forks:
+            return
+        self._counting_forks = True
+
+        def hook(event: str, args: tuple):
+            if event in FORK_EVENTS:
+                stack = self._stack()
+                name = stack[-1] if stack else '(outside spans)'
+                with self._lock:
+                    self.forks[name] = self.forks.get(name, 0) + 1
+
+        sys.addaudithook(hook)
+
+    def profile(self, cycles: int, path: str = PROFILE_FILE):
+        """Run cProfile over the next `cycles` check cycles, then write pstats to path (safe from a signal handler)"""
+        self._profile_request = (cycles, path)
+
+    def cycle_started(self):
+        """Start a requested profile at a cycle boundary, once any running one has been written"""
+        if self._profile_request is not None and self._profiler is None:
+            self._profile_cycles, self._profile_path = self._profile_request
+            self._profile_request = None
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def cycle_finished(self) -> Optional[str]:
+        """Count down a running profile; returns the pstats path when one was just written"""
+        if self._profiler is None:
+            return None
+        self._profile_cycles -= 1
+        if self._profile_cycles > 0:
+            return None
+        self._profiler.disable()
+        os.makedirs(os.path.dirname(self._profile_path), exist_ok=True)
+        self._profiler.dump_stats(self._profile_path)
+        self._profiler = None
+        return self._profile_path
+
+    @property
+    def profiling(self) -> bool:
+        """Whether a profile is pending or running"""
+        return self._profile_request is not None or self._profiler is not None
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-span count, p50/p95/max/total (milliseconds) and child processes started"""
+        with self._lock:
+            names = set(self.spans) | set(self.forks)
+            return {
+                name: {
+                    'count': self.spans[name].count if name in self.spans else 0,
+                    'p50_ms': self.spans[name].percentile(50) * 1000 if name in self.spans else 0.0,
+                    'p95_ms': self.spans[name].percentile(95) * 1000 if name in self.spans else 0.0,
+                    'max_ms': self.spans[name].max * 1000 if name in self.spans else 0.0,
+                    'total_ms': self.spans[name].total * 1000 if name in self.spans else 0.0,
+                    'forks': self.forks.get(name, 0),
+                }
+                for name in sorted(names)
+            }
+
+    def report(self) -> str:
+        """Human-readable table of the snapshot"""
+        lines = [f"Timings since {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started))}:"]
+        lines.append(f"  {'span':24} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'forks':>6}")
+        for name, stats in self.snapshot().items():
+            lines.append(
+                f"  {name:24} {stats['count']:7} {stats['p50_ms']:9.2f} {stats['p95_ms']:9.2f} "
+                f"{stats['max_ms']:9.2f} {stats['forks']:6}"
+            )
+        return "\n".join(lines)
+
+    def dump(self, path: str = TIMINGS_FILE):
+        """Write the snapshot as JSON (atomically)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'since': self.started, 'spans': self.snapshot()}, f, indent=2)
+        os.replace(tmp_path, path)
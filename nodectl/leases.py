@@ -0,0 +1,126 @@
+"""
+Stay-Awake Lease Module
+Named stay-awake leases; the effective deadline is the latest active lease
+
+Store format (one small file, replaced atomically):
+    <effective deadline>
+    <deadline> <lease id>
+    ...
+The first line alone is the legacy single-deadline format.
+"""
+
+import heapq
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_LEASE = 'default'
+
+# Lease ids end up in a line-based file; keep them to a safe character set
+LEASE_ID_PATTERN = re.compile(r'^[A-Za-z0-9_.:@-]{1,64}$')
+
+
+def parse_store(text: str) -> Tuple[int, Dict[str, int]]:
+    """Parse store contents into (effective deadline, {lease id: deadline})"""
+    lines = text.strip().splitlines()
+    if not lines:
+        return 0, {}
+
+    deadline = int(lines[0].strip())
+    leases = {}
+    for line in lines[1:]:
+        parts = line.split()
+        if len(parts) == 2:
+            leases[parts[1]] = int(parts[0])
+
+    if not leases and deadline:
+        # Legacy file written by an older server
+        leases[DEFAULT_LEASE] = deadline
+    return deadline, leases
+
+
+def read_store(path: str) -> Tuple[int, Dict[str, int]]:
+    """Read the lease store, returning (0, {}) if it is missing or unreadable"""
+    try:
+        with open(path, 'r') as f:
+            return parse_store(f.read())
+    except (FileNotFoundError, ValueError):
+        return 0, {}
+
+
+def format_store(leases: Dict[str, int]) -> str:
+    """Serialize leases with the effective deadline on the first line"""
+    deadline = max(leases.values(), default=0)
+    lines = [str(deadline)]
+    lines += [f"{until} {lease_id}" for lease_id, until in sorted(leases.items(), key=lambda item: item[1])]
+    return "\n".join(lines) + "\n"
+
+
+class LeaseTable:
+    """Lease table with heap-ordered expiry and effective-deadline lookup
+
+    Both heaps use lazy deletion: an entry is live only while it matches the table.
+    """
+
+    def __init__(self, leases: Optional[Dict[str, int]] = None):
+        self.table: Dict[str, int] = {}
+        self._expiry: List[Tuple[int, str]] = []  # min-heap by deadline
+        self._latest: List[Tuple[int, str]] = []  # max-heap by deadline (negated)
+        for lease_id, until in (leases or {}).items():
+            self._set(lease_id, until)
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def _set(self, lease_id: str, until: int):
+        """Record a lease deadline in the table and both heaps"""
+        self.table[lease_id] = until
+        heapq.heappush(self._expiry, (until, lease_id))
+        heapq.heappush(self._latest, (-until, lease_id))
+        if len(self._expiry) > 4 * len(self.table) + 64:
+            self._compact()
+
+    def _compact(self):
+        """Drop stale heap entries left behind by extensions and releases"""
+        self._expiry = [(until, lease_id) for lease_id, until in self.table.items()]
+        self._latest = [(-until, lease_id) for lease_id, until in self.table.items()]
+        heapq.heapify(self._expiry)
+        heapq.heapify(self._latest)
+
+    def acquire(self, lease_id: str, seconds: int, now: Optional[float] = None) -> int:
+        """Create a lease or extend it to now + seconds (never shortens it); returns its deadline"""
+        now = int(time.time() if now is None else now)
+        until = now + seconds
+        current = self.table.get(lease_id, 0)
+        if until > current:
+            self._set(lease_id, until)
+            return until
+        return current
+
+    def release(self, lease_id: str) -> bool:
+        """Drop a lease; returns False if it did not exist"""
+        return self.table.pop(lease_id, None) is not None
+
+    def expire(self, now: Optional[float] = None) -> List[str]:
+        """Remove leases whose deadline has passed and return their ids"""
+        now = int(time.time() if now is None else now)
+        expired = []
+        while self._expiry and self._expiry[0][0] <= now:
+            until, lease_id = heapq.heappop(self._expiry)
+            if self.table.get(lease_id) == until:
+                del self.table[lease_id]
+                expired.append(lease_id)
+        return expired
+
+    def deadline(self) -> int:
+        """Effective stay-awake deadline: the latest lease deadline (0 if none)"""
+        while self._latest:
+            until, lease_id = self._latest[0]
+            if self.table.get(lease_id) == -until:
+                return -until
+            heapq.heappop(self._latest)
+        return 0
+
+    def leases(self) -> Dict[str, int]:
+        """Copy of the active leases"""
+        return dict(self.table)
@@ -0,0 +1,189 @@
+"""
+Metrics Export Module
+Monitor snapshot file and Prometheus text rendering for the stay-awake server's /metrics
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MONITOR_SNAPSHOT_FILE = os.getenv('MONITOR_SNAPSHOT_FILE', '/run/ai-nodectl/monitor.json')
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+MIB = 1024 * 1024
+
+# (snapshot key, metric name, per-GPU scale, help)
+GPU_METRICS = (
+    ('utilization', 'ai_node_gpu_utilization_percent', 1, 'GPU utilization'),
+    ('power', 'ai_node_gpu_power_watts', 1, 'GPU power draw'),
+    ('power_limit', 'ai_node_gpu_power_limit_watts', 1, 'GPU power limit'),
+    ('temperature', 'ai_node_gpu_temperature_celsius', 1, 'GPU temperature'),
+    ('memory_used', 'ai_node_gpu_memory_used_bytes', MIB, 'GPU memory in use'),
+    ('memory_total', 'ai_node_gpu_memory_total_bytes', MIB, 'GPU memory size'),
+)
+
+
+def write_snapshot(path: str, snapshot: Dict[str, Any]):
+    """Publish a monitor snapshot atomically (temp file + rename)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+def _label(value: Any) -> str:
+    """Escape a label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value: Any) -> str:
+    """Format a sample value"""
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_metrics(snapshot: Optional[Dict[str, Any]], deadline: int, leases: int) -> str:
+    """Prometheus text exposition of a monitor snapshot plus the server's own lease state"""
+    lines: List[str] = []
+
+    def metric(name: str, kind: str, help_text: str, samples: List[Tuple[str, Any]]):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            lines.append(f"{name}{labels} {_number(value)}")
+
+    metric('ai_node_stay_awake_deadline_timestamp_seconds', 'gauge',
+           'Effective stay-awake deadline (0 if no lease is active)', [('', deadline)])
+    metric('ai_node_stay_awake_leases', 'gauge', 'Active stay-awake leases', [('', leases)])
+
+    if snapshot is None:
+        metric('ai_node_monitor_up', 'gauge', 'Whether a monitor snapshot is available', [('', 0)])
+        return "\n".join(lines) + "\n"
+
+    metric('ai_node_monitor_up', 'gauge', 'Whether a monitor snapshot is available', [('', 1)])
+    metric('ai_node_monitor_snapshot_timestamp_seconds', 'gauge',
+           'When the auto-suspend monitor took this snapshot', [('', snapshot.get('timestamp', 0))])
+    metric('ai_node_cpu_idle_percent', 'gauge', 'CPU idle since the previous check',
+           [('', snapshot.get('cpu_idle', 0))])
+    metric('ai_node_cpu_min_core_idle_percent', 'gauge', 'Idle percentage of the busiest core',
+           [('', snapshot.get('cpu_min_core_idle', 0))])
+
+    gpus = snapshot.get('gpus', [])
+    for key, name, scale, help_text in GPU_METRICS:
+        metric(name, 'gauge', help_text, [
+            (f'{{gpu="{_label(gpu.get("index", i))}",name="{_label(gpu.get("name", ""))}"}}',
+             gpu.get(key, 0) * scale)
+            for i, gpu in enumerate(gpus)
+        ])
+
+    connections = snapshot.get('connections', {})
+    metric('ai_node_connections_established', 'gauge', 'Established TCP connections per local port', [
+        (f'{{port="{_label(port)}"}}', count)
+        for port, count in sorted(connections.items(), key=lambda item: int(item[0]))
+    ])
+
+    metric('ai_node_inference_models_resident', 'gauge', 'Models loaded by the local model servers',
+           [('', len(snapshot.get('models_resident', [])))])
+    metric('ai_node_inference_requests_in_flight', 'gauge', 'Inference requests being served',
+           [('', snapshot.get('requests_in_flight', 0))])
+    metric('ai_node_inference_last_request_timestamp_seconds', 'gauge',
+           'Last observed inference request (0 if none seen)', [('', snapshot.get('last_inference_request') or 0)])
+
+    power = snapshot.get('power')
+    if power:
+        metric('ai_node_power_watts', 'gauge', 'Measured power since the previous check (RAPL/NVML energy counters)', [
+            (f'{{source="{source}"}}', power[source])
+            for source in ('cpu', 'gpu', 'total') if power.get(source) is not None
+        ])
+    energy = snapshot.get('energy_today') or {}
+    metric('ai_node_energy_today_watt_hours', 'gauge', 'Energy used today while awake', [('', energy.get('wh', 0))])
+    metric('ai_node_suspended_today_seconds', 'gauge', 'Time spent suspended today',
+           [('', energy.get('suspended_seconds', 0))])
+    if energy.get('saved_wh') is not None:
+        metric('ai_node_energy_saved_today_watt_hours', 'gauge',
+               'Estimated energy saved today by suspending (suspended time x average idle power)',
+               [('', energy['saved_wh'])])
+
+    metric('ai_node_idle_conditions_met', 'gauge', 'Whether every auto-suspend idle condition holds',
+           [('', snapshot.get('all_conditions_met', False))])
+    metric('ai_node_idle_since_timestamp_seconds', 'gauge',
+           'Start of the current idle period (0 while active)', [('', snapshot.get('idle_since') or 0)])
+    metric('ai_node_monitor_checks_total', 'counter', 'Auto-suspend check cycles',
+           [('', snapshot.get('checks_total', 0))])
+    metric('ai_node_suspends_total', 'counter', 'Suspends triggered by the auto-suspend monitor',
+           [('', snapshot.get('suspends_total', 0))])
+
+    timings = snapshot.get('timings') or {}
+    if timings:
+        name = 'ai_node_monitor_span_seconds'
+        lines.append(f"# HELP {name} Duration of each probe and phase of the check cycle (quantile 1 = max)")
+        lines.append(f"# TYPE {name} summary")
+        for span, stats in sorted(timings.items()):
+            label = f'span="{_label(span)}"'
+            for quantile, key in (('0.5', 'p50_ms'), ('0.95', 'p95_ms'), ('1', 'max_ms')):
+                lines.append(f'{name}{{{label},quantile="{quantile}"}} {_number(stats[key] / 1000)}')
+            lines.append(f'{name}_sum{{{label}}} {_number(stats["total_ms"] / 1000)}')
+            lines.append(f'{name}_count{{{label}}} {_number(stats["count"])}')
+        metric('ai_node_monitor_span_forks_total', 'counter', 'Child processes started inside each span', [
+            (f'{{span="{_label(span)}"}}', stats['forks']) for span, stats in sorted(timings.items())
+        ])
+    return "\n".join(lines) + "\n"
+
+
+def read_snapshot(path: str = MONITOR_SNAPSHOT_FILE) -> Optional[Dict[str, Any]]:
+    """The latest monitor snapshot, or None if there is none"""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class MetricsCache:
+    """Render /metrics only when the monitor snapshot or the lease state has changed"""
+
+    def __init__(self, snapshot_path: str = MONITOR_SNAPSHOT_FILE):
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple[Tuple[int, int], int, int]] = None
+        self._text = ''
+        self._snapshot_version = (-1, -1)
+        self._snapshot: Optional[Dict[str, Any]] = None
+
+    def _load_snapshot(self) -> Tuple[int, int]:
+        """Re-read the snapshot file if it changed; returns its (inode, mtime), zeros if missing"""
+        try:
+            st = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            self._snapshot = None
+            self._snapshot_version = (0, 0)
+            return self._snapshot_version
+        # Every write replaces the file, so a new inode or mtime means new contents
+        version = (st.st_ino, st.st_mtime_ns)
+        if version != self._snapshot_version:
+            try:
+                with open(self.snapshot_path, 'r') as f:
+                    self._snapshot = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Error reading monitor snapshot: {e}")
+                self._snapshot = None
+            self._snapshot_version = version
+        return version
+
+    def render(self, deadline: int, leases: int) -> str:
+        """Current exposition text (one stat() per scrape while nothing changes)"""
+        with self._lock:
+            key = (self._load_snapshot(), deadline, leases)
+            if key != self._key:
+                self._text = render_metrics(self._snapshot, deadline, leases)
+                self._key = key
+            return self._text
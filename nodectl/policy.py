@@ -0,0 +1,235 @@
+"""
+Suspend Policy Module
+Pure auto-suspend decision from probe readings and a clock, plus an offline simulator that replays traces through it
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from nodectl.scheduler import CheckScheduler
+
+SSH_PORT = 22
+API_PORTS = (8080, 11434, 3000)
+
+# Readings when a probe is disabled or unavailable
+IDLE_INFERENCE = {'models_resident': [], 'requests_in_flight': 0, 'last_request': None, 'active': False}
+NO_CGROUPS = {'valid': False, 'cpu_percent': 0.0, 'stall': 0.0}
+
+
+def read_probes(probes: Dict[str, Callable[[], Any]], instrument=None) -> Dict[str, Any]:
+    """Call every probe once and collect the readings by name (each timed as probe.<name> if instrumented)"""
+    if instrument is None:
+        return {name: probe() for name, probe in probes.items()}
+    readings = {}
+    for name, probe in probes.items():
+        with instrument.span(f'probe.{name}'):
+            readings[name] = probe()
+    return readings
+
+
+class SuspendPolicy:
+    """Idle conditions and idle-timer transitions; no I/O, no clock of its own"""
+
+    def __init__(self, cpu_idle_threshold: float = 90, cpu_core_idle_min: float = 10, gpu_usage_max: float = 10,
+                 check_ssh: bool = False, cgroup_cpu_max: float = 10, cgroup_pressure_max: float = 5,
+                 cpu_count: int = 1, ssh_port: int = SSH_PORT, api_ports: Iterable[int] = API_PORTS):
+        self.cpu_idle_threshold = cpu_idle_threshold
+        self.cpu_core_idle_min = cpu_core_idle_min
+        self.gpu_usage_max = gpu_usage_max
+        self.check_ssh = check_ssh
+        self.cgroup_cpu_max = cgroup_cpu_max
+        self.cgroup_pressure_max = cgroup_pressure_max
+        self.cpu_count = cpu_count
+        self.ssh_port = ssh_port
+        self.api_ports = tuple(api_ports)
+
+    def evaluate(self, readings: Dict[str, Any]) -> Dict[str, Any]:
+        """Evaluate every suspend condition from one set of probe readings"""
+        cpu = readings['cpu']
+        cpu_idle = cpu['idle']
+        min_core_idle = cpu['min_core_idle']
+        gpu_usage = readings['gpu']
+        useful = readings.get('useful')
+        if useful is not None:
+            # Only load from the designated services counts; a backup or desktop session does not keep us awake
+            cpu_idle = max(0.0, 100.0 - useful['cpu_percent'] / self.cpu_count)
+            min_core_idle = max(0.0, 100.0 - useful['max_process_cpu'])
+            if useful['gpu_attributed']:
+                gpu_usage = min(100.0, useful['gpu_sm'])
+        connections = readings.get('connections', {})
+        ssh_active = connections.get(self.ssh_port, 0) > 0 if self.check_ssh else False
+        api_active = any(connections.get(port, 0) > 0 for port in self.api_ports)  # Reported, not a condition
+        stay_awake = readings.get('stay_awake', False)
+        inference = readings.get('inference') or IDLE_INFERENCE
+        cgroups = readings.get('cgroups') or NO_CGROUPS
+
+        # A single saturated core (e.g. one inference thread) counts as activity
+        cpu_idle_ok = cpu_idle >= self.cpu_idle_threshold and min_core_idle >= self.cpu_core_idle_min
+        gpu_idle_ok = gpu_usage <= self.gpu_usage_max
+        no_ssh = not ssh_active
+        no_api = not api_active
+        no_stay_awake = not stay_awake
+        # A model server that is serving (or just served) requests counts as activity even at low GPU load
+        no_inference = not inference['active']
+        # Busy time over the whole window, so bursts between checks count; no matching cgroups means no opinion
+        cgroup_idle_ok = not cgroups['valid'] or (
+            cgroups['cpu_percent'] <= self.cgroup_cpu_max and cgroups['stall'] <= self.cgroup_pressure_max
+        )
+
+        # API connections are ignored - they don't prevent suspend
+        # SSH only counts if check_ssh is set (no_ssh is always true otherwise)
+        all_conditions_met = (
+            cpu_idle_ok and
+            gpu_idle_ok and
+            no_ssh and
+            no_inference and
+            cgroup_idle_ok and
+            no_stay_awake
+        )
+
+        return {
+            'cpu_idle': cpu_idle,
+            'cpu_min_core_idle': min_core_idle,
+            'cpu_idle_ok': cpu_idle_ok,
+            'gpu_usage': gpu_usage,
+            'gpu_idle_ok': gpu_idle_ok,
+            'ssh_active': ssh_active,
+            'no_ssh': no_ssh,
+            'api_active': api_active,
+            'no_api': no_api,
+            'connections': connections,
+            'stay_awake': stay_awake,
+            'no_stay_awake': no_stay_awake,
+            'inference_active': inference['active'],
+            'no_inference': no_inference,
+            'models_resident': inference['models_resident'],
+            'requests_in_flight': inference['requests_in_flight'],
+            'last_inference_request': inference['last_request'],
+            'cgroup_cpu_percent': cgroups['cpu_percent'],
+            'cgroup_stall': cgroups['stall'],
+            'cgroup_idle_ok': cgroup_idle_ok,
+            'activity_groups': useful['top_groups'] if useful is not None else [],
+            'all_conditions_met': all_conditions_met,
+        }
+
+    @staticmethod
+    def decide(conditions: Dict[str, Any], idle_since: Optional[float], now: float,
+               wait_seconds: float) -> Dict[str, Any]:
+        """Next idle-timer state: action is idle_start, idle, suspend, active (idle ended) or busy"""
+        if conditions['all_conditions_met']:
+            if idle_since is None:
+                return {'action': 'idle_start', 'idle_since': now, 'idle_seconds': 0.0}
+            idle_seconds = now - idle_since
+            if idle_seconds >= wait_seconds:
+                # The timer restarts after the suspend (or its cancellation)
+                return {'action': 'suspend', 'idle_since': None, 'idle_seconds': idle_seconds}
+            return {'action': 'idle', 'idle_since': idle_since, 'idle_seconds': idle_seconds}
+        if idle_since is not None:
+            return {'action': 'active', 'idle_since': None, 'idle_seconds': now - idle_since}
+        return {'action': 'busy', 'idle_since': None, 'idle_seconds': 0.0}
+
+
+def trace_readings(sample: Dict[str, Any], ssh_port: int = SSH_PORT) -> Dict[str, Any]:
+    """Probe readings from one trace sample (cpu_idle, gpu_usage, connections/ssh, stay_awake, inference_active)"""
+    cpu_idle = float(sample.get('cpu_idle', 100.0))
+    connections = {int(port): count for port, count in sample.get('connections', {}).items()}
+    if sample.get('ssh'):
+        connections[ssh_port] = max(1, connections.get(ssh_port, 0))
+    return {
+        'cpu': {'idle': cpu_idle, 'per_core': [], 'min_core_idle': float(sample.get('cpu_min_core_idle', cpu_idle)),
+                'valid': True},
+        'gpu': float(sample.get('gpu_usage', 0.0)),
+        'connections': connections,
+        'stay_awake': bool(sample.get('stay_awake', False)),
+        'inference': dict(IDLE_INFERENCE, active=bool(sample.get('inference_active', False))),
+        'cgroups': NO_CGROUPS,
+    }
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))]
+
+
+def simulate(trace: List[Dict[str, Any]], policy: SuspendPolicy, wait_seconds: float,
+             scheduler: Optional[CheckScheduler] = None, idle_watts: float = 80.0, busy_watts: float = 250.0,
+             suspend_watts: float = 3.0, resume_seconds: float = 90.0) -> Dict[str, Any]:
+    """Replay a time-ordered trace through the policy at simulated time
+
+    Each sample holds the probe state from its 'ts' until the next sample, plus the number of
+    client 'requests' arriving in that span. Checks run when the scheduler says (every sample
+    without one). Requests arriving while suspended wake the host after resume_seconds.
+    """
+    result: Dict[str, Any] = {
+        'checks': 0, 'suspends': 0, 'requests': 0, 'requests_while_suspended': 0,
+        'suspended_seconds': 0.0, 'energy_wh': 0.0, 'baseline_wh': 0.0,
+    }
+    if not trace:
+        result.update(saved_wh=0.0, decision_us={'p50': 0.0, 'p95': 0.0, 'max': 0.0}, speedup=0.0)
+        return result
+
+    latencies: List[float] = []
+    idle_since: Optional[float] = None
+    asleep = False
+    next_check = trace[0]['ts']
+    started = time.perf_counter()
+
+    for index, sample in enumerate(trace):
+        start = sample['ts']
+        if index + 1 < len(trace):
+            end = trace[index + 1]['ts']
+        else:
+            # The last sample lasts as long as the one before it
+            end = start + (start - trace[index - 1]['ts'] if index else 1.0)
+        span = end - start
+        requests = int(sample.get('requests', 0))
+        result['requests'] += requests
+        busy = not (float(sample.get('cpu_idle', 100.0)) >= policy.cpu_idle_threshold and
+                    float(sample.get('gpu_usage', 0.0)) <= policy.gpu_usage_max)
+        awake_watts = busy_watts if busy else idle_watts
+        result['baseline_wh'] += awake_watts * span / 3600
+
+        if asleep:
+            if requests:
+                # Clients hit a suspended host: they wait out the resume
+                result['requests_while_suspended'] += requests
+                asleep = False
+                next_check = start + resume_seconds
+                result['energy_wh'] += awake_watts * span / 3600
+            else:
+                result['suspended_seconds'] += span
+                result['energy_wh'] += suspend_watts * span / 3600
+            continue
+
+        result['energy_wh'] += awake_watts * span / 3600
+        while next_check < end:
+            now = max(next_check, start)
+            t0 = time.perf_counter()
+            conditions = policy.evaluate(trace_readings(sample, policy.ssh_port))
+            decision = policy.decide(conditions, idle_since, now, wait_seconds)
+            latencies.append(time.perf_counter() - t0)
+            result['checks'] += 1
+            idle_since = decision['idle_since']
+            if decision['action'] == 'suspend':
+                result['suspends'] += 1
+                asleep = True
+                # The rest of this span is spent asleep (the sample's requests were already served)
+                result['energy_wh'] -= (awake_watts - suspend_watts) * (end - now) / 3600
+                result['suspended_seconds'] += end - now
+                break
+            delay = scheduler.next_delay(conditions, idle_since, now) if scheduler else span
+            next_check = now + max(delay, 1e-3)
+
+    elapsed = time.perf_counter() - started
+    simulated = trace[-1]['ts'] - trace[0]['ts']
+    result['saved_wh'] = result['baseline_wh'] - result['energy_wh']
+    result['decision_us'] = {
+        'p50': _percentile(latencies, 50) * 1e6,
+        'p95': _percentile(latencies, 95) * 1e6,
+        'max': max(latencies, default=0.0) * 1e6,
+    }
+    result['speedup'] = simulated / elapsed if elapsed > 0 else 0.0
+    return result
@@ -0,0 +1,254 @@
+"""
+Idle Prediction Module
+Learns activity per weekday and time of day, picks the suspend wait window and RTC wake times, replays traces
+"""
+
+import json
+import logging
+import os
+import shutil
+import subprocess
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ACTIVITY_MODEL_FILE = '/var/lib/ai-auto-suspend/activity-model.json'
+RTC_WAKEALARM = '/sys/class/rtc/rtc0/wakealarm'
+
+SLOT_MINUTES = 15
+SLOTS = 7 * 24 * 60 // SLOT_MINUTES
+# A slot needs this much observed (decayed) time before it is trusted, about two weeks of samples
+MIN_OBSERVED_SECONDS = 1800.0
+HALF_LIFE_DAYS = 28.0
+
+
+def slot_of(timestamp: float) -> int:
+    """Index of the 15-minute weekly slot (local time, Monday 00:00 = 0) containing timestamp"""
+    local = time.localtime(timestamp)
+    return ((local.tm_wday * 24 + local.tm_hour) * 60 + local.tm_min) // SLOT_MINUTES
+
+
+def slot_start(timestamp: float) -> float:
+    """Start of the slot containing timestamp"""
+    local = time.localtime(timestamp)
+    return timestamp - (local.tm_min % SLOT_MINUTES) * 60 - local.tm_sec - (timestamp % 1)
+
+
+class ActivityModel:
+    """Exponentially decayed active/observed seconds per weekly slot"""
+
+    def __init__(self, path: Optional[str] = None, half_life_days: float = HALF_LIFE_DAYS):
+        self.path = path
+        self.half_life = half_life_days * 86400
+        self.active = [0.0] * SLOTS
+        self.observed = [0.0] * SLOTS
+        self.decayed_at: Optional[float] = None
+        if path:
+            self._load()
+
+    def _load(self):
+        """Load the model file"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            if len(data.get('observed', [])) == SLOTS:
+                self.active = data['active']
+                self.observed = data['observed']
+                self.decayed_at = data.get('decayed_at')
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        """Write the model file atomically"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'active': self.active, 'observed': self.observed, 'decayed_at': self.decayed_at}, f)
+        os.replace(tmp_path, self.path)
+
+    def _decay(self, now: float):
+        """Age old observations (applied at most once a day)"""
+        if self.decayed_at is None:
+            self.decayed_at = now
+            return
+        elapsed = now - self.decayed_at
+        if elapsed < 86400:
+            return
+        factor = 0.5 ** (elapsed / self.half_life)
+        self.active = [value * factor for value in self.active]
+        self.observed = [value * factor for value in self.observed]
+        self.decayed_at = now
+
+    def observe(self, timestamp: float, active: bool, seconds: float):
+        """Record that the host was (in)active for `seconds` ending at timestamp"""
+        self._decay(timestamp)
+        slot = slot_of(timestamp)
+        self.observed[slot] += seconds
+        if active:
+            self.active[slot] += seconds
+
+    def probability(self, timestamp: float) -> Optional[float]:
+        """Share of observed time the slot was active (None until the slot has enough data)"""
+        slot = slot_of(timestamp)
+        if self.observed[slot] < MIN_OBSERVED_SECONDS:
+            return None
+        return self.active[slot] / self.observed[slot]
+
+    def chance_of_activity(self, start: float, minutes: float) -> Optional[float]:
+        """Highest activity probability of the slots in [start, start + minutes]"""
+        chances = [
+            self.probability(timestamp)
+            for timestamp in _slot_times(start, start + minutes * 60)
+        ]
+        known = [chance for chance in chances if chance is not None]
+        return max(known) if known else None
+
+    def wait_minutes(self, now: float, default: float, minimum: float, maximum: float,
+                     lookahead: float = 60) -> Tuple[float, Optional[float]]:
+        """Idle wait before suspending, scaled by the chance of activity within lookahead minutes
+
+        Returns (minutes, chance); falls back to default while there is no data for the window.
+        """
+        chance = self.chance_of_activity(now, lookahead)
+        if chance is None:
+            return default, None
+        return minimum + (maximum - minimum) * chance, chance
+
+    def next_busy(self, now: float, threshold: float, horizon_hours: float = 24) -> Optional[float]:
+        """Start of the first upcoming slot whose activity probability reaches threshold"""
+        for timestamp in _slot_times(slot_start(now) + SLOT_MINUTES * 60, now + horizon_hours * 3600):
+            chance = self.probability(timestamp)
+            if chance is not None and chance >= threshold:
+                return slot_start(timestamp)
+        return None
+
+
+def _slot_times(start: float, end: float) -> Iterable[float]:
+    """One timestamp in every slot overlapping [start, end]"""
+    timestamp = start
+    while timestamp <= end:
+        yield timestamp
+        timestamp = slot_start(timestamp) + SLOT_MINUTES * 60
+
+
+def schedule_rtc_wake(timestamp: float, wakealarm: str = RTC_WAKEALARM) -> bool:
+    """Program the RTC to wake the host at timestamp (rtcwake if installed, else the sysfs wakealarm)"""
+    if shutil.which('rtcwake'):
+        try:
+            subprocess.run(['rtcwake', '-m', 'no', '-t', str(int(timestamp))],
+                           check=True, capture_output=True, timeout=10)
+            return True
+        except (subprocess.SubprocessError, OSError) as e:
+            logger.error(f"rtcwake failed: {e}")
+            return False
+    try:
+        # An armed alarm must be cleared before it can be set again
+        with open(wakealarm, 'w') as f:
+            f.write('0')
+        with open(wakealarm, 'w') as f:
+            f.write(str(int(timestamp)))
+        return True
+    except OSError as e:
+        logger.error(f"Error setting RTC wake alarm: {e}")
+        return False
+
+
+class FixedWaitPolicy:
+    """The classic policy: one global WAIT_MINUTES"""
+
+    def __init__(self, minutes: float):
+        self.minutes = minutes
+        self.name = f'fixed {minutes:g} min'
+
+    def observe(self, timestamp: float, active: bool, seconds: float):
+        """Fixed policies learn nothing"""
+
+    def wait_minutes(self, timestamp: float) -> float:
+        """Wait window at timestamp"""
+        return self.minutes
+
+    def wake_at(self, timestamp: float) -> Optional[float]:
+        """RTC wake to schedule when suspending at timestamp"""
+        return None
+
+
+class PredictivePolicy:
+    """Wait window and RTC wake from an ActivityModel learned online"""
+
+    def __init__(self, model: ActivityModel, default: float, minimum: float, maximum: float,
+                 rtc_threshold: Optional[float] = None, rtc_lead_minutes: float = 10):
+        self.model = model
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.rtc_threshold = rtc_threshold
+        self.rtc_lead = rtc_lead_minutes * 60
+        self.name = f'predictive {minimum:g}-{maximum:g} min' + (' + RTC' if rtc_threshold is not None else '')
+
+    def observe(self, timestamp: float, active: bool, seconds: float):
+        """Feed one observation to the model"""
+        self.model.observe(timestamp, active, seconds)
+
+    def wait_minutes(self, timestamp: float) -> float:
+        """Wait window at timestamp"""
+        return self.model.wait_minutes(timestamp, self.default, self.minimum, self.maximum)[0]
+
+    def wake_at(self, timestamp: float) -> Optional[float]:
+        """Wake shortly before the next predicted busy slot"""
+        if self.rtc_threshold is None:
+            return None
+        busy = self.model.next_busy(timestamp, self.rtc_threshold)
+        if busy is None or busy - self.rtc_lead <= timestamp:
+            return None
+        return busy - self.rtc_lead
+
+
+def replay(trace: List[Tuple[float, bool]], policy, interval: float, idle_watts: float = 80.0,
+           active_watts: float = 250.0, suspend_watts: float = 3.0, resume_seconds: float = 90.0,
+           resume_joules: float = 20000.0) -> Dict[str, Any]:
+    """Score a policy on a fixed-interval (timestamp, active) trace for energy and wake latency
+
+    The policy only observes samples while the simulated host is awake, like the real monitor.
+    """
+    awake = True
+    idle_since: Optional[float] = None
+    rtc_at: Optional[float] = None
+    joules = 0.0
+    result = {'suspends': 0, 'cold_wakes': 0, 'rtc_wakes': 0, 'wake_latency_seconds': 0.0, 'awake_seconds': 0.0}
+
+    for timestamp, active in trace:
+        if not awake:
+            if rtc_at is not None and timestamp >= rtc_at:
+                # Woken by the RTC ahead of demand: resume cost, but nobody waits
+                awake = True
+                result['rtc_wakes'] += 1
+                joules += resume_joules
+                idle_since = None
+            elif active:
+                # Demand hit a sleeping host: someone waits for the resume
+                awake = True
+                result['cold_wakes'] += 1
+                result['wake_latency_seconds'] += resume_seconds
+                joules += resume_joules
+                idle_since = None
+            else:
+                joules += suspend_watts * interval
+                continue
+
+        joules += (active_watts if active else idle_watts) * interval
+        result['awake_seconds'] += interval
+        policy.observe(timestamp, active, interval)
+        if active:
+            idle_since = None
+            continue
+        if idle_since is None:
+            idle_since = timestamp
+        if timestamp - idle_since >= policy.wait_minutes(timestamp) * 60:
+            awake = False
+            result['suspends'] += 1
+            rtc_at = policy.wake_at(timestamp)
+
+    result['energy_wh'] = joules / 3600
+    result['policy'] = policy.name
+    return result
@@ -0,0 +1,173 @@
+"""
+Process Accounting Module
+Attributes CPU (/proc/<pid>/stat) and GPU (NVML per-process) usage to systemd services and containers
+"""
+
+import fnmatch
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROC_ROOT = '/proc'
+
+# Groups whose load counts as "useful work" by default (LocalAI and Open WebUI run as containers)
+DEFAULT_USEFUL_GROUPS = ('ollama.service', 'localai.service', 'docker:*')
+
+
+def parse_stat(text: str) -> Tuple[int, int]:
+    """(utime + stime, starttime) in clock ticks from /proc/<pid>/stat"""
+    # comm may contain spaces and parentheses; the fields after it start after the last ')'
+    fields = text[text.rindex(')') + 2:].split()
+    # fields[0] is field 3 (state): utime = field 14, stime = field 15, starttime = field 22
+    return int(fields[11]) + int(fields[12]), int(fields[19])
+
+
+def cgroup_group(text: str, container_names: Optional[Dict[str, str]] = None) -> str:
+    """Accounting group of a process from /proc/<pid>/cgroup: its service, container or slice"""
+    path = ''
+    for line in text.splitlines():
+        hierarchy, _, rest = line.partition(':')
+        controllers, _, cgroup_path = rest.partition(':')
+        # cgroup v2 unified line, or the systemd hierarchy on v1 hosts
+        if (hierarchy == '0' and controllers == '') or controllers == 'name=systemd':
+            path = cgroup_path
+            if hierarchy == '0':
+                break
+
+    parts = [part for part in path.split('/') if part]
+    for position in range(len(parts) - 1, -1, -1):
+        part = parts[position]
+        container_id = None
+        if part.startswith('docker-') and part.endswith('.scope'):
+            container_id = part[len('docker-'):-len('.scope')]
+        elif position > 0 and parts[position - 1] == 'docker':
+            # cgroupfs driver: /docker/<id>
+            container_id = part
+        if container_id:
+            name = (container_names or {}).get(container_id)
+            return f'docker:{name or container_id[:12]}'
+        if part.endswith('.service') or part.endswith('.slice'):
+            return part
+    return 'root'
+
+
+def matches(group: str, patterns: Iterable[str]) -> bool:
+    """Whether a group matches any of the (fnmatch) patterns"""
+    return any(fnmatch.fnmatchcase(group, pattern) for pattern in patterns)
+
+
+def empty_group() -> Dict[str, Any]:
+    """Zeroed per-group usage"""
+    return {'cpu_percent': 0.0, 'max_process_cpu': 0.0, 'processes': 0, 'gpu_memory': 0.0, 'gpu_sm': 0.0}
+
+
+class ProcessAccounting:
+    """Sample every process and sum CPU and GPU usage per cgroup-derived group"""
+
+    def __init__(self, proc_root: str = PROC_ROOT, gpu=None,
+                 container_names: Optional[Callable[[], Dict[str, str]]] = None):
+        self.proc_root = proc_root
+        self.gpu = gpu
+        self.container_names = container_names
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        # (pid, starttime) -> CPU ticks and group; starttime tells a reused pid apart
+        self._ticks: Dict[Tuple[int, int], int] = {}
+        self._groups: Dict[Tuple[int, int], str] = {}
+        self._last_sample: Optional[float] = None
+
+    def _read(self, pid: int, name: str) -> str:
+        """Read one /proc/<pid> file"""
+        with open(os.path.join(self.proc_root, str(pid), name), 'r') as f:
+            return f.read()
+
+    def _group(self, key: Tuple[int, int], names: Optional[Dict[str, str]]) -> str:
+        """Group of a process, read once per process lifetime"""
+        group = self._groups.get(key)
+        if group is None:
+            try:
+                group = cgroup_group(self._read(key[0], 'cgroup'), names)
+            except OSError:
+                group = 'root'
+            self._groups[key] = group
+        return group
+
+    def sample(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Usage per group since the previous sample (CPU percent is of one core)"""
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._last_sample if self._last_sample is not None else None
+        self._last_sample = now
+
+        names = None
+        if self.container_names:
+            try:
+                names = self.container_names()
+            except Exception as e:
+                logger.debug(f"Container names unavailable: {e}")
+
+        groups: Dict[str, Dict[str, Any]] = {}
+        ticks: Dict[Tuple[int, int], int] = {}
+        pid_groups: Dict[int, str] = {}
+        for entry in os.listdir(self.proc_root):
+            if not entry.isdigit():
+                continue
+            pid = int(entry)
+            try:
+                cpu_ticks, started = parse_stat(self._read(pid, 'stat'))
+            except (OSError, ValueError, IndexError):
+                # Exited while we were walking /proc
+                continue
+            key = (pid, started)
+            group_name = self._group(key, names)
+            group = groups.setdefault(group_name, empty_group())
+            group['processes'] += 1
+            pid_groups[pid] = group_name
+
+            ticks[key] = cpu_ticks
+            if elapsed and key in self._ticks:
+                percent = 100.0 * (cpu_ticks - self._ticks[key]) / (self.clock_ticks * elapsed)
+                group['cpu_percent'] += percent
+                group['max_process_cpu'] = max(group['max_process_cpu'], percent)
+
+        self._ticks = ticks
+        self._groups = {key: group for key, group in self._groups.items() if key in ticks}
+
+        gpu_processes = self.gpu.processes() if self.gpu is not None else None
+        for process in gpu_processes or []:
+            group = groups.setdefault(pid_groups.get(process['pid'], 'root'), empty_group())
+            group['gpu_memory'] += process['memory_used']
+            group['gpu_sm'] += process['sm']
+
+        return {
+            'valid': bool(elapsed),
+            'gpu_attributed': gpu_processes is not None,
+            'groups': groups,
+        }
+
+    @staticmethod
+    def useful_load(result: Dict[str, Any], patterns: Iterable[str]) -> Dict[str, Any]:
+        """Summed usage of the groups that count as useful work"""
+        patterns = list(patterns)
+        load = empty_group()
+        for name, group in result['groups'].items():
+            if matches(name, patterns):
+                for key in ('cpu_percent', 'processes', 'gpu_memory', 'gpu_sm'):
+                    load[key] += group[key]
+                load['max_process_cpu'] = max(load['max_process_cpu'], group['max_process_cpu'])
+        return load
+
+    @staticmethod
+    def top_groups(result: Dict[str, Any], patterns: Iterable[str], count: int = 8) -> List[Dict[str, Any]]:
+        """Busiest groups (by CPU, then GPU), flagged useful or not"""
+        patterns = list(patterns)
+        ranked = sorted(
+            result['groups'].items(),
+            key=lambda item: (item[1]['cpu_percent'] + item[1]['gpu_sm'], item[1]['gpu_memory']),
+            reverse=True,
+        )
+        return [
+            dict(group, name=name, useful=matches(name, patterns))
+            for name, group in ranked[:count]
+        ]
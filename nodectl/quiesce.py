@@ -0,0 +1,143 @@
+"""
+Suspend Quiesce Module
+Staged pre-suspend pipeline: announce the drain, let in-flight requests finish, flush and sync, then suspend
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from nodectl.inference import InferenceActivity
+
+logger = logging.getLogger(__name__)
+
+DRAIN_FILE = '/run/ai-nodectl/draining'
+
+# A stage returns None to continue or a reason string to abort the suspend
+Stage = Tuple[str, Callable[[], Optional[str]]]
+
+
+def write_drain_flag(path: str, deadline: float):
+    """Announce that a suspend is pending (the file holds the drain deadline)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(str(int(deadline)))
+    os.replace(tmp_path, path)
+
+
+def clear_drain_flag(path: str):
+    """Withdraw the suspend announcement"""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def is_draining(path: str = DRAIN_FILE) -> bool:
+    """Whether a suspend is pending"""
+    return os.path.exists(path)
+
+
+class Drainer:
+    """Wait for in-flight requests to finish; abort as soon as new work shows up"""
+
+    def __init__(self, count_connections: Callable[[], Dict[int, int]],
+                 inference: Optional[InferenceActivity] = None,
+                 stay_awake_active: Callable[[], bool] = lambda: False,
+                 timeout: float = 60.0, poll_interval: float = 1.0,
+                 wakeup: Optional[threading.Event] = None):
+        self.count_connections = count_connections
+        self.inference = inference
+        self.stay_awake_active = stay_awake_active
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        # Set by the stay-awake watcher so a new lease interrupts the wait immediately
+        self.wakeup = wakeup or threading.Event()
+
+    def _in_flight(self, last_request: Optional[float]) -> Tuple[int, Optional[str]]:
+        """Requests being served, or an abort reason if a new request arrived"""
+        if self.inference is None:
+            return 0, None
+        activity = self.inference.sample()
+        if activity['requested_models']:
+            return 0, f"new request for {', '.join(activity['requested_models'])}"
+        if activity['last_request'] != last_request:
+            return 0, "new inference request"
+        return activity['requests_in_flight'], None
+
+    def _count_clients(self) -> Dict[int, int]:
+        """Established connections on the drain ports, without our own keep-alive connections to the model servers"""
+        if self.inference is not None:
+            # Closed before counting (and reopened by the next sample), so they never count as clients
+            self.inference.close()
+        return self.count_connections()
+
+    def drain(self) -> Optional[str]:
+        """Block until drained or timed out (returns None), or return why the suspend must be aborted"""
+        deadline = time.monotonic() + self.timeout
+        previous = self._count_clients()
+        last_request = self.inference.last_request if self.inference else None
+
+        while True:
+            if self.stay_awake_active():
+                return "stay-awake lease"
+
+            in_flight, reason = self._in_flight(last_request)
+            if reason:
+                return reason
+
+            counts = self._count_clients()
+            for port, count in counts.items():
+                # Closing connections is the point of draining; a rising count means a new client
+                if count > previous.get(port, 0):
+                    return f"new connection on port {port}"
+            previous = counts
+
+            open_connections = sum(counts.values())
+            if in_flight == 0 and open_connections == 0:
+                return None
+            if time.monotonic() >= deadline:
+                logger.warning(
+                    f"Drain timed out after {self.timeout:.0f}s "
+                    f"({in_flight} requests in flight, {open_connections} connections open) - suspending anyway"
+                )
+                return None
+
+            self.wakeup.wait(min(self.poll_interval, max(0.0, deadline - time.monotonic())))
+            self.wakeup.clear()
+
+
+class SuspendPipeline:
+    """Run named stages in order, timing each, stopping at the first that aborts"""
+
+    def __init__(self, stages: List[Stage], cleanup: Optional[Callable[[], None]] = None):
+        self.stages = stages
+        self.cleanup = cleanup
+
+    def run(self) -> Dict[str, Any]:
+        """Run every stage; returns completion, the aborting stage and reason, and per-stage durations"""
+        result: Dict[str, Any] = {'completed': False, 'aborted_by': None, 'reason': None, 'durations': {}}
+        try:
+            for name, stage in self.stages:
+                started = time.monotonic()
+                try:
+                    reason = stage()
+                except Exception as e:
+                    logger.error(f"Suspend stage {name} failed: {e}")
+                    reason = f"{name} failed: {e}"
+                elapsed = time.monotonic() - started
+                result['durations'][name] = elapsed
+                if reason:
+                    logger.info(f"Suspend stage {name}: aborted after {elapsed:.2f}s ({reason})")
+                    result['aborted_by'] = name
+                    result['reason'] = reason
+                    return result
+                logger.info(f"Suspend stage {name}: {elapsed:.2f}s")
+            result['completed'] = True
+            return result
+        finally:
+            if self.cleanup:
+                self.cleanup()
@@ -0,0 +1,369 @@
+"""
+Wake-on-Request Relay Module
+TCP proxy for a node's API ports: wakes it on the first connection, holds clients until /health answers, relays with splice(2)
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from nodectl.fleet import STAY_AWAKE_PORT, http_request
+from nodectl.wol import BROADCAST, WOL_PORT, send_magic_packet
+
+logger = logging.getLogger(__name__)
+
+API_PORTS = (11434, 8080)
+# Bytes moved per splice/recv call
+CHUNK = 65536
+# os.splice needs Python 3.10+ on Linux; plain recv/send otherwise
+HAS_SPLICE = hasattr(os, 'splice')
+
+# Idle upstream connections kept per port while the node is awake
+POOL_SIZE = 2
+# Trust the last good /health this long before re-checking on a new connection
+AWAKE_TTL = 30.0
+CONNECT_TIMEOUT = 3.0
+# Magic packets can be lost; re-send this often while the node is waking
+WOL_RESEND_SECONDS = 10
+WAKE_POLL_SECONDS = 1.0
+
+
+async def _ready(loop: asyncio.AbstractEventLoop, fd: int, writable: bool = False):
+    """Wait until fd is readable (or writable)"""
+    future = loop.create_future()
+
+    def wake():
+        if not future.done():
+            future.set_result(None)
+
+    if writable:
+        loop.add_writer(fd, wake)
+    else:
+        loop.add_reader(fd, wake)
+    try:
+        await future
+    finally:
+        if writable:
+            loop.remove_writer(fd)
+        else:
+            loop.remove_reader(fd)
+
+
+async def splice_stream(loop: asyncio.AbstractEventLoop, src: socket.socket, dst: socket.socket) -> int:
+    """Move bytes from src to dst through a kernel pipe until EOF, never copying them into Python"""
+    read_fd, write_fd = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+    flags = os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK
+    total = 0
+    try:
+        while True:
+            try:
+                moved = os.splice(src.fileno(), write_fd, CHUNK, flags=flags)
+            except BlockingIOError:
+                await _ready(loop, src.fileno())
+                continue
+            if moved == 0:
+                return total
+            pending = moved
+            while pending:
+                try:
+                    pending -= os.splice(read_fd, dst.fileno(), pending, flags=flags)
+                except BlockingIOError:
+                    await _ready(loop, dst.fileno(), writable=True)
+            total += moved
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+async def copy_stream(loop: asyncio.AbstractEventLoop, src: socket.socket, dst: socket.socket) -> int:
+    """Move bytes from src to dst until EOF through user-space buffers"""
+    total = 0
+    while True:
+        data = await loop.sock_recv(src, CHUNK)
+        if not data:
+            return total
+        await loop.sock_sendall(dst, data)
+        total += len(data)
+
+
+async def relay(client: socket.socket, upstream: socket.socket, zero_copy: bool = HAS_SPLICE) -> Tuple[int, int]:
+    """Relay both directions until each side has closed its half; returns (bytes up, bytes down)"""
+    loop = asyncio.get_running_loop()
+    move = splice_stream if zero_copy else copy_stream
+
+    async def one_way(src: socket.socket, dst: socket.socket) -> int:
+        try:
+            return await move(loop, src, dst)
+        except OSError:
+            # A reset on either side ends this direction; the half-close below ends the other
+            return 0
+        finally:
+            try:
+                dst.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+
+    up, down = await asyncio.gather(one_way(client, upstream), one_way(upstream, client))
+    return up, down
+
+
+def _alive(sock: socket.socket) -> bool:
+    """Whether an idle pooled connection is still open (and has nothing unexpected to read)"""
+    try:
+        sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT)
+    except BlockingIOError:
+        return True
+    except OSError:
+        return False
+    # EOF, or bytes the server sent unprompted
+    return False
+
+
+class UpstreamPool:
+    """Idle pre-connected sockets to the node's API ports, so a client never waits for a handshake"""
+
+    def __init__(self, host: str, size: int = POOL_SIZE):
+        self.host = host
+        self.size = size
+        self.idle: Dict[int, List[socket.socket]] = {}
+        self._filling: Set[int] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def take(self, port: int) -> Optional[socket.socket]:
+        """A live idle connection to port, if any"""
+        idle = self.idle.get(port, [])
+        while idle:
+            sock = idle.pop()
+            if _alive(sock):
+                self.hits += 1
+                return sock
+            sock.close()
+        self.misses += 1
+        return None
+
+    async def fill(self, ports: Iterable[int], timeout: float = CONNECT_TIMEOUT):
+        """Top every port up to size idle connections (connection errors leave it short)"""
+        for port in ports:
+            if port in self._filling:
+                continue
+            self._filling.add(port)
+            try:
+                idle = self.idle.setdefault(port, [])
+                for sock in [sock for sock in idle if not _alive(sock)]:
+                    idle.remove(sock)
+                    sock.close()
+                while len(idle) < self.size:
+                    try:
+                        idle.append(await connect(self.host, port, timeout))
+                    except (OSError, asyncio.TimeoutError):
+                        break
+            finally:
+                self._filling.discard(port)
+
+    def clear(self):
+        """Close every idle connection (the node is draining or gone)"""
+        for idle in self.idle.values():
+            for sock in idle:
+                sock.close()
+            idle.clear()
+
+    def __len__(self) -> int:
+        return sum(len(idle) for idle in self.idle.values())
+
+
+async def connect(host: str, port: int, timeout: float = CONNECT_TIMEOUT) -> socket.socket:
+    """Non-blocking TCP connection with Nagle off (raises OSError or asyncio.TimeoutError)"""
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setblocking(False)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    try:
+        await asyncio.wait_for(loop.sock_connect(sock, (host, port)), timeout)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+class WakeProxy:
+    """Always-on front for one node: accepts on its API ports, wakes it when needed and splices clients through
+
+    Pooled connections are dropped as soon as /health reports a drain and only refilled right
+    after a good /health, so they never hold up or cancel the node's suspend.
+    """
+
+    def __init__(self, host: str, mac: str, ports: Iterable[int] = API_PORTS, health_port: int = STAY_AWAKE_PORT,
+                 broadcast: str = BROADCAST, wol_port: int = WOL_PORT, wake_timeout: float = 180.0,
+                 pool_size: int = POOL_SIZE, zero_copy: bool = HAS_SPLICE,
+                 send_wol: Callable[[str, str, int], None] = send_magic_packet,
+                 wake_poll_seconds: float = WAKE_POLL_SECONDS, awake_ttl: float = AWAKE_TTL):
+        self.host = host
+        self.mac = mac
+        self.ports = tuple(ports)
+        self.health_port = health_port
+        self.broadcast = broadcast
+        self.wol_port = wol_port
+        self.wake_timeout = wake_timeout
+        self.zero_copy = zero_copy
+        self.send_wol = send_wol
+        self.wake_poll_seconds = wake_poll_seconds
+        self.awake_ttl = awake_ttl
+        self.pool = UpstreamPool(host, pool_size)
+        self.draining = False
+        self._awake_until = 0.0
+        self._wake_task: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.stats = {'connections': 0, 'held': 0, 'wakes': 0, 'failed': 0, 'bytes_up': 0, 'bytes_down': 0,
+                      'max_hold_seconds': 0.0}
+
+    @property
+    def awake(self) -> bool:
+        """Whether /health answered within the last awake_ttl seconds"""
+        return time.monotonic() < self._awake_until
+
+    async def start(self, bind: str, listen: Optional[Dict[int, int]] = None) -> List[socket.socket]:
+        """Listen on each port (listen port -> node port; the node's own port numbers by default)"""
+        loop = asyncio.get_running_loop()
+        listeners = []
+        for listen_port, port in (listen or {port: port for port in self.ports}).items():
+            listener = socket.create_server((bind, listen_port), backlog=128)
+            listener.setblocking(False)
+            listeners.append(listener)
+            self._spawn(self._accept(loop, listener, port))
+            logger.info(f"Relaying {bind}:{listener.getsockname()[1]} -> {self.host}:{port}")
+        return listeners
+
+    def _spawn(self, coroutine) -> asyncio.Task:
+        """Run a task and keep a reference until it finishes"""
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _accept(self, loop: asyncio.AbstractEventLoop, listener: socket.socket, port: int):
+        while True:
+            try:
+                client, _ = await loop.sock_accept(listener)
+            except OSError as e:
+                # Out of file descriptors and the like: back off instead of spinning
+                logger.warning(f"Accept failed: {e}")
+                await asyncio.sleep(1)
+                continue
+            client.setblocking(False)
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._spawn(self._serve(client, port))
+
+    async def _serve(self, client: socket.socket, port: int):
+        """Hold one client until the node can take it, then relay"""
+        self.stats['connections'] += 1
+        upstream = None
+        try:
+            upstream = await self._upstream(port)
+            if upstream is None:
+                self.stats['failed'] += 1
+                return
+            up, down = await relay(client, upstream, self.zero_copy)
+            self.stats['bytes_up'] += up
+            self.stats['bytes_down'] += down
+        finally:
+            client.close()
+            if upstream is not None:
+                upstream.close()
+
+    async def _upstream(self, port: int) -> Optional[socket.socket]:
+        """Connection to the node's port: pooled, fresh, or after waking it"""
+        if self.awake:
+            # Taken connections are replaced by the next poll, right after a good /health
+            sock = self.pool.take(port)
+            if sock is not None:
+                return sock
+            try:
+                return await connect(self.host, port)
+            except (OSError, asyncio.TimeoutError):
+                # Suspended since the last health check
+                self._asleep()
+
+        held = time.monotonic()
+        self.stats['held'] += 1
+        if not await self.wake():
+            return None
+        # /health can answer before the model server listens again after a resume
+        deadline = held + self.wake_timeout
+        while True:
+            try:
+                sock = await connect(self.host, port)
+                break
+            except ConnectionRefusedError:
+                if time.monotonic() >= deadline:
+                    return None
+                await asyncio.sleep(0.25)
+            except (OSError, asyncio.TimeoutError):
+                return None
+        self.stats['max_hold_seconds'] = max(self.stats['max_hold_seconds'], time.monotonic() - held)
+        return sock
+
+    def _asleep(self):
+        """Forget the node's awake state and its pooled connections"""
+        self._awake_until = 0.0
+        self.pool.clear()
+
+    async def check(self) -> bool:
+        """Refresh the awake state from the node's stay-awake /health (503 while it drains is still awake)"""
+        try:
+            status, _ = await http_request(self.host, self.health_port, 'GET', '/health')
+        except (OSError, asyncio.TimeoutError, ValueError):
+            self._asleep()
+            return False
+        self._awake_until = time.monotonic() + self.awake_ttl
+        self.draining = status != 200
+        if self.draining:
+            # Idle pooled connections would keep the drain waiting; refills would cancel the suspend
+            self.pool.clear()
+        return True
+
+    async def wake(self) -> bool:
+        """Wake the node and wait for /health; concurrent callers share one wake"""
+        if self.awake:
+            return True
+        if self._wake_task is None or self._wake_task.done():
+            self._wake_task = asyncio.ensure_future(self._wake())
+        return await asyncio.shield(self._wake_task)
+
+    async def _wake(self) -> bool:
+        """Send magic packets until /health answers or the timeout passes"""
+        started = time.monotonic()
+        next_packet = started
+        self.stats['wakes'] += 1
+        logger.info(f"Connection for suspended {self.host}: waking {self.mac}")
+        while time.monotonic() - started < self.wake_timeout:
+            if time.monotonic() >= next_packet:
+                try:
+                    self.send_wol(self.mac, self.broadcast, self.wol_port)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not send magic packet: {e}")
+                next_packet = time.monotonic() + WOL_RESEND_SECONDS
+            if await self.check():
+                logger.info(f"{self.host} is awake after {time.monotonic() - started:.1f}s")
+                if not self.draining:
+                    self._spawn(self.pool.fill(self.ports))
+                return True
+            await asyncio.sleep(self.wake_poll_seconds)
+        logger.warning(f"{self.host} did not answer /health within {self.wake_timeout:.0f}s")
+        return False
+
+    async def poll_forever(self, interval: float):
+        """Track the node's state and keep the pool topped up while it is awake and not draining"""
+        while True:
+            if self._wake_task is None or self._wake_task.done():
+                if await self.check() and not self.draining:
+                    await self.pool.fill(self.ports)
+            await asyncio.sleep(interval)
+
+    def status(self) -> Dict[str, Any]:
+        """Counters and state for logging"""
+        return dict(self.stats, awake=self.awake, draining=self.draining, pooled=len(self.pool),
+                    pool_hits=self.pool.hits, pool_misses=self.pool.misses, zero_copy=self.zero_copy)
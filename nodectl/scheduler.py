@@ -0,0 +1,44 @@
+"""
+Check Scheduling Module
+Chooses the delay until the next auto-suspend check from the current idle state
+"""
+
+from typing import Dict, Any, Optional
+
+# Never schedule checks closer together than this, even right at the threshold
+MIN_DELAY = 1.0
+
+
+class CheckScheduler:
+    """Back off while the system is clearly busy, tighten sampling as the idle threshold nears"""
+
+    def __init__(self, wait_seconds: float, interval: float, min_interval: float,
+                 busy_interval: float, busy_gpu_usage: float, busy_cpu_idle: float):
+        self.wait_seconds = wait_seconds
+        self.interval = interval
+        self.min_interval = min(min_interval, interval)
+        self.busy_interval = max(busy_interval, interval)
+        self.busy_gpu_usage = busy_gpu_usage
+        self.busy_cpu_idle = busy_cpu_idle
+
+    def is_clearly_busy(self, conditions: Dict[str, Any]) -> bool:
+        """Whether load is far enough from the idle thresholds to sample slowly"""
+        return (
+            conditions.get('gpu_usage', 0.0) >= self.busy_gpu_usage or
+            conditions.get('cpu_idle', 100.0) <= self.busy_cpu_idle
+        )
+
+    def next_delay(self, conditions: Dict[str, Any], idle_since: Optional[float], now: float) -> float:
+        """Seconds until the next check"""
+        if idle_since is None:
+            if self.is_clearly_busy(conditions):
+                return self.busy_interval
+            return self.interval
+
+        remaining = idle_since + self.wait_seconds - now
+        if remaining <= self.min_interval:
+            # Land the next check right on the threshold
+            return max(MIN_DELAY, remaining)
+
+        # Halve the step as the threshold approaches so the last checks are dense
+        return max(self.min_interval, min(self.interval, remaining / 2))
@@ -0,0 +1,181 @@
+"""
+Stay-Awake Watch Module
+Keeps the stay-awake deadline cached in memory and refreshes it on inotify events
+"""
+
+import ctypes
+import logging
+import os
+import select
+import struct
+import threading
+import time
+from typing import Callable, Optional
+
+from nodectl.leases import read_store
+
+logger = logging.getLogger(__name__)
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_DELETE_SELF
+
+_INOTIFY_EVENT = struct.Struct('iIII')
+
+
+def read_deadline(path: str) -> int:
+    """Read the effective stay-awake deadline (unix timestamp) from the lease store, 0 if none"""
+    return read_store(path)[0]
+
+
+class StayAwakeWatcher:
+    """Watch the stay-awake lease store and keep its deadline cached; expiry is handled by a timer (read-only)"""
+
+    def __init__(self, path: str, on_change: Optional[Callable[[int], None]] = None,
+                 poll_interval: float = 1.0):
+        self.path = path
+        self.directory = os.path.dirname(path)
+        self.filename = os.path.basename(path)
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.deadline = 0
+
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._stop = threading.Event()
+        self._stop_pipe = os.pipe()
+        self._thread: Optional[threading.Thread] = None
+
+        os.makedirs(self.directory, exist_ok=True)
+        self.reload()
+
+    def remaining(self, now: Optional[float] = None) -> int:
+        """Seconds of stay-awake left (0 if inactive)"""
+        now = time.time() if now is None else now
+        return max(0, int(self.deadline - now))
+
+    def active(self) -> bool:
+        """Whether a stay-awake deadline is in the future"""
+        return self.remaining() > 0
+
+    def reload(self):
+        """Re-read the deadline from disk and re-arm the expiry timer"""
+        deadline = read_deadline(self.path)
+        with self._lock:
+            changed = deadline != self.deadline
+            self.deadline = deadline
+            self._arm_timer()
+        if changed and self.on_change:
+            self.on_change(deadline)
+
+    def _arm_timer(self):
+        """Schedule a callback for when the current deadline passes"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        delay = self.deadline - time.time()
+        if delay > 0:
+            self._timer = threading.Timer(delay, self._expired)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _expired(self):
+        """Timer callback: clear the cached deadline (the lease store belongs to the stay-awake server)"""
+        with self._lock:
+            if self.deadline > time.time():
+                # Extended while the timer was pending
+                return
+            self.deadline = 0
+
+        logger.info("Stay-awake expired")
+        if self.on_change:
+            self.on_change(0)
+
+    def start(self):
+        """Start watching in a background thread (inotify, falling back to mtime polling)"""
+        try:
+            fd = self._inotify_open()
+            target, args = self._watch_inotify, (fd,)
+        except OSError as e:
+            logger.warning(f"inotify unavailable, polling {self.path}: {e}")
+            target, args = self._watch_poll, ()
+
+        self._thread = threading.Thread(target=target, args=args, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the watcher thread and the expiry timer"""
+        self._stop.set()
+        os.write(self._stop_pipe[1], b'x')
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+
+    def _inotify_open(self) -> int:
+        """Create an inotify instance watching the stay-awake directory"""
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        wd = libc.inotify_add_watch(fd, self.directory.encode(), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(errno, os.strerror(errno))
+        return fd
+
+    def _watch_inotify(self, fd: int):
+        """Block on inotify events and reload when our file is written, replaced or removed"""
+        # Catch a write between the initial load and the watch being added
+        self.reload()
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd, self._stop_pipe[0]], [], [])
+                if fd not in ready:
+                    continue
+
+                data = os.read(fd, 4096)
+                relevant = False
+                offset = 0
+                while offset < len(data):
+                    _, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+                    name = data[offset + _INOTIFY_EVENT.size:offset + _INOTIFY_EVENT.size + length]
+                    offset += _INOTIFY_EVENT.size + length
+
+                    if mask & (IN_DELETE_SELF | IN_IGNORED):
+                        # Directory went away (e.g. /run cleaned up)
+                        logger.warning(f"{self.directory} removed, polling instead")
+                        self.reload()
+                        self._watch_poll()
+                        return
+                    if name.rstrip(b'\0').decode(errors='replace') == self.filename:
+                        relevant = True
+
+                if relevant:
+                    self.reload()
+        finally:
+            os.close(fd)
+
+    def _watch_poll(self):
+        """Fallback: stat the file and reload when its mtime changes"""
+        try:
+            last = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            last = None
+        self.reload()
+        while not self._stop.wait(self.poll_interval):
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime != last:
+                last = mtime
+                self.reload()
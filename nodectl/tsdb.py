@@ -0,0 +1,305 @@
+"""
+Metrics Store Module
+Compact on-disk time series: fixed-width samples in mmap'd ring files with 1m/1h rollups
+
+Each store directory holds three ring files:
+    raw.ring  one 10-byte record per sample (a week of 1s samples is ~6 MB)
+    1m.ring   one 18-byte rollup per minute
+    1h.ring   one 18-byte rollup per hour
+Writes are O(1): one struct.pack_into into the mapping plus a header update.
+Queries need numpy and return structured arrays.
+"""
+
+import fcntl
+import logging
+import mmap
+import os
+import struct
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Sample flags
+FLAG_IDLE = 0x01        # all auto-suspend idle conditions met
+FLAG_STAY_AWAKE = 0x02  # a stay-awake lease was active
+FLAG_SSH = 0x04         # SSH sessions open
+FLAG_API = 0x08         # API connections open
+FLAG_GPU_IDLE = 0x10    # GPU below the idle threshold
+FLAG_CPU_IDLE = 0x20    # CPU above the idle threshold
+FLAG_SERVICE = 0x40     # an inference service (LocalAI/Ollama) was running
+
+# timestamp, cpu idle %, max GPU util %, max GPU temp C, flags, total GPU power W
+RAW_RECORD = struct.Struct('<IBBBBH')
+# bucket start, sample count, covered seconds, avg cpu idle %, avg GPU util %, max GPU util %,
+# max GPU temp C, avg GPU power W, GPU-idle seconds, all-idle seconds
+ROLLUP_RECORD = struct.Struct('<IHHBBBBHHH')
+
+# magic, version, record size, capacity, records written (ever)
+_HEADER = struct.Struct('<4sHHIQ')
+HEADER_SIZE = 32
+MAGIC = b'NTSD'
+VERSION = 1
+
+RAW_CAPACITY = 7 * 24 * 3600     # a week of 1s samples
+MINUTE_CAPACITY = 90 * 24 * 60   # 90 days of minutes
+HOUR_CAPACITY = 2 * 365 * 24     # two years of hours
+
+# A sample accounts for the time since the previous one, unless the gap is longer than this
+# (the host was suspended or the writer was not running)
+MAX_SAMPLE_GAP = 300
+
+RAW_DTYPE = [('ts', '<u4'), ('cpu_idle', 'u1'), ('gpu_util', 'u1'), ('gpu_temp', 'u1'),
+             ('flags', 'u1'), ('gpu_power', '<u2')]
+ROLLUP_DTYPE = [('ts', '<u4'), ('samples', '<u2'), ('seconds', '<u2'), ('cpu_idle', 'u1'), ('gpu_util', 'u1'),
+                ('gpu_util_max', 'u1'), ('gpu_temp_max', 'u1'), ('gpu_power', '<u2'),
+                ('gpu_idle_seconds', '<u2'), ('idle_seconds', '<u2')]
+
+
+def _clamp(value: float, upper: int) -> int:
+    """Round into an unsigned field"""
+    return min(upper, max(0, int(value + 0.5)))
+
+
+class RingFile:
+    """Fixed-width records in a memory-mapped ring; the oldest record is overwritten when full"""
+
+    def __init__(self, path: str, record: struct.Struct, capacity: int, writable: bool = True):
+        self.path = path
+        self.record = record
+        self.capacity = capacity
+        self.writable = writable
+        size = HEADER_SIZE + record.size * capacity
+
+        if writable:
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                # One writer per store; a second writer fails here and should read instead
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                raise
+            if not self._header_matches(fd):
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+                os.pwrite(fd, _HEADER.pack(MAGIC, VERSION, record.size, capacity, 0), 0)
+            self._mm = mmap.mmap(fd, size)
+        else:
+            fd = os.open(path, os.O_RDONLY)
+            # Readers take the capacity the writer chose
+            header = os.pread(fd, _HEADER.size, 0)
+            if len(header) == _HEADER.size:
+                self.capacity = _HEADER.unpack(header)[3]
+            if not self._header_matches(fd):
+                os.close(fd)
+                raise ValueError(f"{path}: not a ring file for this record layout")
+            self._mm = mmap.mmap(fd, HEADER_SIZE + record.size * self.capacity, prot=mmap.PROT_READ)
+        self._fd = fd
+        self.count = _HEADER.unpack_from(self._mm, 0)[4]
+
+    def _header_matches(self, fd: int) -> bool:
+        """Whether an existing file has this ring's layout"""
+        header = os.pread(fd, _HEADER.size, 0)
+        if len(header) < _HEADER.size:
+            return False
+        magic, version, record_size, capacity, _ = _HEADER.unpack(header)
+        return (magic == MAGIC and version == VERSION and record_size == self.record.size
+                and capacity == self.capacity
+                and os.fstat(fd).st_size == HEADER_SIZE + self.record.size * self.capacity)
+
+    def append(self, *values):
+        """Write one record in place of the oldest"""
+        self.record.pack_into(self._mm, HEADER_SIZE + (self.count % self.capacity) * self.record.size, *values)
+        self.count += 1
+        # Publish the new count after the record so readers never see a half-written slot as valid
+        struct.pack_into('<Q', self._mm, 12, self.count)
+
+    def replace_last(self, *values):
+        """Overwrite the most recent record"""
+        self.record.pack_into(self._mm, HEADER_SIZE + ((self.count - 1) % self.capacity) * self.record.size, *values)
+
+    def refresh(self):
+        """Re-read the record count (for read-only views of a file another process writes)"""
+        self.count = _HEADER.unpack_from(self._mm, 0)[4]
+
+    def last(self) -> Optional[tuple]:
+        """The most recent record, or None"""
+        if self.count == 0:
+            return None
+        return self.record.unpack_from(self._mm, HEADER_SIZE + ((self.count - 1) % self.capacity) * self.record.size)
+
+    def to_array(self, dtype):
+        """All stored records, oldest first, as a numpy structured array (a copy)"""
+        import numpy as np
+
+        records = np.frombuffer(self._mm, dtype=np.dtype(dtype), count=self.capacity, offset=HEADER_SIZE)
+        stored = min(self.count, self.capacity)
+        if self.count <= self.capacity:
+            return records[:stored].copy()
+        split = self.count % self.capacity
+        return np.concatenate((records[split:], records[:split]))
+
+    def sync(self):
+        """Write dirty pages back to the file"""
+        self._mm.flush()
+
+    def close(self):
+        """Unmap and close the file"""
+        self._mm.close()
+        os.close(self._fd)
+
+
+class _Rollup:
+    """Running sums for the current bucket of one rollup resolution"""
+
+    def __init__(self, ring: RingFile, bucket: int):
+        self.ring = ring
+        self.bucket = bucket
+        self.start = 0
+        self.reset(0)
+        self._resume()
+
+    def _resume(self):
+        """Continue the ring's last bucket (written by a previous run) instead of duplicating it"""
+        last = self.ring.last()
+        if last is None:
+            return
+        (self.start, self.samples, self.seconds, cpu_idle, gpu_util, self.gpu_util_max,
+         self.gpu_temp_max, gpu_power, self.gpu_idle_seconds, self.idle_seconds) = last
+        # Turn the stored averages back into sums
+        self.cpu_idle = cpu_idle * self.samples
+        self.gpu_util = gpu_util * self.samples
+        self.gpu_power = gpu_power * self.samples
+        self.written = True
+
+    def reset(self, start: int):
+        """Start an empty bucket"""
+        self.start = start
+        self.seconds = 0
+        self.samples = 0
+        self.cpu_idle = 0
+        self.gpu_util = 0
+        self.gpu_util_max = 0
+        self.gpu_temp_max = 0
+        self.gpu_power = 0
+        self.gpu_idle_seconds = 0
+        self.idle_seconds = 0
+        # Whether this bucket already has a record in the ring (rewritten in place on flush)
+        self.written = False
+
+    def add(self, ts: int, weight: int, cpu_idle: int, gpu_util: int, gpu_temp: int, flags: int, gpu_power: int):
+        """Account one sample, flushing the previous bucket when ts moves past it"""
+        start = ts - ts % self.bucket
+        if start != self.start:
+            self.flush()
+            self.reset(start)
+
+        self.samples += 1
+        self.seconds += weight
+        self.cpu_idle += cpu_idle
+        self.gpu_util += gpu_util
+        self.gpu_power += gpu_power
+        if gpu_util > self.gpu_util_max:
+            self.gpu_util_max = gpu_util
+        if gpu_temp > self.gpu_temp_max:
+            self.gpu_temp_max = gpu_temp
+        if flags & FLAG_GPU_IDLE:
+            self.gpu_idle_seconds += weight
+        if flags & FLAG_IDLE:
+            self.idle_seconds += weight
+
+    def flush(self):
+        """Write the current bucket's rollup record"""
+        if not self.samples:
+            return
+        n = self.samples
+        write = self.ring.replace_last if self.written else self.ring.append
+        self.written = True
+        write(
+            self.start, min(n, 0xFFFF), min(self.seconds, 0xFFFF),
+            self.cpu_idle // n, self.gpu_util // n, self.gpu_util_max, self.gpu_temp_max,
+            self.gpu_power // n, min(self.gpu_idle_seconds, 0xFFFF), min(self.idle_seconds, 0xFFFF),
+        )
+
+
+class MetricsStore:
+    """Writer and reader for one store directory (raw samples plus 1m/1h rollups)"""
+
+    RESOLUTIONS = {'raw': RAW_DTYPE, '1m': ROLLUP_DTYPE, '1h': ROLLUP_DTYPE}
+
+    def __init__(self, directory: str, writable: bool = True, raw_capacity: int = RAW_CAPACITY,
+                 minute_capacity: int = MINUTE_CAPACITY, hour_capacity: int = HOUR_CAPACITY):
+        self.directory = directory
+        if writable:
+            os.makedirs(directory, exist_ok=True)
+        self.rings: Dict[str, RingFile] = {}
+        try:
+            self.rings['raw'] = RingFile(os.path.join(directory, 'raw.ring'), RAW_RECORD, raw_capacity, writable)
+            self.rings['1m'] = RingFile(os.path.join(directory, '1m.ring'), ROLLUP_RECORD, minute_capacity, writable)
+            self.rings['1h'] = RingFile(os.path.join(directory, '1h.ring'), ROLLUP_RECORD, hour_capacity, writable)
+        except Exception:
+            self.close()
+            raise
+        self.writable = writable
+        self._rollups = (_Rollup(self.rings['1m'], 60), _Rollup(self.rings['1h'], 3600)) if writable else ()
+
+        last = self.rings['raw'].last()
+        self._last_ts = last[0] if last else 0
+
+    def record(self, ts: float, cpu_idle: float, gpu_util: float, gpu_temp: float = 0,
+               gpu_power: float = 0, flags: int = 0):
+        """Append one sample and update the rollups"""
+        ts = int(ts)
+        cpu_idle = _clamp(cpu_idle, 100)
+        gpu_util = _clamp(gpu_util, 100)
+        gpu_temp = _clamp(gpu_temp, 0xFF)
+        gpu_power = _clamp(gpu_power, 0xFFFF)
+
+        gap = ts - self._last_ts
+        weight = gap if 0 < gap <= MAX_SAMPLE_GAP else 0
+        self._last_ts = ts
+
+        self.rings['raw'].append(ts, cpu_idle, gpu_util, gpu_temp, flags, gpu_power)
+        for rollup in self._rollups:
+            rollup.add(ts, weight, cpu_idle, gpu_util, gpu_temp, flags, gpu_power)
+
+    def flush(self):
+        """Write the partial rollup buckets and sync the mappings to disk"""
+        for rollup in self._rollups:
+            rollup.flush()
+        for ring in self.rings.values():
+            ring.sync()
+
+    def query(self, start: float = 0, end: Optional[float] = None, resolution: str = 'raw'):
+        """Records with start <= ts < end at the given resolution ('raw', '1m' or '1h') as a numpy array"""
+        if resolution not in self.RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+        import numpy as np
+
+        ring = self.rings[resolution]
+        if not self.writable:
+            ring.refresh()
+        records = ring.to_array(self.RESOLUTIONS[resolution])
+        # Timestamps are ascending in ring order (samples are appended in time order)
+        lo = np.searchsorted(records['ts'], int(start), side='left')
+        hi = len(records) if end is None else np.searchsorted(records['ts'], int(end), side='left')
+        return records[lo:hi]
+
+    def close(self):
+        """Flush partial rollups (if writing) and close all ring files"""
+        if getattr(self, 'writable', False):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Error flushing metrics: {e}")
+        for ring in self.rings.values():
+            ring.close()
+        self.rings = {}
+
+
+def open_store(directory: str, **kwargs: Any) -> Optional[MetricsStore]:
+    """Open a store for writing, or None (with a warning) if it cannot be used"""
+    try:
+        return MetricsStore(directory, **kwargs)
+    except Exception as e:
+        logger.warning(f"Metrics store {directory} unavailable: {e}")
+        return None
@@ -0,0 +1,259 @@
+"""
+Model Warm-Cache Module
+Remembers which models were in use before suspend and re-warms them (page cache + VRAM) after resume
+"""
+
+import http.client
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from nodectl.inference import OLLAMA_URL, KeepAliveClient
+
+logger = logging.getLogger(__name__)
+
+# Ollama's model store as mounted by install-ollama.sh (/opt/ollama/models -> /root/.ollama)
+OLLAMA_MODELS_DIR = '/opt/ollama/models/models'
+OLLAMA_REGISTRY = 'registry.ollama.ai'
+
+# Suspended time (CLOCK_BOOTTIME - CLOCK_MONOTONIC) growing by more than this means we resumed
+RESUME_JUMP = 5.0
+
+PREFETCH_CHUNK = 8 * 1024 * 1024
+
+
+def suspended_seconds() -> float:
+    """Total time the host has spent suspended since boot"""
+    return time.clock_gettime(time.CLOCK_BOOTTIME) - time.clock_gettime(time.CLOCK_MONOTONIC)
+
+
+def available_memory() -> int:
+    """MemAvailable in bytes (0 if unknown)"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0
+
+
+class ModelUsage:
+    """Per-model usage counts and sizes, persisted so they survive suspend and restarts"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self.suspended_with: List[str] = []
+        self._load()
+
+    def _load(self):
+        """Load the usage file"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.models = data.get('models', {})
+            self.suspended_with = data.get('suspended_with', [])
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        """Write the usage file atomically"""
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'models': self.models, 'suspended_with': self.suspended_with}, f)
+        os.replace(tmp_path, self.path)
+
+    def observe(self, activity: Dict[str, Any], now: Optional[float] = None,
+                exclude: Optional[List[str]] = None) -> bool:
+        """Fold one inference sample into the stats; returns True if anything worth saving changed"""
+        now = time.time() if now is None else now
+        changed = False
+        for name, size in activity.get('model_sizes', {}).items():
+            entry = self.models.setdefault(name, {'uses': 0, 'last_used': 0, 'size': 0})
+            if size and entry['size'] != size:
+                entry['size'] = size
+                changed = True
+        for name in activity.get('requested_models', []):
+            if exclude and name in exclude:
+                continue
+            entry = self.models.setdefault(name, {'uses': 0, 'last_used': 0, 'size': 0})
+            entry['uses'] += 1
+            entry['last_used'] = now
+            changed = True
+        return changed
+
+    def mark_suspend(self, resident: List[str]):
+        """Remember what was loaded when the host went to sleep"""
+        self.suspended_with = list(resident)
+        self.save()
+
+    def plan(self, count: int, vram_budget: int) -> List[str]:
+        """Models to re-warm, highest priority first, fitting count and the VRAM budget (bytes, 0 = no limit)
+
+        Priority: resident at suspend, then most used, then most recently used.
+        """
+        def priority(name: str):
+            entry = self.models.get(name, {})
+            return (name in self.suspended_with, entry.get('uses', 0), entry.get('last_used', 0))
+
+        candidates = set(self.suspended_with) | {name for name, entry in self.models.items() if entry.get('uses')}
+        chosen = []
+        used = 0
+        for name in sorted(candidates, key=priority, reverse=True):
+            if len(chosen) >= count:
+                break
+            size = self.models.get(name, {}).get('size', 0)
+            if vram_budget and used + size > vram_budget:
+                continue
+            chosen.append(name)
+            used += size
+        return chosen
+
+
+class ModelWarmer:
+    """Prefetch model blobs into the page cache and load them into VRAM through the Ollama API"""
+
+    def __init__(self, ollama_url: str = OLLAMA_URL, models_dir: str = OLLAMA_MODELS_DIR,
+                 keep_alive: str = '30m', load_timeout: float = 300.0):
+        self.ollama_url = ollama_url
+        self.models_dir = models_dir
+        self.keep_alive = keep_alive
+        self.load_timeout = load_timeout
+        # Models this warmer loaded, so their load requests are not counted as user requests
+        self.loaded_at: Dict[str, float] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def manifest_path(self, model: str) -> str:
+        """Manifest file of an Ollama model name ("llama3:8b", "user/model", "host/ns/model:tag")"""
+        name, _, tag = model.partition(':')
+        parts = name.split('/')
+        if len(parts) == 1:
+            parts = [OLLAMA_REGISTRY, 'library'] + parts
+        elif len(parts) == 2:
+            parts = [OLLAMA_REGISTRY] + parts
+        return os.path.join(self.models_dir, 'manifests', *parts, tag or 'latest')
+
+    def blob_paths(self, model: str) -> List[str]:
+        """Blob files (weights, template, params) referenced by a model's manifest"""
+        try:
+            with open(self.manifest_path(model), 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return []
+        layers = manifest.get('layers', []) + [manifest.get('config', {})]
+        paths = []
+        for layer in layers:
+            digest = layer.get('digest', '')
+            if digest:
+                path = os.path.join(self.models_dir, 'blobs', digest.replace(':', '-'))
+                if os.path.exists(path):
+                    paths.append(path)
+        return paths
+
+    def prefetch(self, paths: List[str], budget: int) -> int:
+        """Read files into the page cache (like `vmtouch -t`), stopping at budget bytes; returns bytes read"""
+        buffer = bytearray(PREFETCH_CHUNK)
+        view = memoryview(buffer)
+        total = 0
+        for path in paths:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                # Start kernel readahead for the whole file, then pull it in sequentially
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+                while total < budget:
+                    read = os.readv(fd, [view])
+                    if not read:
+                        break
+                    total += read
+            except OSError as e:
+                logger.warning(f"Prefetch of {path} stopped: {e}")
+            finally:
+                os.close(fd)
+            if total >= budget:
+                break
+        return total
+
+    def load(self, model: str) -> bool:
+        """Ask Ollama to load a model into VRAM without generating anything"""
+        client = KeepAliveClient(self.ollama_url, timeout=self.load_timeout)
+        body = json.dumps({'model': model, 'keep_alive': self.keep_alive}).encode()
+        try:
+            status, _ = client.request('POST', '/api/generate', body)
+        except (OSError, http.client.HTTPException) as e:
+            logger.warning(f"Loading {model} failed: {e}")
+            return False
+        finally:
+            client.close()
+        if status == 200:
+            self.loaded_at[model] = time.time()
+        return status == 200
+
+    def recently_loaded(self, within: float = 120.0) -> List[str]:
+        """Models this warmer loaded in the last `within` seconds"""
+        now = time.time()
+        return [model for model, at in self.loaded_at.items() if now - at < within]
+
+    def warm(self, models: List[str]) -> Dict[str, Any]:
+        """Prefetch and load each model in priority order; returns a summary"""
+        started = time.monotonic()
+        loaded = []
+        prefetched = 0
+        for model in models:
+            budget = int(available_memory() * 0.8)
+            prefetched += self.prefetch(self.blob_paths(model), budget)
+            if self.load(model):
+                loaded.append(model)
+        return {'loaded': loaded, 'prefetched_bytes': prefetched, 'seconds': time.monotonic() - started}
+
+    def warm_async(self, models: List[str], on_done: Optional[Callable[[Dict[str, Any]], None]] = None):
+        """Warm models in a background thread (ignored while a previous warm-up is running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def run():
+            summary = self.warm(models)
+            if on_done:
+                on_done(summary)
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+
+
+class ResumeWatcher:
+    """Call on_resume shortly after the host wakes from suspend"""
+
+    def __init__(self, on_resume: Callable[[float], None], poll_interval: float = 2.0):
+        self.on_resume = on_resume
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _run(self):
+        """Poll the suspended-time counter; CLOCK_MONOTONIC stops during suspend, CLOCK_BOOTTIME does not"""
+        suspended = suspended_seconds()
+        while not self._stop.wait(self.poll_interval):
+            current = suspended_seconds()
+            if current - suspended > RESUME_JUMP:
+                try:
+                    self.on_resume(current - suspended)
+                except Exception as e:
+                    logger.error(f"Resume hook failed: {e}")
+            suspended = current
+
+    def start(self):
+        """Start watching in a background thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop watching"""
+        self._stop.set()
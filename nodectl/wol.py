@@ -0,0 +1,25 @@
+"""
+Wake-on-LAN Module
+Magic packet construction and broadcast, shared by ai-goat and the fleet controller
+"""
+
+import socket
+
+WOL_PORT = 9
+BROADCAST = '255.255.255.255'
+
+
+def magic_packet(mac_address: str) -> bytes:
+    """Six 0xff bytes followed by the MAC sixteen times; accepts aa:bb:.., aa-bb-.. or bare hex"""
+    mac_bytes = bytes.fromhex(mac_address.replace(':', '').replace('-', ''))
+    if len(mac_bytes) != 6:
+        raise ValueError(f"Invalid MAC address: {mac_address}")
+    return b'\xff' * 6 + mac_bytes * 16
+
+
+def send_magic_packet(mac_address: str, broadcast: str = BROADCAST, port: int = WOL_PORT):
+    """Broadcast one magic packet over UDP (raises ValueError or OSError)"""
+    packet = magic_packet(mac_address)
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.sendto(packet, (broadcast, port))
@@ -105,6 +105,9 @@ safe_uninstall() {
   if [[ -f "/opt/ai-server/stay-awake-server.py" ]]; then
     sudo rm -f "/opt/ai-server/stay-awake-server.py"
   fi
+  if [[ -d "/opt/ai-server/nodectl" ]]; then
+    sudo rm -rf "/opt/ai-server/nodectl"
+  fi
 
   local wol_units
   wol_units="$(systemctl list-unit-files 'wol@*.service' --no-legend 2>/dev/null | awk '{print $1}')"
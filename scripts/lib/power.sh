@@ -112,6 +112,19 @@ stop_support_services() {
   fi
 }
 
+install_nodectl_package() {
+  local package_source="${SCRIPT_DIR}/nodectl"
+  if [[ ! -d "${package_source}" ]]; then
+    err "nodectl Python package not found at ${package_source}"
+    return 1
+  fi
+
+  sudo mkdir -p /opt/ai-server
+  sudo rm -rf /opt/ai-server/nodectl
+  sudo cp -r "${package_source}" /opt/ai-server/nodectl
+  sudo find /opt/ai-server/nodectl -name '__pycache__' -prune -exec rm -rf {} +
+}
+
 configure_auto_suspend_service() {
   if [[ "${ENABLE_AUTO_SUSPEND}" != "true" ]]; then
     info "Auto-Suspend disabled - skipping"
@@ -134,6 +147,7 @@ configure_auto_suspend_service() {
 
   sudo cp "${script_source}" /opt/ai-server/auto-suspend-monitor.py
   sudo chmod +x /opt/ai-server/auto-suspend-monitor.py
+  install_nodectl_package || return 1
 
   info "Creating systemd service ${MANAGED_SERVICE_AUTO_SUSPEND}..."
   sudo tee "/etc/systemd/system/${MANAGED_SERVICE_AUTO_SUSPEND}" >/dev/null <<SERVICE
@@ -152,9 +166,31 @@ WorkingDirectory=/opt/ai-server
 # Configuration via environment variables
 Environment="WAIT_MINUTES=${WAIT_MINUTES}"
 Environment="CPU_IDLE_THRESHOLD=${CPU_IDLE_THRESHOLD}"
+Environment="CPU_CORE_IDLE_MIN=10"
 Environment="GPU_USAGE_MAX=${GPU_USAGE_MAX}"
 Environment="CHECK_INTERVAL=${CHECK_INTERVAL}"
+Environment="CHECK_INTERVAL_MIN=5"
+Environment="CHECK_INTERVAL_BUSY=180"
 Environment="CHECK_SSH=false"
+Environment="CHECK_INFERENCE=true"
+Environment="INFERENCE_GRACE_MINUTES=10"
+Environment="CHECK_CGROUPS=true"
+Environment="CGROUP_CPU_MAX=10"
+Environment="CGROUP_PRESSURE_MAX=5"
+Environment="ACTIVITY_SCOPE=system"
+Environment="USEFUL_WORK_GROUPS=ollama.service,localai.service,docker:*"
+Environment="DRAIN_TIMEOUT=60"
+Environment="WARM_ON_RESUME=true"
+Environment="WARM_MODELS=2"
+Environment="WARM_VRAM_FRACTION=0.9"
+Environment="PREDICTIVE_WAIT=true"
+Environment="MIN_WAIT_MINUTES=2"
+Environment="MAX_WAIT_MINUTES=${WAIT_MINUTES}"
+Environment="RTC_WAKE=false"
+Environment="RTC_WAKE_THRESHOLD=0.5"
+Environment="RTC_WAKE_LEAD_MINUTES=10"
+Environment="SLOW_CHECK_SECONDS=2"
+Environment="PROFILE_CYCLES=10"
 
 ExecStart=/usr/bin/python3 /opt/ai-server/auto-suspend-monitor.py
 Restart=always
@@ -207,6 +243,7 @@ configure_stay_awake_service() {
 
   sudo cp "${script_source}" /opt/ai-server/stay-awake-server.py
   sudo chmod +x /opt/ai-server/stay-awake-server.py
+  install_nodectl_package || return 1
 
   info "Creating systemd service ${MANAGED_SERVICE_STAY_AWAKE}..."
   sudo tee "/etc/systemd/system/${MANAGED_SERVICE_STAY_AWAKE}" >/dev/null <<SERVICE
@@ -6,9 +6,21 @@ Provides a simple HTTP endpoint to prevent auto-suspend
 
 import os
 import time
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 import logging
+from typing import Optional
+
+from nodectl.leases import (
+    DEFAULT_LEASE,
+    LEASE_ID_PATTERN,
+    LeaseTable,
+    format_store,
+    read_store,
+)
+from nodectl.metrics import CONTENT_TYPE, MetricsCache
+from nodectl.quiesce import DRAIN_FILE, is_draining
 
 # Configure logging
 logging.basicConfig(
@@ -17,27 +29,127 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-STAY_AWAKE_FILE = "/run/ai-nodectl/stay_awake_until"
+STAY_AWAKE_FILE = os.getenv('STAY_AWAKE_FILE', "/run/ai-nodectl/stay_awake_until")
 PORT = int(os.getenv('PORT', '9876'))
 
 
+# Longest stay-awake a single request may ask for (24 hours)
+MAX_SECONDS = 86400
+# Upper bound on concurrent named leases
+MAX_LEASES = 4096
+# Leases listed individually by /status
+STATUS_LEASES = 20
+
+
+class StayAwakeState:
+    """Stay-awake leases held in memory and persisted atomically for the monitor"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.tmp_path = os.path.join(os.path.dirname(path), f'.{os.path.basename(path)}.tmp')
+        self.lock = threading.Lock()
+        self._dirty = threading.Event()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Leases left over from a previous run
+        self.leases = LeaseTable(read_store(path)[1])
+        self.leases.expire()
+
+        # A single writer thread coalesces bursts of updates into one file write
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _persist(self, contents: str):
+        """Write the lease store via temp file + rename so readers never see a partial write"""
+        with open(self.tmp_path, 'w') as f:
+            f.write(contents)
+        os.replace(self.tmp_path, self.path)
+
+    def _write_loop(self):
+        """Persist the lease table whenever it changes"""
+        while True:
+            self._dirty.wait()
+            self._dirty.clear()
+            with self.lock:
+                self.leases.expire()
+                contents = format_store(self.leases.leases())
+            try:
+                self._persist(contents)
+            except Exception as e:
+                logger.error(f"Error persisting stay-awake leases: {e}")
+
+    def acquire(self, lease_id: str, seconds: int) -> int:
+        """Create or extend a named lease and return its deadline"""
+        with self.lock:
+            self.leases.expire()
+            if lease_id not in self.leases.table and len(self.leases) >= MAX_LEASES:
+                raise OverflowError(f"Too many active leases (max {MAX_LEASES})")
+            previous = self.leases.table.get(lease_id)
+            until = self.leases.acquire(lease_id, seconds)
+        if until != previous:
+            self._dirty.set()
+        return until
+
+    def release(self, lease_id: str) -> bool:
+        """Drop a named lease"""
+        with self.lock:
+            released = self.leases.release(lease_id)
+        if released:
+            self._dirty.set()
+        return released
+
+    def snapshot(self) -> dict:
+        """Active leases (expired ones are purged first)"""
+        with self.lock:
+            self.leases.expire()
+            return self.leases.leases()
+
+    def deadline(self) -> int:
+        """Effective deadline across all active leases (0 if none)"""
+        with self.lock:
+            self.leases.expire()
+            return self.leases.deadline()
+
+    def summary(self) -> tuple:
+        """(effective deadline, active lease count) under one lock"""
+        with self.lock:
+            self.leases.expire()
+            return self.leases.deadline(), len(self.leases)
+
+
 class StayAwakeHandler(BaseHTTPRequestHandler):
     """Handle stay-awake requests"""
 
+    # HTTP/1.1 keeps client connections open between requests
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out as separate writes; don't let Nagle hold the body back
+    disable_nagle_algorithm = True
+
     def do_GET(self):
         """Handle GET requests"""
         parsed = urlparse(self.path)
 
         if parsed.path == '/stay':
             self.handle_stay_request(parsed)
+        elif parsed.path == '/release':
+            self.handle_release_request(parsed)
         elif parsed.path == '/status':
             self.handle_status_request()
         elif parsed.path == '/health':
             self.handle_health_request()
+        elif parsed.path == '/metrics':
+            self.handle_metrics_request()
         else:
-            self.send_response(404)
-            self.end_headers()
-            self.wfile.write(b'Not Found')
+            self.send_text(404, 'Not Found')
+
+    def send_text(self, status: int, body: str, content_type: str = 'text/plain'):
+        """Send a plain-text response with Content-Length (required for keep-alive)"""
+        payload = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
 
     def handle_stay_request(self, parsed):
         """Handle stay-awake activation request"""
@@ -46,39 +158,31 @@ class StayAwakeHandler(BaseHTTPRequestHandler):
             params = parse_qs(parsed.query)
 
             if 's' not in params:
-                self.send_response(400)
-                self.end_headers()
-                self.wfile.write(b'Missing parameter: s (seconds)')
+                self.send_text(400, 'Missing parameter: s (seconds)')
                 return
 
             seconds = int(params['s'][0])
 
             if seconds <= 0:
-                self.send_response(400)
-                self.end_headers()
-                self.wfile.write(b'Seconds must be positive')
+                self.send_text(400, 'Seconds must be positive')
                 return
 
             # Maximum 24 hours
-            if seconds > 86400:
-                seconds = 86400
-
-            # Calculate timestamp
-            until_timestamp = int(time.time()) + seconds
-
-            # Create directory if needed
-            os.makedirs(os.path.dirname(STAY_AWAKE_FILE), exist_ok=True)
+            if seconds > MAX_SECONDS:
+                seconds = MAX_SECONDS
 
-            # Write timestamp
-            with open(STAY_AWAKE_FILE, 'w') as f:
-                f.write(str(until_timestamp))
+            lease_id = params.get('id', [DEFAULT_LEASE])[0]
+            if not LEASE_ID_PATTERN.match(lease_id):
+                self.send_text(400, 'Invalid lease id')
+                return
 
-            logger.info(f"Stay-awake activated for {seconds} seconds")
+            try:
+                self.server.state.acquire(lease_id, seconds)
+            except OverflowError as e:
+                self.send_text(503, str(e))
+                return
 
-            # Send response
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/plain')
-            self.end_headers()
+            logger.info(f"Stay-awake lease '{lease_id}' activated for {seconds} seconds")
 
             hours = seconds // 3600
             minutes = (seconds % 3600) // 60
@@ -89,71 +193,89 @@ class StayAwakeHandler(BaseHTTPRequestHandler):
             else:
                 response += f" ({minutes}m)"
 
-            self.wfile.write(response.encode())
+            self.send_text(200, response)
 
         except ValueError:
-            self.send_response(400)
-            self.end_headers()
-            self.wfile.write(b'Invalid seconds parameter')
+            self.send_text(400, 'Invalid seconds parameter')
         except Exception as e:
             logger.error(f"Error handling stay request: {e}")
-            self.send_response(500)
-            self.end_headers()
-            self.wfile.write(f'Error: {e}'.encode())
+            self.send_text(500, f'Error: {e}')
+
+    def handle_release_request(self, parsed):
+        """Handle lease release request"""
+        params = parse_qs(parsed.query)
+        lease_id = params.get('id', [DEFAULT_LEASE])[0]
+        if not LEASE_ID_PATTERN.match(lease_id):
+            self.send_text(400, 'Invalid lease id')
+            return
+
+        if self.server.state.release(lease_id):
+            logger.info(f"Stay-awake lease '{lease_id}' released")
+            self.send_text(200, f"Lease released: {lease_id}")
+        else:
+            self.send_text(404, f"Unknown lease: {lease_id}")
 
     def handle_status_request(self):
         """Handle status check request"""
-        try:
-            if not os.path.exists(STAY_AWAKE_FILE):
-                self.send_response(200)
-                self.send_header('Content-Type', 'text/plain')
-                self.end_headers()
-                self.wfile.write(b'Stay-awake: inactive')
-                return
-
-            with open(STAY_AWAKE_FILE, 'r') as f:
-                until_timestamp = int(f.read().strip())
+        state = self.server.state
+        leases = state.snapshot()
+        if not leases:
+            self.send_text(200, 'Stay-awake: inactive')
+            return
+
+        now = int(time.time())
+        remaining = max(leases.values()) - now
+        hours = remaining // 3600
+        minutes = (remaining % 3600) // 60
+        seconds = remaining % 60
+
+        lines = [
+            "Stay-awake: active",
+            f"Remaining: {hours}h {minutes}m {seconds}s",
+            f"Leases: {len(leases)}",
+        ]
+        longest = sorted(leases.items(), key=lambda item: -item[1])
+        for lease_id, until in longest[:STATUS_LEASES]:
+            lines.append(f"  {lease_id}: {until - now}s")
+        if len(longest) > STATUS_LEASES:
+            lines.append(f"  ... {len(longest) - STATUS_LEASES} more")
+
+        self.send_text(200, "\n".join(lines))
 
-            now = int(time.time())
-            remaining = until_timestamp - now
+    def handle_health_request(self):
+        """Handle health check request (503 while the monitor drains before a suspend)"""
+        if is_draining(DRAIN_FILE):
+            self.send_text(503, 'Draining')
+        else:
+            self.send_text(200, 'OK')
 
-            if remaining > 0:
-                hours = remaining // 3600
-                minutes = (remaining % 3600) // 60
-                seconds = remaining % 60
+    def handle_metrics_request(self):
+        """Serve Prometheus metrics from the cached monitor snapshot (never samples the host)"""
+        deadline, leases = self.server.state.summary()
+        self.send_text(200, self.server.metrics.render(deadline, leases), CONTENT_TYPE)
 
-                response = f"Stay-awake: active\nRemaining: {hours}h {minutes}m {seconds}s"
-            else:
-                response = "Stay-awake: inactive (expired)"
+    def log_message(self, format, *args):
+        """Override to use our logger"""
+        logger.info(f"{self.client_address[0]} - {format % args}")
 
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/plain')
-            self.end_headers()
-            self.wfile.write(response.encode())
 
-        except Exception as e:
-            logger.error(f"Error handling status request: {e}")
-            self.send_response(500)
-            self.end_headers()
-            self.wfile.write(f'Error: {e}'.encode())
+class StayAwakeServer(ThreadingHTTPServer):
+    """Thread-per-connection HTTP server sharing one in-memory stay-awake state"""
 
-    def handle_health_request(self):
-        """Handle health check request"""
-        self.send_response(200)
-        self.send_header('Content-Type', 'text/plain')
-        self.end_headers()
-        self.wfile.write(b'OK')
+    daemon_threads = True
+    request_queue_size = 128
 
-    def log_message(self, format, *args):
-        """Override to use our logger"""
-        logger.info(f"{self.client_address[0]} - {format % args}")
+    def __init__(self, address, state: StayAwakeState, metrics: Optional[MetricsCache] = None):
+        self.state = state
+        self.metrics = metrics or MetricsCache()
+        super().__init__(address, StayAwakeHandler)
 
 
 def main():
     """Start the stay-awake server"""
     logger.info(f"Starting stay-awake server on port {PORT}")
 
-    server = HTTPServer(('0.0.0.0', PORT), StayAwakeHandler)
+    server = StayAwakeServer(('0.0.0.0', PORT), StayAwakeState(STAY_AWAKE_FILE))
 
     try:
         server.serve_forever()
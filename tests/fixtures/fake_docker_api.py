@@ -0,0 +1,84 @@
+"""
+Fake Docker Engine API
+Minimal HTTP/1.1 server on a Unix socket for the nodectl/docker.py tests
+"""
+
+import json
+import os
+import socketserver
+import struct
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler
+
+CONTAINERS = [
+    {'Id': 'aaa', 'Names': ['/localai'], 'State': 'running'},
+    {'Id': 'bbb', 'Names': ['/open-webui'], 'State': 'running'},
+]
+
+
+def frame(stream: int, payload: bytes) -> bytes:
+    """One multiplexed log frame"""
+    return struct.pack('>BxxxI', stream, len(payload)) + payload
+
+
+class FakeDockerHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, body: bytes, content_type: str = 'application/json'):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(self.path)
+        server.connections.add(id(self.connection))
+
+        if self.path.startswith('/containers/json'):
+            self.send_body(json.dumps(server.containers).encode())
+        elif self.path.startswith('/containers/localai/logs'):
+            body = frame(1, b'line one\n') + frame(2, b'error two\n') + frame(1, b'line three\n')
+            self.send_body(body, 'application/vnd.docker.multiplexed-stream')
+        elif self.path.startswith('/events'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            server.events_ready.set()
+            server.emit_event.wait(10)
+            chunk = json.dumps({'Type': 'container', 'Action': 'stop', 'Actor': {'ID': 'aaa'}}).encode() + b'\n'
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            self.wfile.flush()
+            server.emit_event.clear()
+            server.emit_event.wait(10)
+            self.wfile.write(b'0\r\n\r\n')
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+
+class FakeDockerServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str):
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, FakeDockerHandler)
+        self.containers = list(CONTAINERS)
+        self.requests = []
+        self.connections = set()
+        self.events_ready = threading.Event()
+        self.emit_event = threading.Event()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up mid-stream (e.g. DockerClient.close()) are expected; anything else is a fixture bug
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
@@ -0,0 +1,81 @@
+"""
+Fake Fleet Node
+Stay-awake /health and stub Ollama endpoints that only listen once the node has "booted", plus a magic packet listener
+"""
+
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fake_model_servers import FakeModelServer
+
+
+class HealthHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        status = 503 if self.server.draining else 200
+        body = b'Draining' if self.server.draining else b'OK'
+        self.send_response(status if self.path == '/health' else 404)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeFleetNode:
+    """Suspended nodes refuse /health connections until a magic packet arrives and boot_seconds pass"""
+
+    def __init__(self, name: str, mac: str, awake: bool = True, boot_seconds: float = 0.5, models=()):
+        self.name = name
+        self.mac = mac
+        self.boot_seconds = boot_seconds
+        self.ollama = FakeModelServer(listening=False)
+        self.ollama.models = [{'name': model} for model in models]
+        # Bound but not listening: connections are refused like on a suspended host
+        self.health = ThreadingHTTPServer(('127.0.0.1', 0), HealthHandler, bind_and_activate=False)
+        self.health.daemon_threads = True
+        self.health.draining = False
+        self.health.server_bind()
+        self.wol = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.wol.bind(('127.0.0.1', 0))
+        self.packets = []
+        self.awake = False
+        threading.Thread(target=self._receive, daemon=True).start()
+        if awake:
+            self.boot()
+
+    def _receive(self):
+        while True:
+            packet = self.wol.recv(1024)
+            self.packets.append(packet)
+            if not self.awake:
+                threading.Timer(self.boot_seconds, self.boot).start()
+
+    def boot(self):
+        if self.awake:
+            return
+        self.awake = True
+        self.ollama.activate()
+        self.health.server_activate()
+        threading.Thread(target=self.health.serve_forever, daemon=True).start()
+
+    def suspend(self):
+        """Stop answering without the proxy noticing (as between two polls)"""
+        self.health.shutdown()
+        self.ollama.shutdown()
+        self.health.socket.close()
+        self.ollama.socket.close()
+
+    def config(self, **extra) -> dict:
+        entry = {
+            'name': self.name,
+            'mac': self.mac,
+            'host': '127.0.0.1',
+            'stay_awake_port': self.health.server_address[1],
+            'ports': {'ollama': self.ollama.server_address[1]},
+            'broadcast': '127.0.0.1',
+            'wol_port': self.wol.getsockname()[1],
+        }
+        entry.update(extra)
+        return entry
@@ -0,0 +1,78 @@
+"""
+Fake Model Servers
+Stub Ollama (/api/ps, /api/generate) and LocalAI (/metrics) HTTP/1.1 servers for the nodectl inference tests
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeModelHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        server.connections.add(self.client_address)
+        if self.path == '/api/ps':
+            body = json.dumps({'models': server.models}).encode()
+        elif self.path == '/metrics':
+            body = (
+                "# HELP api_call_seconds API call duration\n"
+                "# TYPE api_call_seconds histogram\n"
+                f'api_call_seconds_count{{method="POST",path="/v1/chat/completions"}} {server.calls}\n'
+                f'api_call_seconds_count{{method="GET",path="/readyz"}} 0\n'
+                f"localai_requests_in_flight {server.in_flight}\n"
+            ).encode()
+        else:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if self.path != '/api/generate':
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        # An empty generate request only loads the model
+        server.loaded.append(request.get('model'))
+        body = json.dumps({'model': request.get('model'), 'done': True, 'done_reason': 'load'}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeModelServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, listening: bool = True):
+        # Not listening: bound, but connections are refused until activate()
+        super().__init__(('127.0.0.1', 0), FakeModelHandler, bind_and_activate=False)
+        self.server_bind()
+        self.models = []
+        self.calls = 0
+        self.in_flight = 0
+        self.loaded = []
+        self.connections = set()
+        if listening:
+            self.activate()
+
+    def activate(self):
+        self.server_activate()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
@@ -0,0 +1,40 @@
+"""
+Fake Sysfs
+Builds /sys/class/powercap RAPL zone trees and stands in for GPU telemetry in the nodectl/energy.py tests
+"""
+
+import os
+
+
+def make_zone(root: str, zone: str, name: str, energy_uj: int, max_range: int = 262143328850):
+    """Create one powercap zone directory"""
+    path = os.path.join(root, zone)
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, 'name'), 'w') as f:
+        f.write(f'{name}\n')
+    with open(os.path.join(path, 'max_energy_range_uj'), 'w') as f:
+        f.write(f'{max_range}\n')
+    set_energy(root, zone, energy_uj)
+    return path
+
+
+def set_energy(root: str, zone: str, energy_uj: int):
+    """Move a zone's energy counter"""
+    with open(os.path.join(root, zone, 'energy_uj'), 'w') as f:
+        f.write(f'{energy_uj}\n')
+
+
+class FakeGpu:
+    """GpuTelemetry stand-in with settable energy counters (mJ) and power readings (W)"""
+
+    has_gpu = True
+
+    def __init__(self, energy=None, power=()):
+        self.energy_mj = energy
+        self.power = list(power)
+
+    def energy(self):
+        return None if self.energy_mj is None else list(self.energy_mj)
+
+    def latest(self):
+        return 0.0, [{'power': watts} for watts in self.power]
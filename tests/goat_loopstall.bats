@@ -0,0 +1,48 @@
+#!/usr/bin/env bats
+# Unit tests for ai-goat-cli/lib/loopstall.py (event loop stall detection for the TUI)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}:${PROJECT_ROOT}/ai-goat-cli/lib"
+}
+
+@test "loopstall.py exists" {
+  [ -f "${PROJECT_ROOT}/ai-goat-cli/lib/loopstall.py" ]
+}
+
+@test "summary is zeroed before any sample" {
+  run python3 - <<'PY'
+from loopstall import LoopStallMonitor
+
+print(LoopStallMonitor().summary())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "{'samples': 0, 'p50_ms': 0.0, 'p99_ms': 0.0, 'max_ms': 0.0, 'stalls': 0}" ]]
+}
+
+@test "a blocking call on the loop is reported as a stall" {
+  run python3 - <<'PY'
+import asyncio
+import time
+from loopstall import LoopStallMonitor
+
+lags = []
+monitor = LoopStallMonitor(period=0.05, threshold=0.1, on_stall=lags.append)
+
+async def main():
+    monitor.start()
+    await asyncio.sleep(0.2)
+    # A synchronous call on the UI thread holds the loop for 300ms
+    time.sleep(0.3)
+    await asyncio.sleep(0.2)
+    monitor.stop()
+
+asyncio.run(main())
+summary = monitor.summary()
+print(monitor.stalls >= 1, len(lags) == monitor.stalls, min(lags) >= monitor.threshold)
+print(summary['stalls'] == monitor.stalls, 200 <= summary['max_ms'] < 1000, summary['p50_ms'] < 100, summary['samples'] > 4)
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'True True True\nTrue True True True' ]]
+}
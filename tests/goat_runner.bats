@@ -0,0 +1,74 @@
+#!/usr/bin/env bats
+# Unit tests for ai-goat-cli/lib/runner.py (streaming script runner with a ring buffer and a log file)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}:${PROJECT_ROOT}/ai-goat-cli/lib"
+  WORK_DIR="$(mktemp -d)"
+  export WORK_DIR
+}
+
+teardown() {
+  rm -rf "${WORK_DIR}"
+}
+
+@test "runner.py exists" {
+  [ -f "${PROJECT_ROOT}/ai-goat-cli/lib/runner.py" ]
+}
+
+@test "the ring buffer keeps the last lines, progress updates collapse and phases are tracked" {
+  cat > "${WORK_DIR}/install.sh" <<'SH'
+#!/usr/bin/env bash
+printf '\033[1;32m[+] Installing drivers\033[0m\n'
+for i in $(seq 1 250); do echo "driver line ${i}"; done
+printf 'pull 10%%\rpull 50%%\rpull 100%%\r\n'
+echo "[+] Starting services" >&2
+echo "done"
+exit 3
+SH
+  chmod +x "${WORK_DIR}/install.sh"
+  run python3 - <<'PY'
+import asyncio
+import os
+from runner import StreamingRunner
+
+work_dir = os.environ['WORK_DIR']
+runner = StreamingRunner([os.path.join(work_dir, 'install.sh')], 'install', log_dir=os.path.join(work_dir, 'logs'))
+updates = []
+print(asyncio.run(runner.run(on_output=lambda r: updates.append(r.line_count))), runner.returncode, bool(updates))
+print(len(runner.lines), runner.line_count, runner.lines[0], runner.tail(3))
+print(runner.phase, runner.phase_count)
+with open(runner.log_path, 'rb') as f:
+    log = f.read()
+print(os.path.dirname(runner.log_path) == os.path.join(work_dir, 'logs'), log.count(b'\n'), b'pull 10%\rpull 50%' in log)
+print(runner.summary(2).splitlines()[:3])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'False 3 True\n200 254 driver line 54 [\'pull 100%\', \'[+] Starting services\', \'done\']\nStarting services 2\nTrue 254 True\n[\'... (252 earlier lines in the log)\', \'[+] Starting services\', \'done\']' ]]
+}
+
+@test "a command that outlives the timeout is killed and reported" {
+  cat > "${WORK_DIR}/hang.sh" <<'SH'
+#!/usr/bin/env bash
+echo "[+] Pulling images"
+exec sleep 30
+SH
+  chmod +x "${WORK_DIR}/hang.sh"
+  run python3 - <<'PY'
+import asyncio
+import os
+import time
+from runner import StreamingRunner
+
+work_dir = os.environ['WORK_DIR']
+runner = StreamingRunner([os.path.join(work_dir, 'hang.sh')], 'hang', timeout=1, log_dir=work_dir)
+started = time.monotonic()
+print(asyncio.run(runner.run()), runner.timed_out, runner.returncode, time.monotonic() - started < 5)
+print(runner.phase, runner.tail(2))
+with open(runner.log_path) as f:
+    print(f.read().splitlines()[-1])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'False True -9 True\nPulling images [\'[+] Pulling images\', \'Timed out after 1 seconds\']\nTimed out after 1 seconds' ]]
+}
@@ -0,0 +1,84 @@
+#!/usr/bin/env bats
+# Unit tests for ai-goat-cli/lib/services.py (batched systemd unit state) with systemctl stubbed on PATH
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}:${PROJECT_ROOT}/ai-goat-cli/lib"
+  WORK_DIR="$(mktemp -d)"
+  export WORK_DIR
+  mkdir -p "${WORK_DIR}/bin"
+  # Prints properties in systemd's own order, not the -p order; a missing unit still gets a block
+  cat > "${WORK_DIR}/bin/systemctl" <<'SH'
+#!/usr/bin/env bash
+echo "$*" >> "${WORK_DIR}/systemctl.calls"
+cat <<'OUT'
+Id=ollama.service
+LoadState=loaded
+ActiveState=active
+UnitFileState=enabled
+
+ActiveState=inactive
+UnitFileState=disabled
+Id=localai.service
+LoadState=loaded
+
+Id=missing.service
+LoadState=not-found
+ActiveState=inactive
+UnitFileState=
+OUT
+SH
+  chmod +x "${WORK_DIR}/bin/systemctl"
+}
+
+teardown() {
+  rm -rf "${WORK_DIR}"
+}
+
+@test "services.py exists" {
+  [ -f "${PROJECT_ROOT}/ai-goat-cli/lib/services.py" ]
+}
+
+@test "systemctl show output is parsed into blocks keyed by Id" {
+  run python3 - <<'PY'
+from services import parse_systemctl_show
+
+output = 'Id=a.service\nLoadState=loaded\nDescription=x=y\n\nLoadState=loaded\n\nActiveState=failed\nId=b.service\n'
+units = parse_systemctl_show(output)
+print(sorted(units), units['a.service']['Description'], units['b.service']['ActiveState'])
+print(parse_systemctl_show(''))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'[\'a.service\', \'b.service\'] x=y failed\n{}' ]]
+}
+
+@test "without D-Bus every unit's state comes from one systemctl show call" {
+  PATH="${WORK_DIR}/bin:${PATH}" run python3 - <<'PY'
+import os
+from services import ServiceStateBackend
+
+backend = ServiceStateBackend(['ollama.service', 'localai.service', 'missing.service', 'unlisted.service'])
+backend.use_dbus = False
+for unit, state in backend.query().items():
+    print(unit, state['active'], state['enabled'], state['exists'])
+with open(os.path.join(os.environ['WORK_DIR'], 'systemctl.calls')) as f:
+    print(f.read().strip())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'ollama.service True True True\nlocalai.service False False True\nmissing.service False False False\nunlisted.service False False False\nshow -p Id,LoadState,ActiveState,UnitFileState ollama.service localai.service missing.service unlisted.service' ]]
+}
+
+@test "a failing systemctl reports every unit as missing instead of raising" {
+  printf '#!/usr/bin/env bash\nexit 1\n' > "${WORK_DIR}/bin/systemctl"
+  PATH="${WORK_DIR}/bin:${PATH}" run python3 - <<'PY'
+from services import ServiceStateBackend
+
+backend = ServiceStateBackend(['ollama.service'])
+backend.use_dbus = False
+print(backend.query())
+print(backend.query(['other.service']))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'{\'ollama.service\': {\'active\': False, \'enabled\': False, \'exists\': False}}\n{\'other.service\': {\'active\': False, \'enabled\': False, \'exists\': False}}' ]]
+}
@@ -0,0 +1,49 @@
+#!/usr/bin/env bats
+# Unit tests for ai-goat-cli/lib/telemetry.py (shared snapshot collector for the TUI widgets)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}:${PROJECT_ROOT}/ai-goat-cli/lib:${TEST_DIR}/fixtures"
+}
+
+@test "telemetry.py exists" {
+  [ -f "${PROJECT_ROOT}/ai-goat-cli/lib/telemetry.py" ]
+}
+
+@test "subscribers are only called from the collector thread, even when a snapshot already exists" {
+  run python3 - <<'PY'
+import threading
+from telemetry import TelemetryCollector
+
+class FakeMonitor:
+    def get_stats(self):
+        return {'cpu_percent': 5.0, 'gpus': [{'index': 0}]}
+
+class FakePowerManager:
+    monitor = FakeMonitor()
+
+    def get_status(self, stats):
+        return {'stay_awake_active': False}
+
+collector = TelemetryCollector(power_mgr=FakePowerManager(), interval=0.05)
+collector._publish(collector.collect())
+print(collector.snapshot['stats']['gpus'][0]['index'], type(collector.snapshot['stats']['gpus']).__name__)
+
+calls = []
+delivered = threading.Event()
+
+def on_snapshot(snapshot):
+    calls.append(threading.current_thread() is threading.main_thread())
+    delivered.set()
+
+collector.subscribe(on_snapshot)
+print(calls)
+collector.start()
+print(delivered.wait(5), calls[0])
+collector.stop()
+collector.unsubscribe(on_snapshot)
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'0 tuple\n[]\nTrue False' ]]
+}
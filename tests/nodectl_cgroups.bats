@@ -0,0 +1,92 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/cgroups.py (cgroup v2 cpu.stat/PSI load) against a fake cgroup tree
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}"
+  WORK_DIR="$(mktemp -d)"
+  export WORK_DIR
+}
+
+teardown() {
+  rm -rf "${WORK_DIR}"
+}
+
+write_cgroup() {
+  local dir="${WORK_DIR}/cgroup/system.slice/$1"
+  mkdir -p "${dir}"
+  printf 'usage_usec %s\nuser_usec 0\nsystem_usec 0\n' "$2" > "${dir}/cpu.stat"
+  printf 'some avg10=0.00 avg60=0.00 avg300=0.00 total=%s\nfull avg10=0.00 avg60=0.00 avg300=0.00 total=0\n' "$3" > "${dir}/io.pressure"
+  printf 'some avg10=0.00 avg60=0.00 avg300=0.00 total=0\n' > "${dir}/cpu.pressure"
+}
+
+@test "cgroups.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/cgroups.py" ]
+}
+
+@test "counters are read from cpu.stat and the pressure files" {
+  write_cgroup ollama.service 123456 789
+  run python3 - <<'PY'
+import os
+from nodectl.cgroups import read_cpu_usage, read_pressure
+
+path = os.path.join(os.environ['WORK_DIR'], 'cgroup', 'system.slice', 'ollama.service')
+print(read_cpu_usage(path), read_pressure(path, 'io'), read_pressure(path, 'cpu'), read_pressure(path, 'memory'))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "123456 789 0 None" ]]
+}
+
+@test "busy and stall time are exact over the window, including new containers" {
+  write_cgroup ollama.service 1000000 0
+  write_cgroup docker-abc.scope 0 0
+  run python3 - <<'PY'
+import os
+import subprocess
+from nodectl.cgroups import CgroupLoad
+
+root = os.path.join(os.environ['WORK_DIR'], 'cgroup')
+load = CgroupLoad(['system.slice/ollama.service', 'system.slice/docker-*.scope', 'system.slice/missing.service'], root)
+print([os.path.relpath(path, root) for path in load.paths()])
+print(load.sample(now=0)['valid'])
+
+def write(name, usage, io):
+    with open(os.path.join(root, 'system.slice', name, 'cpu.stat'), 'w') as f:
+        f.write(f'usage_usec {usage}\n')
+    with open(os.path.join(root, 'system.slice', name, 'io.pressure'), 'w') as f:
+        f.write(f'some avg10=0.00 avg60=0.00 avg300=0.00 total={io}\n')
+
+# Ollama burned 3s of CPU and stalled 1s on IO within a 10s window
+write('ollama.service', 4000000, 1000000)
+write('docker-abc.scope', 500000, 0)
+os.makedirs(os.path.join(root, 'system.slice', 'docker-def.scope'))
+result = load.sample(now=10)
+print(result['valid'], sorted(result['groups']), result['cpu_percent'], result['io_stall'], result['cpu_stall'])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'[\'system.slice/docker-abc.scope\', \'system.slice/ollama.service\']\nFalse\nTrue [\'system.slice/docker-abc.scope\', \'system.slice/ollama.service\'] 35.0 10.0 0.0' ]]
+}
+
+@test "pressure triggers are registered per cgroup and pressure resource, and dropped on disarm" {
+  write_cgroup ollama.service 0 0
+  write_cgroup docker-abc.scope 0 0
+  run python3 - <<'PY'
+import os
+from nodectl.cgroups import PressureTriggers
+
+root = os.path.join(os.environ['WORK_DIR'], 'cgroup', 'system.slice')
+ollama = os.path.join(root, 'ollama.service')
+docker = os.path.join(root, 'docker-abc.scope')
+triggers = PressureTriggers(lambda path: None, threshold_us=50000, window_us=1000000)
+# cpu and io on both cgroups; the fake tree has no memory.pressure
+print(triggers.arm([ollama, docker, os.path.join(root, 'missing.service')]), triggers.armed)
+print(repr(open(os.path.join(ollama, 'cpu.pressure')).read()[:18]), repr(open(os.path.join(docker, 'io.pressure')).read()[:18]))
+print(triggers.arm([ollama]))
+triggers.disarm()
+print(triggers.armed)
+print(PressureTriggers(lambda path: None, resources=['cpu']).arm([ollama, docker]))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'4 True\n\'some 50000 1000000\' \'some 50000 1000000\'\n2\nFalse\n2' ]]
+}
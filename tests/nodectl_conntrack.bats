@@ -0,0 +1,45 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/conntrack.py (established connection counts per local port)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}"
+  export PROC_NET_TCP_FIXTURE="${TEST_DIR}/fixtures/proc_net_tcp"
+}
+
+@test "conntrack.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/conntrack.py" ]
+}
+
+@test "/proc/net/tcp parser matches exact local ports in ESTABLISHED state" {
+  run python3 - <<'PY'
+import os
+from nodectl.conntrack import proc_established_ports
+
+# 22 established, 2200 established (must not count as SSH), 8080 established + TIME_WAIT,
+# and an outgoing connection to remote port 22
+print(sorted(proc_established_ports([os.environ['PROC_NET_TCP_FIXTURE'], '/nonexistent/tcp6'])))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "[22, 2200, 8080, 54325]" ]]
+}
+
+@test "tracker counts a live loopback connection" {
+  run python3 - <<'PY'
+import socket
+from nodectl.conntrack import ConnectionTracker
+
+server = socket.socket()
+server.bind(('127.0.0.1', 0))
+server.listen()
+port = server.getsockname()[1]
+client = socket.create_connection(('127.0.0.1', port))
+accepted, _ = server.accept()
+
+print(ConnectionTracker([port]).established_counts()[port],
+      ConnectionTracker([port], use_netlink=False).established_counts()[port])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "1 1" ]]
+}
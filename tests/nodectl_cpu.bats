@@ -0,0 +1,50 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/cpu.py (delta-based /proc/stat sampler)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}"
+  STAT_FILE="${BATS_TEST_TMPDIR}/stat"
+  export STAT_FILE
+
+  cat >"${STAT_FILE}" <<'STAT'
+cpu  100 0 100 800 0 0 0 0 0 0
+cpu0 50 0 50 400 0 0 0 0 0 0
+cpu1 50 0 50 400 0 0 0 0 0 0
+intr 1 2 3
+STAT
+}
+
+@test "cpu.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/cpu.py" ]
+}
+
+@test "sample reports aggregate idle from deltas" {
+  run python3 - <<'PY'
+import os
+from nodectl.cpu import CpuSampler
+
+sampler = CpuSampler(os.environ['STAT_FILE'])
+with open(os.environ['STAT_FILE'], 'w') as f:
+    f.write("cpu  150 0 150 1700 0 0 0 0 0 0\n")
+    f.write("cpu0 100 0 100 400 0 0 0 0 0 0\n")
+    f.write("cpu1 50 0 50 1300 0 0 0 0 0 0\n")
+sample = sampler.sample()
+print(f"{sample['idle']:.1f} {sample['min_core_idle']:.1f} {len(sample['per_core'])}")
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "90.0 0.0 2" ]]
+}
+
+@test "sample without elapsed jiffies is marked invalid" {
+  run python3 - <<'PY'
+import os
+from nodectl.cpu import CpuSampler
+
+sample = CpuSampler(os.environ['STAT_FILE']).sample()
+print(sample['valid'], sample['idle'])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "False 0.0" ]]
+}
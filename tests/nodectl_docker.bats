@@ -0,0 +1,91 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/docker.py (Docker Engine API client over the Unix socket)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}:${TEST_DIR}/fixtures"
+  export FAKE_DOCKER_SOCKET="$(mktemp -d)/docker.sock"
+}
+
+teardown() {
+  rm -rf "$(dirname "${FAKE_DOCKER_SOCKET}")"
+}
+
+@test "docker.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/docker.py" ]
+}
+
+@test "container list is fetched once, cached, and served over one pooled connection" {
+  run python3 - <<'PY'
+import os
+from fake_docker_api import FakeDockerServer
+from nodectl.docker import DockerClient
+
+server = FakeDockerServer(os.environ['FAKE_DOCKER_SOCKET'])
+client = DockerClient(os.environ['FAKE_DOCKER_SOCKET'], cache_ttl=60)
+
+print(client.is_running('localai'), client.is_running('ollama'), client.is_running('webui'))
+client.invalidate()
+client.containers()
+print(len(server.requests), len(server.connections))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'True False True\n2 1' ]]
+}
+
+@test "multiplexed logs are demultiplexed" {
+  run python3 - <<'PY'
+import os
+from fake_docker_api import FakeDockerServer
+from nodectl.docker import DockerClient
+
+FakeDockerServer(os.environ['FAKE_DOCKER_SOCKET'])
+client = DockerClient(os.environ['FAKE_DOCKER_SOCKET'])
+print(client.logs('localai', tail=3), end='')
+print(list(client.stream_logs('localai', tail=3, follow=False)))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'line one\nerror two\nline three\n[\'line one\', \'error two\', \'line three\']' ]]
+}
+
+@test "container events invalidate the cached list" {
+  run python3 - <<'PY'
+import os
+import threading
+from fake_docker_api import FakeDockerServer
+from nodectl.docker import DockerClient
+
+server = FakeDockerServer(os.environ['FAKE_DOCKER_SOCKET'])
+client = DockerClient(os.environ['FAKE_DOCKER_SOCKET'])
+seen = threading.Event()
+print(client.watch_events(lambda event: seen.set()))
+server.events_ready.wait(5)
+
+print(client.is_running('localai'))
+server.containers = [c for c in server.containers if c['Id'] != 'aaa']
+print(client.is_running('localai'))  # still cached
+
+server.emit_event.set()
+seen.wait(5)
+print(client.is_running('localai'))
+server.emit_event.set()
+client.close()
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'True\nTrue\nTrue\nFalse' ]]
+}
+
+@test "missing socket raises DockerError" {
+  run python3 - <<'PY'
+from nodectl.docker import DockerClient, DockerError
+
+client = DockerClient('/nonexistent/docker.sock')
+try:
+    client.containers()
+except DockerError:
+    print('error', client.available, client.watch_events())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "error False False" ]]
+}
@@ -0,0 +1,139 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/energy.py (RAPL/NVML power metering and the energy ledger) against a fake sysfs tree
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}:${TEST_DIR}/fixtures"
+  WORK_DIR="$(mktemp -d)"
+  export WORK_DIR
+}
+
+teardown() {
+  rm -rf "${WORK_DIR}"
+}
+
+@test "energy.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/energy.py" ]
+}
+
+@test "only top-level readable zones are used, psys alone when present" {
+  run python3 - <<'PY'
+import os
+from fake_sysfs import make_zone
+from nodectl.energy import find_rapl_zones
+
+root = os.path.join(os.environ['WORK_DIR'], 'powercap')
+make_zone(root, 'intel-rapl:0', 'package-0', 1)
+make_zone(root, 'intel-rapl:0:0', 'core', 1)
+make_zone(root, 'intel-rapl:1', 'package-1', 1)
+os.makedirs(os.path.join(root, 'intel-rapl:2'))
+print([zone.name for zone in find_rapl_zones(root)])
+make_zone(root, 'intel-rapl:3', 'psys', 1)
+print([zone.name for zone in find_rapl_zones(root)])
+print(find_rapl_zones(os.path.join(os.environ['WORK_DIR'], 'missing')))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'[\'package-0\', \'package-1\']\n[\'psys\']\n[]' ]]
+}
+
+@test "watts come from counter deltas, across a RAPL wraparound" {
+  run python3 - <<'PY'
+import os
+from fake_sysfs import FakeGpu, make_zone, set_energy
+from nodectl.energy import PowerMeter
+
+root = os.path.join(os.environ['WORK_DIR'], 'powercap')
+make_zone(root, 'intel-rapl:0', 'package-0', 999000000, max_range=1000000000)
+make_zone(root, 'intel-rapl:1', 'package-1', 5000000, max_range=1000000000)
+gpu = FakeGpu(energy=[1000000], power=[80.0])
+meter = PowerMeter(gpu, root, base_watts=40)
+print(meter.sample(now=0)['valid'])
+# package-0 wraps: 1J before the wrap + 59J after; package-1 uses 60J; the GPU 3000J, all over 10s
+set_energy(root, 'intel-rapl:0', 59000000)
+set_energy(root, 'intel-rapl:1', 65000000)
+gpu.energy_mj = [4000000]
+reading = meter.sample(now=10)
+print(reading['valid'], reading['cpu_watts'], reading['gpu_watts'], reading['total_watts'])
+# No GPU energy counter: the latest power reading is integrated instead
+gpu.energy_mj = None
+reading = meter.sample(now=20)
+print(reading['cpu_watts'], reading['gpu_watts'])
+print(meter.sample(now=2000)['valid'])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'False\nTrue 12.0 300.0 352.0\n0.0 80.0\nFalse' ]]
+}
+
+@test "a reset after resume starts a new baseline instead of booking a counter restart as a wrap" {
+  run python3 - <<'PY'
+import os
+from fake_sysfs import FakeGpu, make_zone, set_energy
+from nodectl.energy import PowerMeter
+
+root = os.path.join(os.environ['WORK_DIR'], 'powercap')
+make_zone(root, 'intel-rapl:0', 'package-0', 500000000, max_range=1000000000)
+gpu = FakeGpu(energy=[9000000], power=[80.0])
+meter = PowerMeter(gpu, root, base_watts=40)
+meter.sample(now=0)
+# Suspended: the RAPL counter restarted from zero and the GPU energy counter with the driver
+set_energy(root, 'intel-rapl:0', 1000000)
+gpu.energy_mj = [10000]
+meter.reset()
+reading = meter.sample(now=30)
+print(reading['valid'], reading['elapsed'], reading['cpu_joules'], reading['gpu_joules'])
+set_energy(root, 'intel-rapl:0', 101000000)
+gpu.energy_mj = [1010000]
+reading = meter.sample(now=40)
+print(reading['valid'], reading['cpu_watts'], reading['gpu_watts'])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'False 0.0 None None\nTrue 10.0 100.0' ]]
+}
+
+@test "a counter going backwards without a known wrap point drops the sample instead of booking negative energy" {
+  run python3 - <<'PY'
+import os
+from fake_sysfs import make_zone, set_energy
+from nodectl.energy import PowerMeter
+
+root = os.path.join(os.environ['WORK_DIR'], 'powercap')
+path = make_zone(root, 'intel-rapl:0', 'package-0', 900000000)
+os.remove(os.path.join(path, 'max_energy_range_uj'))
+meter = PowerMeter(None, root, base_watts=40)
+print(meter.zones[0].max_range, meter.zones[0].delta(5, 10))
+meter.sample(now=0)
+set_energy(root, 'intel-rapl:0', 2000000)
+reading = meter.sample(now=10)
+print(reading['valid'], reading['cpu_joules'], reading['cpu_watts'])
+# The next sample measures from the new counter value
+set_energy(root, 'intel-rapl:0', 202000000)
+reading = meter.sample(now=20)
+print(reading['valid'], reading['cpu_watts'])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'0 None\nFalse None None\nTrue 20.0' ]]
+}
+
+@test "the ledger books energy per day and estimates savings from suspended time" {
+  run python3 - <<'PY'
+import os
+import time
+from nodectl.energy import EnergyLedger
+
+path = os.path.join(os.environ['WORK_DIR'], 'state', 'energy.json')
+ledger = EnergyLedger(path)
+now = time.mktime((2024, 5, 6, 12, 0, 0, 0, 0, -1))
+reading = {'valid': True, 'elapsed': 3600.0, 'cpu_joules': 3600 * 20.0, 'gpu_joules': 3600 * 10.0, 'total_watts': 80.0}
+ledger.add(now, reading, idle=True)
+ledger.add(now, dict(reading, total_watts=200.0), idle=False)
+ledger.add(now, dict(reading, valid=False), idle=True)
+ledger.add_suspended(now, 2 * 3600)
+ledger.save()
+summary = EnergyLedger(path).summary(now)
+print(summary['day'], summary['wh'], summary['cpu_wh'], summary['idle_watts'], summary['saved_wh'])
+print(EnergyLedger(path).summary(now + 86400)['wh'])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'2024-05-06 280.0 40.0 80.0 160.0\n0.0' ]]
+}
@@ -0,0 +1,201 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/wol.py and nodectl/fleet.py (magic packets, request placement, wake-on-demand proxying)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}:${TEST_DIR}/fixtures"
+  WORK_DIR="$(mktemp -d)"
+  export WORK_DIR
+}
+
+teardown() {
+  rm -rf "${WORK_DIR}"
+}
+
+@test "fleet.py and wol.py exist" {
+  [ -f "${PROJECT_ROOT}/nodectl/fleet.py" ]
+  [ -f "${PROJECT_ROOT}/nodectl/wol.py" ]
+}
+
+@test "magic packets carry the MAC sixteen times and reach the broadcast address" {
+  run python3 - <<'PY'
+import socket
+from nodectl.wol import magic_packet, send_magic_packet
+
+packet = magic_packet('aa:bb:cc:dd:ee:ff')
+print(len(packet), packet[:6].hex(), packet[6:12].hex(), packet == magic_packet('AA-BB-CC-DD-EE-FF'))
+try:
+    magic_packet('aa:bb:cc')
+except ValueError as e:
+    print(e)
+listener = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+listener.bind(('127.0.0.1', 0))
+send_magic_packet('aabbccddeeff', '127.0.0.1', listener.getsockname()[1])
+print(listener.recv(1024) == packet)
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'102 ffffffffffff aabbccddeeff True\nInvalid MAC address: aa:bb:cc\nTrue' ]]
+}
+
+@test "requests go to awake nodes with the model, and wake a node only when capacity runs out" {
+  run python3 - <<'PY'
+from nodectl.fleet import ASLEEP, AWAKE, DRAINING, WAKING, FleetRegistry, Node
+
+def node(name, state, models=(), capacity=2):
+    n = Node(name, '00:00:00:00:00:01', '127.0.0.1', capacity=capacity)
+    n.state, n.models = state, list(models)
+    return n
+
+a, b, c, d = node('a', AWAKE, ['llama3']), node('b', AWAKE, ['qwen']), node('c', ASLEEP, ['mistral']), \
+    node('d', DRAINING, ['llama3'])
+registry = FleetRegistry([a, b, c, d])
+# Resident model first, otherwise the least busy awake node
+print([registry.acquire(model).name for model in ('llama3', 'llama3', 'qwen', 'mistral')])
+# a and b are full: a sleeping node is woken, preferably one that had the model loaded
+print(registry.choose('llama3').name, [n.in_flight for n in registry.nodes])
+e = node('e', ASLEEP, ['llama3'])
+registry.nodes.append(e)
+print(registry.choose('llama3').name, registry.choose('qwen').name)
+# A node already waking takes further overflow before another is woken
+c.state = WAKING
+print(registry.choose('llama3').name)
+c.in_flight = e.in_flight = 2
+print(registry.choose('llama3').name)
+# Draining nodes are never used; an empty fleet has no placement
+print(FleetRegistry([d]).choose('llama3'))
+registry.release(a)
+print(registry.choose('qwen').name, a.in_flight)
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'[\'a\', \'a\', \'b\', \'b\']\nc [2, 2, 0, 0]\ne c\nc\na\nNone\na 1' ]]
+}
+
+@test "proxy routes to the awake node and holds overflow while a suspended node boots" {
+  run python3 - <<'PY'
+import asyncio
+import http.client
+import json
+import logging
+import time
+from fake_fleet_node import FakeFleetNode
+from nodectl.fleet import FleetProxy, FleetRegistry, Node
+
+logging.disable(logging.CRITICAL)
+awake = FakeFleetNode('gpu1', '02:00:00:00:00:01', models=['llama3'])
+sleeping = FakeFleetNode('gpu2', '02:00:00:00:00:02', awake=False, boot_seconds=0.5)
+registry = FleetRegistry([Node.from_config(awake.config(capacity=1)), Node.from_config(sleeping.config())],
+                         wake_poll_seconds=0.1)
+
+def post(port, model):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('POST', '/api/generate', body=json.dumps({'model': model}))
+    response = conn.getresponse()
+    return response.status, json.loads(response.read())['model']
+
+def get(port, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('GET', path)
+    response = conn.getresponse()
+    return response.status, response.read()
+
+async def main():
+    loop = asyncio.get_running_loop()
+    servers = await FleetProxy(registry, wake_timeout=5).start('127.0.0.1', {'ollama': 0})
+    port = servers[0].sockets[0].getsockname()[1]
+    await registry.poll_all()
+    print([node.state for node in registry.nodes], registry.nodes[0].models)
+
+    print(await loop.run_in_executor(None, post, port, 'llama3'), awake.ollama.loaded, len(sleeping.packets))
+    # The client has its response before the proxy releases the slot
+    while registry.nodes[0].in_flight:
+        await asyncio.sleep(0.01)
+    # gpu1 is at capacity while a long request holds its only slot: the next one wakes gpu2 and waits
+    held = registry.acquire('llama3')
+    started = time.monotonic()
+    result = await loop.run_in_executor(None, post, port, 'qwen')
+    waited = time.monotonic() - started
+    registry.release(held)
+    print(result, sleeping.ollama.loaded, len(sleeping.packets), 0.5 <= waited < 5)
+    status, body = await loop.run_in_executor(None, get, port, '/fleet/status')
+    print(status, [(node['name'], node['state'], node['in_flight'], node['wakes']) for node in json.loads(body)['nodes']])
+
+asyncio.run(main())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'[\'awake\', \'asleep\'] [\'llama3\']\n(200, \'llama3\') [\'llama3\'] 0\n(200, \'qwen\') [\'qwen\'] 1 True\n200 [(\'gpu1\', \'awake\', 0, 0), (\'gpu2\', \'awake\', 0, 1)]' ]]
+}
+
+@test "a node that never answers fails the held request with 504" {
+  run python3 - <<'PY'
+import asyncio
+import http.client
+import logging
+from fake_fleet_node import FakeFleetNode
+from nodectl.fleet import FleetProxy, FleetRegistry, Node
+
+logging.disable(logging.CRITICAL)
+dead = FakeFleetNode('gpu3', '02:00:00:00:00:03', awake=False, boot_seconds=60)
+registry = FleetRegistry([Node.from_config(dead.config())], wake_poll_seconds=0.1)
+
+def get(port):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('GET', '/api/tags')
+    response = conn.getresponse()
+    return response.status, response.read().decode()
+
+async def main():
+    servers = await FleetProxy(registry, wake_timeout=0.5).start('127.0.0.1', {'ollama': 0})
+    port = servers[0].sockets[0].getsockname()[1]
+    print(await asyncio.get_running_loop().run_in_executor(None, get, port))
+    print(registry.nodes[0].state, registry.nodes[0].in_flight, len(dead.packets))
+
+asyncio.run(main())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'(504, \'gpu3 did not wake up\')\nasleep 0 1' ]]
+}
+
+@test "a node that suspended since the last poll is re-checked and the request placed again" {
+  run python3 - <<'PY'
+import asyncio
+import http.client
+import json
+import logging
+from fake_fleet_node import FakeFleetNode
+from nodectl.fleet import AWAKE, FleetProxy, FleetRegistry, Node
+
+logging.disable(logging.CRITICAL)
+gone = FakeFleetNode('gpu1', '02:00:00:00:00:01', models=['llama3'])
+spare = FakeFleetNode('gpu2', '02:00:00:00:00:02')
+asleep = FakeFleetNode('gpu3', '02:00:00:00:00:03', awake=False, boot_seconds=0.3)
+
+def post(port, model):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('POST', '/api/generate', body=json.dumps({'model': model}))
+    response = conn.getresponse()
+    return response.status, json.loads(response.read())['model']
+
+async def main():
+    loop = asyncio.get_running_loop()
+    # gpu1 has the model but suspends right after the poll: the request ends up on gpu2
+    registry = FleetRegistry([Node.from_config(gone.config()), Node.from_config(spare.config())])
+    proxy = FleetProxy(registry, wake_timeout=5, connect_timeout=0.3)
+    port = (await proxy.start('127.0.0.1', {'ollama': 0}))[0].sockets[0].getsockname()[1]
+    await registry.poll_all()
+    gone.suspend()
+    print(await loop.run_in_executor(None, post, port, 'llama3'), spare.ollama.loaded,
+          [node.state for node in registry.nodes])
+
+    # The only node is believed awake but is suspended: it is woken instead of answering 502
+    registry = FleetRegistry([Node.from_config(asleep.config())], wake_poll_seconds=0.1)
+    registry.nodes[0].state = AWAKE
+    proxy = FleetProxy(registry, wake_timeout=5, connect_timeout=0.3)
+    port = (await proxy.start('127.0.0.1', {'ollama': 0}))[0].sockets[0].getsockname()[1]
+    print(await loop.run_in_executor(None, post, port, 'qwen'), len(asleep.packets), registry.nodes[0].wakes)
+
+asyncio.run(main())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'(200, \'llama3\') [\'llama3\'] [\'asleep\', \'awake\']\n(200, \'qwen\') 1 1' ]]
+}
@@ -0,0 +1,56 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/gpu.py using the replay backend (no GPU required)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}"
+  export GPU_TELEMETRY_BACKEND="replay"
+  export GPU_TELEMETRY_REPLAY="${TEST_DIR}/fixtures/gpu_samples.jsonl"
+}
+
+@test "gpu.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/gpu.py" ]
+}
+
+@test "replay backend reports every GPU" {
+  run python3 - <<'PY'
+from nodectl.gpu import GpuTelemetry
+
+telemetry = GpuTelemetry()
+gpus = telemetry.sample()
+print(len(gpus), gpus[1]['index'], gpus[1]['power'], telemetry.max_utilization(gpus))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "2 1 18.0 3" ]]
+}
+
+@test "ring buffer keeps only the configured history and loops the replay" {
+  run python3 - <<'PY'
+from nodectl.gpu import GpuTelemetry
+
+telemetry = GpuTelemetry(history=2)
+for _ in range(3):
+    telemetry.sample()
+print(len(telemetry.history), telemetry.max_utilization())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "2 3" ]]
+}
+
+@test "nvidia-smi stream lines are parsed with N/A fields" {
+  run python3 - <<'PY'
+from nodectl.gpu import SmiStreamBackend
+
+sample = SmiStreamBackend.parse_line("0, NVIDIA A2, 12, 3, [N/A], [N/A], 44, 1200, 15360")
+print(sample['utilization'], sample['power'], sample['memory_total'])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "12.0 0.0 15360.0" ]]
+}
+
+@test "none backend reports no GPU" {
+  GPU_TELEMETRY_BACKEND="none" run python3 -c "from nodectl.gpu import GpuTelemetry; t = GpuTelemetry(); print(t.has_gpu, t.sample())"
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "False []" ]]
+}
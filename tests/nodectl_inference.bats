@@ -0,0 +1,83 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/inference.py (Ollama/LocalAI activity probe) against local stub servers
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}:${TEST_DIR}/fixtures"
+}
+
+@test "inference.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/inference.py" ]
+}
+
+@test "Ollama expiry refresh marks a request and keeps the box awake for the grace period" {
+  run python3 - <<'PY'
+from fake_model_servers import FakeModelServer
+from nodectl.inference import InferenceActivity
+
+server = FakeModelServer()
+server.models = [{'name': 'llama3:8b', 'size_vram': 5 << 30, 'expires_at': '2024-01-01T10:05:00Z'}]
+probe = InferenceActivity(ollama_url=server.url, localai_url=None)
+
+first = probe.sample(now=1000)
+print(first['models_resident'], first['last_request'], probe.is_active(first, 600, now=1000))
+server.models[0]['expires_at'] = '2024-01-01T10:07:00Z'
+second = probe.sample(now=1100)
+print(second['last_request'], probe.is_active(second, 600, now=1100), probe.is_active(second, 600, now=1800))
+print(len(server.connections))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'[\'llama3:8b\'] None False\n1100 True False\n1' ]]
+}
+
+@test "expiry moved by our own warm-up loads is not counted as a request" {
+  run python3 - <<'PY'
+from fake_model_servers import FakeModelServer
+from nodectl.inference import InferenceActivity
+
+server = FakeModelServer()
+server.models = [{'name': 'llama3:8b', 'size_vram': 5 << 30, 'expires_at': '2024-01-01T10:05:00Z'}]
+probe = InferenceActivity(ollama_url=server.url, localai_url=None)
+
+probe.sample(now=1000, exclude=['llama3:8b'])
+server.models[0]['expires_at'] = '2024-01-01T10:07:00Z'
+warmed = probe.sample(now=1100, exclude=['llama3:8b'])
+print(warmed['last_request'], probe.requested_models, probe.is_active(warmed, 600, now=1100))
+# Once the model is no longer excluded, a real request is noticed against the refreshed expiry
+server.models[0]['expires_at'] = '2024-01-01T10:09:00Z'
+used = probe.sample(now=1200)
+print(used['last_request'], probe.requested_models, probe.is_active(used, 600, now=1200))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'None [] False
+1200 [\'llama3:8b\'] True' ]]
+}
+
+@test "LocalAI request counter and in-flight gauge are read from /metrics" {
+  run python3 - <<'PY'
+from fake_model_servers import FakeModelServer
+from nodectl.inference import InferenceActivity
+
+server = FakeModelServer()
+probe = InferenceActivity(ollama_url=None, localai_url=server.url)
+print(probe.sample(now=10)['last_request'])
+server.calls = 3
+server.in_flight = 1
+activity = probe.sample(now=20)
+print(activity['last_request'], activity['requests_in_flight'], probe.is_active(activity, 60, now=500))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'None\n20 1 True' ]]
+}
+
+@test "unreachable servers report nothing instead of raising" {
+  run python3 - <<'PY'
+from nodectl.inference import InferenceActivity
+
+activity = InferenceActivity('http://127.0.0.1:9', 'http://127.0.0.1:9', timeout=0.5).sample()
+print(activity['ollama_up'], activity['localai_up'], activity['models_resident'], activity['requests_in_flight'])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "False False [] 0" ]]
+}
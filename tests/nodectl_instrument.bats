@@ -0,0 +1,145 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/instrument.py (timing spans, histograms, fork counts and on-demand profiling)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}:${TEST_DIR}/fixtures"
+  WORK_DIR="$(mktemp -d)"
+  export WORK_DIR
+}
+
+teardown() {
+  rm -rf "${WORK_DIR}"
+}
+
+@test "instrument.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/instrument.py" ]
+}
+
+@test "histogram percentiles are log2 bucket bounds capped at the max" {
+  run python3 - <<'PY'
+from nodectl.instrument import Histogram
+
+histogram = Histogram()
+print(histogram.percentile(50))
+# 90 fast samples (~100us) and 10 slow ones (~40ms)
+for _ in range(90):
+    histogram.add(0.0001)
+for _ in range(10):
+    histogram.add(0.04)
+print(histogram.count, round(histogram.total, 4), histogram.max)
+print(histogram.percentile(50) * 1e6, histogram.percentile(95), histogram.percentile(100))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'0.0\n100 0.409 0.04\n128.0 0.04 0.04' ]]
+}
+
+@test "spans nest and child processes are counted against the innermost span" {
+  run python3 - <<'PY'
+import subprocess
+from nodectl.instrument import Instrumentation
+
+instrument = Instrumentation()
+instrument.count_forks()
+instrument.count_forks()  # idempotent: one hook only
+for _ in range(3):
+    with instrument.span('cycle'):
+        with instrument.span('probe.ss'):
+            subprocess.run(['true'])
+        with instrument.span('probe.cpu'):
+            pass
+subprocess.run(['true'])
+snapshot = instrument.snapshot()
+for name in ('cycle', 'probe.cpu', 'probe.ss', '(outside spans)'):
+    print(name, snapshot[name]['count'], snapshot[name]['forks'])
+print(snapshot['cycle']['max_ms'] >= snapshot['probe.ss']['max_ms'] > 0)
+print(instrument.report().splitlines()[1].split())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'cycle 3 0\nprobe.cpu 3 0\nprobe.ss 3 3\n(outside spans) 0 1\nTrue\n[\'span\', \'count\', \'p50\', \'ms\', \'p95\', \'ms\', \'max\', \'ms\', \'forks\']' ]]
+}
+
+@test "profile covers the requested number of cycles and timings dump as JSON" {
+  run python3 - <<'PY'
+import json
+import os
+import pstats
+from nodectl.instrument import Instrumentation
+
+def busy():
+    return sum(range(10000))
+
+instrument = Instrumentation()
+profile_path = os.path.join(os.environ['WORK_DIR'], 'run', 'monitor.prof')
+print(instrument.cycle_finished())
+instrument.profile(2, profile_path)
+print(instrument.profiling)
+results = []
+for _ in range(3):
+    instrument.cycle_started()
+    with instrument.span('cycle'):
+        busy()
+    results.append(instrument.cycle_finished())
+print(results == [None, profile_path, None], instrument.profiling)
+calls = [stat[1] for func, stat in pstats.Stats(profile_path).stats.items() if func[2] == 'busy']
+print(calls)
+
+timings_path = os.path.join(os.environ['WORK_DIR'], 'run', 'timings.json')
+instrument.dump(timings_path)
+data = json.load(open(timings_path))
+print(sorted(data), data['spans']['cycle']['count'])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'None\nTrue\nTrue False\n[2]\n[\'since\', \'spans\'] 3' ]]
+}
+
+@test "a signal handler can read timings mid-span and request a profile mid-cycle" {
+  run python3 - <<'PY'
+import faulthandler
+import os
+import signal
+from nodectl.instrument import Instrumentation
+
+# A deadlock fails the test instead of hanging it
+faulthandler.dump_traceback_later(10, exit=True)
+instrument = Instrumentation()
+first = os.path.join(os.environ['WORK_DIR'], 'first.prof')
+second = os.path.join(os.environ['WORK_DIR'], 'second.prof')
+seen = []
+
+def on_usr1(signum, frame):
+    seen.append(sorted(instrument.snapshot()))
+    instrument.profile(1, second)
+
+signal.signal(signal.SIGUSR1, on_usr1)
+instrument.profile(1, first)
+instrument.cycle_started()
+# The handler runs while span() holds the lock to record the 'cycle' histogram
+with instrument._lock:
+    os.kill(os.getpid(), signal.SIGUSR1)
+print(seen, instrument.profiling)
+# The running profile still ends after its one cycle; the new request starts with the next one
+print(instrument.cycle_finished() == first, instrument.profiling)
+instrument.cycle_started()
+print(instrument.cycle_finished() == second, instrument.profiling)
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'[[]] True
+True True
+True False' ]]
+}
+
+@test "probes read through the policy are timed one span each" {
+  run python3 - <<'PY'
+from nodectl.instrument import Instrumentation
+from nodectl.policy import read_probes
+
+instrument = Instrumentation()
+readings = read_probes({'cpu': lambda: 1, 'gpu': lambda: 2}, instrument)
+print(readings, sorted(instrument.snapshot()))
+print(read_probes({'cpu': lambda: 1}))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'{\'cpu\': 1, \'gpu\': 2} [\'probe.cpu\', \'probe.gpu\']\n{\'cpu\': 1}' ]]
+}
@@ -0,0 +1,208 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/leases.py (named stay-awake leases) and the stay-awake-server.py endpoints that hold them
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}"
+}
+
+@test "leases.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/leases.py" ]
+}
+
+@test "short lease does not cancel a longer one" {
+  run python3 - <<'PY'
+from nodectl.leases import LeaseTable
+
+table = LeaseTable()
+table.acquire('hold', 14400, now=1000)
+table.acquire('job42', 600, now=1000)
+print(table.deadline())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "15400" ]]
+}
+
+@test "re-acquiring extends but never shortens a lease" {
+  run python3 - <<'PY'
+from nodectl.leases import LeaseTable
+
+table = LeaseTable()
+table.acquire('job', 600, now=1000)
+table.acquire('job', 60, now=1100)
+first = table.deadline()
+table.acquire('job', 600, now=1100)
+print(first, table.deadline())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "1600 1700" ]]
+}
+
+@test "release and expiry drop leases from the effective deadline" {
+  run python3 - <<'PY'
+from nodectl.leases import LeaseTable
+
+table = LeaseTable()
+table.acquire('a', 100, now=0)
+table.acquire('b', 200, now=0)
+table.acquire('c', 300, now=0)
+table.release('c')
+print(table.expire(now=150), table.deadline(), len(table))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "['a'] 200 1" ]]
+}
+
+@test "store round-trips and reads legacy single-deadline files" {
+  run python3 - <<'PY'
+from nodectl.leases import format_store, parse_store
+
+text = format_store({'job42': 1600, 'hold': 15400})
+print(text.splitlines()[0], parse_store(text)[1] == {'job42': 1600, 'hold': 15400}, parse_store("1234\n"))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "15400 True (1234, {'default': 1234})" ]]
+}
+
+@test "the stay-awake server rejects malformed lease ids on /stay and /release" {
+  run python3 - <<'PY'
+import http.client
+import importlib.util
+import logging
+import os
+import tempfile
+import threading
+
+spec = importlib.util.spec_from_file_location('stay_awake_server', os.path.join(os.environ['PYTHONPATH'], 'stay-awake-server.py'))
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+logging.disable(logging.CRITICAL)
+work_dir = tempfile.TemporaryDirectory()
+server = module.StayAwakeServer(('127.0.0.1', 0), module.StayAwakeState(os.path.join(work_dir.name, 'stay_awake_until')))
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+def get(path):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=10)
+    conn.request('GET', path)
+    response = conn.getresponse()
+    return response.status, response.read().decode()
+
+print(get('/stay?s=60&id=job%0Ainjected'), get('/release?id=job%0Ainjected'), get('/release?id=' + 'x' * 65))
+print(get('/stay?s=60&id=job42')[0], get('/release?id=job42'), get('/release?id=job42')[0])
+server.shutdown()
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'(400, \'Invalid lease id\') (400, \'Invalid lease id\') (400, \'Invalid lease id\')\n200 (200, \'Lease released: job42\') 404' ]]
+}
+
+@test "the stay-awake server keeps one connection usable across 200, 404 and 400 replies" {
+  run python3 - <<'PY'
+import http.client
+import importlib.util
+import logging
+import os
+import tempfile
+import threading
+
+spec = importlib.util.spec_from_file_location('stay_awake_server', os.path.join(os.environ['PYTHONPATH'], 'stay-awake-server.py'))
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+logging.disable(logging.CRITICAL)
+work_dir = tempfile.TemporaryDirectory()
+server = module.StayAwakeServer(('127.0.0.1', 0), module.StayAwakeState(os.path.join(work_dir.name, 'stay_awake_until')))
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=10)
+replies = []
+for path in ('/stay?s=60', '/nowhere', '/stay?s=abc', '/stay', '/release?id=missing', '/status'):
+    conn.request('GET', path)
+    response = conn.getresponse()
+    body = response.read().decode()
+    replies.append((response.status, int(response.getheader('Content-Length')) == len(body.encode())))
+# Every request went over the first socket
+print(replies, conn.sock is not None)
+server.shutdown()
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "[(200, True), (404, True), (400, True), (400, True), (404, True), (200, True)] True" ]]
+}
+
+@test "a burst of /stay calls is persisted to the lease store the monitor reads" {
+  run python3 - <<'PY'
+import http.client
+import importlib.util
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from nodectl.leases import read_store
+
+spec = importlib.util.spec_from_file_location('stay_awake_server', os.path.join(os.environ['PYTHONPATH'], 'stay-awake-server.py'))
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+logging.disable(logging.CRITICAL)
+work_dir = tempfile.TemporaryDirectory()
+path = os.path.join(work_dir.name, 'stay_awake_until')
+server = module.StayAwakeServer(('127.0.0.1', 0), module.StayAwakeState(path))
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+def stay(index):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=10)
+    conn.request('GET', f'/stay?s={600 + index}&id=job{index}')
+    return conn.getresponse().status
+
+with ThreadPoolExecutor(8) as pool:
+    statuses = set(pool.map(stay, range(50)))
+expected = server.state.snapshot()
+for _ in range(100):
+    if read_store(path)[1] == expected:
+        break
+    time.sleep(0.05)
+deadline, leases = read_store(path)
+print(statuses, len(leases), deadline == max(expected.values()), leases == expected)
+server.shutdown()
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "{200} 50 True True" ]]
+}
+
+@test "the stay-awake server refuses new leases past MAX_LEASES and fails health while draining" {
+  run python3 - <<'PY'
+import http.client
+import importlib.util
+import logging
+import os
+import tempfile
+import threading
+
+spec = importlib.util.spec_from_file_location('stay_awake_server', os.path.join(os.environ['PYTHONPATH'], 'stay-awake-server.py'))
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+logging.disable(logging.CRITICAL)
+work_dir = tempfile.TemporaryDirectory()
+module.MAX_LEASES = 2
+module.DRAIN_FILE = os.path.join(work_dir.name, 'draining')
+server = module.StayAwakeServer(('127.0.0.1', 0), module.StayAwakeState(os.path.join(work_dir.name, 'stay_awake_until')))
+threading.Thread(target=server.serve_forever, daemon=True).start()
+
+def get(path):
+    conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1], timeout=10)
+    conn.request('GET', path)
+    response = conn.getresponse()
+    return response.status, response.read().decode()
+
+print([get(f'/stay?s=60&id={lease}')[0] for lease in ('a', 'b', 'c')], get('/stay?s=60&id=c')[1])
+# Extending a held lease is not a new one
+print(get('/stay?s=120&id=a')[0], get('/health'))
+open(module.DRAIN_FILE, 'w').close()
+print(get('/health'))
+os.remove(module.DRAIN_FILE)
+print(get('/health'))
+server.shutdown()
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'[200, 200, 503] Too many active leases (max 2)\n200 (200, \'OK\')\n(503, \'Draining\')\n(200, \'OK\')' ]]
+}
@@ -0,0 +1,88 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/metrics.py (monitor snapshot and Prometheus /metrics rendering)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}"
+  export SNAPSHOT_DIR="$(mktemp -d)"
+}
+
+teardown() {
+  rm -rf "${SNAPSHOT_DIR}"
+}
+
+@test "metrics.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/metrics.py" ]
+}
+
+@test "snapshot renders per-GPU and per-port series" {
+  run python3 - <<'PY'
+from nodectl.metrics import render_metrics
+
+snapshot = {
+    'timestamp': 1700000000.5, 'cpu_idle': 97.25, 'cpu_min_core_idle': 80.0,
+    'gpus': [{'index': 0, 'name': 'RTX "A"', 'utilization': 12.0, 'power': 31.5, 'power_limit': 350.0,
+              'temperature': 41, 'memory_used': 1024.0, 'memory_total': 24576.0}],
+    'connections': {'8080': 2, '22': 0}, 'all_conditions_met': False, 'idle_since': None,
+    'checks_total': 7, 'suspends_total': 1,
+}
+text = render_metrics(snapshot, 1700003600, 2)
+for line in text.splitlines():
+    if line.startswith(('ai_node_gpu_memory_used', 'ai_node_gpu_power_watts', 'ai_node_connections',
+                        'ai_node_cpu_idle', 'ai_node_suspends', 'ai_node_stay_awake_deadline', 'ai_node_idle_since')):
+        print(line)
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == *'ai_node_gpu_power_watts{gpu="0",name="RTX \"A\""} 31.5'* ]]
+  [[ "${output}" == *'ai_node_gpu_memory_used_bytes{gpu="0",name="RTX \"A\""} 1073741824'* ]]
+  [[ "${output}" == *$'ai_node_connections_established{port="22"} 0\nai_node_connections_established{port="8080"} 2'* ]]
+  [[ "${output}" == *'ai_node_cpu_idle_percent 97.25'* ]]
+  [[ "${output}" == *'ai_node_suspends_total 1'* ]]
+  [[ "${output}" == *'ai_node_stay_awake_deadline_timestamp_seconds 1700003600'* ]]
+  [[ "${output}" == *'ai_node_idle_since_timestamp_seconds 0'* ]]
+}
+
+@test "cache re-renders only when the snapshot or leases change" {
+  run python3 - <<'PY'
+import os
+from nodectl import metrics
+from nodectl.metrics import MetricsCache, write_snapshot
+
+path = os.path.join(os.environ['SNAPSHOT_DIR'], 'monitor.json')
+renders = []
+original = metrics.render_metrics
+metrics.render_metrics = lambda *args: renders.append(args) or original(*args)
+
+cache = MetricsCache(path)
+print('ai_node_monitor_up 0' in cache.render(0, 0))
+write_snapshot(path, {'timestamp': 1.0, 'checks_total': 3})
+os.utime(path, ns=(1, 1))
+for _ in range(100):
+    text = cache.render(0, 0)
+cache.render(50, 1)
+print('ai_node_monitor_checks_total 3' in text, len(renders))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'True\nTrue 3' ]]
+}
+
+@test "check cycle timings render as a summary with fork counters" {
+  run python3 - <<'PY'
+from nodectl.metrics import render_metrics
+
+snapshot = {'timestamp': 1.0, 'timings': {
+    'probe.cpu': {'count': 4, 'p50_ms': 0.5, 'p95_ms': 1.0, 'max_ms': 2.0, 'total_ms': 3.0, 'forks': 0},
+    'probe.ss': {'count': 4, 'p50_ms': 8.0, 'p95_ms': 16.0, 'max_ms': 20.0, 'total_ms': 40.0, 'forks': 4},
+}}
+for line in render_metrics(snapshot, 0, 0).splitlines():
+    if 'span' in line:
+        print(line)
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == *'# TYPE ai_node_monitor_span_seconds summary'* ]]
+  [[ "${output}" == *'ai_node_monitor_span_seconds{span="probe.cpu",quantile="0.95"} 0.001'* ]]
+  [[ "${output}" == *'ai_node_monitor_span_seconds{span="probe.ss",quantile="1"} 0.02'* ]]
+  [[ "${output}" == *'ai_node_monitor_span_seconds_count{span="probe.ss"} 4'* ]]
+  [[ "${output}" == *'ai_node_monitor_span_forks_total{span="probe.ss"} 4'* ]]
+}
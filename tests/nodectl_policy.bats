@@ -0,0 +1,93 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/policy.py (pure suspend decision and the offline trace simulator)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}:${TEST_DIR}/fixtures"
+}
+
+@test "policy.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/policy.py" ]
+}
+
+@test "conditions come from injected probe readings" {
+  run python3 - <<'PY'
+from nodectl.policy import SuspendPolicy, read_probes, trace_readings
+
+policy = SuspendPolicy(check_ssh=True)
+probes = {name: (lambda value=value: value) for name, value in trace_readings({'cpu_idle': 97}).items()}
+conditions = policy.evaluate(read_probes(probes))
+print(conditions['all_conditions_met'], conditions['api_active'])
+# API connections are reported but never block; SSH does when check_ssh is set
+print(policy.evaluate(trace_readings({'cpu_idle': 97, 'connections': {'11434': 2}}))['all_conditions_met'])
+print(policy.evaluate(trace_readings({'cpu_idle': 97, 'ssh': True}))['all_conditions_met'])
+print(SuspendPolicy().evaluate(trace_readings({'cpu_idle': 97, 'ssh': True}))['all_conditions_met'])
+# One saturated core, GPU load, stay-awake and inference each keep the host up
+for sample in ({'cpu_idle': 97, 'cpu_min_core_idle': 2}, {'cpu_idle': 97, 'gpu_usage': 40},
+               {'cpu_idle': 97, 'stay_awake': True}, {'cpu_idle': 97, 'inference_active': True}):
+    print(policy.evaluate(trace_readings(sample))['all_conditions_met'], end=' ')
+print()
+# Per-service scope: only the useful groups' load counts
+readings = trace_readings({'cpu_idle': 20, 'gpu_usage': 90})
+readings['useful'] = {'cpu_percent': 50.0, 'max_process_cpu': 50.0, 'gpu_attributed': True, 'gpu_sm': 0.0,
+                      'top_groups': []}
+print(SuspendPolicy(cpu_count=8).evaluate(readings)['all_conditions_met'])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'True False\nTrue\nFalse\nTrue\nFalse False False False \nTrue' ]]
+}
+
+@test "idle timer transitions follow the injected clock" {
+  run python3 - <<'PY'
+from nodectl.policy import SuspendPolicy
+
+idle, busy = {'all_conditions_met': True}, {'all_conditions_met': False}
+decide = SuspendPolicy.decide
+print(decide(busy, None, 100, 300))
+print(decide(idle, None, 100, 300))
+print(decide(idle, 100, 250, 300))
+print(decide(idle, 100, 400, 300))
+print(decide(busy, 100, 160, 300))
+PY
+  [ "${status}" -eq 0 ]
+  [ "${lines[0]}" = "{'action': 'busy', 'idle_since': None, 'idle_seconds': 0.0}" ]
+  [ "${lines[1]}" = "{'action': 'idle_start', 'idle_since': 100, 'idle_seconds': 0.0}" ]
+  [ "${lines[2]}" = "{'action': 'idle', 'idle_since': 100, 'idle_seconds': 150}" ]
+  [ "${lines[3]}" = "{'action': 'suspend', 'idle_since': None, 'idle_seconds': 300}" ]
+  [ "${lines[4]}" = "{'action': 'active', 'idle_since': None, 'idle_seconds': 60}" ]
+}
+
+@test "simulator counts suspends, requests on a suspended host and energy" {
+  run python3 - <<'PY'
+from nodectl.policy import SuspendPolicy, simulate
+from nodectl.scheduler import CheckScheduler
+
+# Busy for 10 minutes, idle for 50, a request at minute 40, idle again; one sample per minute
+trace = []
+for minute in range(120):
+    busy = minute < 10
+    trace.append({'ts': minute * 60.0, 'cpu_idle': 50 if busy else 99, 'gpu_usage': 80 if busy else 0,
+                  'requests': 1 if minute in (0, 40) else 0})
+
+policy = SuspendPolicy()
+result = simulate(trace, policy, wait_seconds=300)
+print(result['suspends'], result['requests'], result['requests_while_suspended'], result['checks'])
+print(round(result['baseline_wh']), round(result['energy_wh']), round(result['saved_wh']))
+# A longer wait suspends later; the request at minute 40 then finds the host still awake
+late = simulate(trace, policy, wait_seconds=35 * 60)
+print(late['suspends'], late['requests_while_suspended'], late['saved_wh'] < result['saved_wh'])
+# Check times can come from the monitor's adaptive scheduler instead of the samples
+scheduler = CheckScheduler(300, 60, 5, 180, 50, 50)
+print(simulate(trace, policy, 270, scheduler=scheduler)['suspends'], result['decision_us']['max'] > 0)
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'2 2 1 22\n188 62 126\n1 0 True\n2 True' ]]
+}
+
+@test "monitor reads wall-clock time only through its injectable clock" {
+  run grep -n "time\.time()" "${PROJECT_ROOT}/auto-suspend-monitor.py"
+  [ "${status}" -eq 1 ]
+  run grep -c "self\.clock()" "${PROJECT_ROOT}/auto-suspend-monitor.py"
+  [ "${output}" -ge 10 ]
+}
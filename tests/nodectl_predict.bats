@@ -0,0 +1,150 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/predict.py (weekly activity model, wait window, RTC wake and trace replay)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}:${TEST_DIR}/fixtures"
+  # Slots are in local time; pin it so 1704067200 is Monday 00:00
+  export TZ=UTC
+  WORK_DIR="$(mktemp -d)"
+  export WORK_DIR
+}
+
+teardown() {
+  rm -rf "${WORK_DIR}"
+}
+
+@test "predict.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/predict.py" ]
+}
+
+@test "slots are 15 minutes of the local week starting Monday 00:00" {
+  run python3 - <<'PY'
+from nodectl.predict import SLOTS, slot_of, slot_start
+
+monday = 1704067200
+print(SLOTS, slot_of(monday), slot_of(monday + 14 * 60 + 59), slot_of(monday + 15 * 60))
+print(slot_of(monday + 9 * 3600), slot_of(monday + 6 * 86400 + 86399), slot_of(monday + 7 * 86400))
+print(slot_start(monday + 9 * 3600 + 20 * 60 + 7.5) - monday)
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'672 0 0 1\n36 671 0\n33300.0' ]]
+}
+
+@test "wait window follows the learned chance of activity and defaults without data" {
+  run python3 - <<'PY'
+from nodectl.predict import ActivityModel
+
+monday = 1704067200
+model = ActivityModel()
+# Three weeks: Mondays 09:00-10:00 always busy, 02:00-03:00 never
+for week in range(3):
+    for minute in range(60):
+        model.observe(monday + week * 7 * 86400 + 9 * 3600 + minute * 60, True, 60)
+        model.observe(monday + week * 7 * 86400 + 2 * 3600 + minute * 60, False, 60)
+night = monday + 3 * 7 * 86400 + 2 * 3600
+print(model.probability(night), model.wait_minutes(night, 5, 2, 30, lookahead=30))
+# 08:30: the busy slot starting at 09:00 is within the lookahead
+print(model.wait_minutes(night + 6.5 * 3600, 5, 2, 30))
+# Tuesday: no data at all
+print(model.probability(night + 86400), model.wait_minutes(night + 86400, 5, 2, 30))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'0.0 (2.0, 0.0)\n(30.0, 1.0)\nNone (5, None)' ]]
+}
+
+@test "next busy slot is found within the horizon" {
+  run python3 - <<'PY'
+from nodectl.predict import ActivityModel
+
+monday = 1704067200
+model = ActivityModel()
+for minute in range(30):
+    model.observe(monday + 9 * 3600 + minute * 60, True, 120)
+print((model.next_busy(monday + 3 * 3600 + 100, 0.5) - monday) / 3600)
+print(model.next_busy(monday + 10 * 3600, 0.5), model.next_busy(monday + 3 * 3600, 0.5, horizon_hours=2))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'9.0\nNone None' ]]
+}
+
+@test "model survives a save/load and decays old observations" {
+  run python3 - <<'PY'
+import os
+from nodectl.predict import ActivityModel
+
+path = os.path.join(os.environ['WORK_DIR'], 'state', 'activity-model.json')
+monday = 1704067200
+model = ActivityModel(path, half_life_days=7)
+model.observe(monday, True, 2000)
+model.save()
+loaded = ActivityModel(path, half_life_days=7)
+print(loaded.probability(monday), loaded.observed[0])
+# One half-life later the slot drops below the trust threshold again
+loaded.observe(monday + 7 * 86400 + 3600, False, 60)
+print(round(loaded.observed[0]), loaded.probability(monday))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'1.0 2000.0\n996 None' ]]
+}
+
+@test "RTC wake writes the sysfs wakealarm when rtcwake is missing" {
+  run python3 - <<'PY'
+import logging
+import os
+from nodectl.predict import schedule_rtc_wake
+
+logging.disable(logging.CRITICAL)
+os.environ['PATH'] = '/nonexistent'
+path = os.path.join(os.environ['WORK_DIR'], 'wakealarm')
+print(schedule_rtc_wake(1704099600.7, path))
+print(open(path).read())
+print(schedule_rtc_wake(1704099600, os.path.join(os.environ['WORK_DIR'], 'missing', 'wakealarm')))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'True\n1704099600\nFalse' ]]
+}
+
+@test "RTC wake prefers rtcwake" {
+  mkdir -p "${WORK_DIR}/bin"
+  cat > "${WORK_DIR}/bin/rtcwake" <<'SH'
+#!/bin/sh
+echo "$@" > "${WORK_DIR}/rtcwake.args"
+SH
+  chmod +x "${WORK_DIR}/bin/rtcwake"
+  PATH="${WORK_DIR}/bin:${PATH}" run python3 -c \
+    "from nodectl.predict import schedule_rtc_wake; print(schedule_rtc_wake(1704099600, '/nonexistent'))"
+  [ "${status}" -eq 0 ]
+  [ "${output}" = "True" ]
+  [ "$(cat "${WORK_DIR}/rtcwake.args")" = "-m no -t 1704099600" ]
+}
+
+@test "replay: predictive policy beats a long fixed wait on a regular schedule" {
+  run python3 - <<'PY'
+from nodectl.predict import ActivityModel, FixedWaitPolicy, PredictivePolicy, replay
+
+monday = 1704067200
+# Four weeks of minutes: busy every other minute weekdays 09:00-17:00, idle otherwise
+trace = []
+for minute in range(28 * 24 * 60):
+    ts = monday + minute * 60
+    day, hour = (minute // 1440) % 7, (minute // 60) % 24
+    trace.append((ts, day < 5 and 9 <= hour < 17 and minute % 2 == 0))
+
+fixed = replay(trace, FixedWaitPolicy(30), 60)
+predictive = replay(trace, PredictivePolicy(ActivityModel(), 30, 2, 30), 60)
+rtc = replay(trace, PredictivePolicy(ActivityModel(), 30, 2, 30, rtc_threshold=0.4), 60)
+print(predictive['energy_wh'] < fixed['energy_wh'], predictive['cold_wakes'] <= fixed['cold_wakes'])
+print(rtc['rtc_wakes'] > 0, rtc['cold_wakes'] < predictive['cold_wakes'])
+print(fixed['policy'], '|', rtc['policy'])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'True True\nTrue True\nfixed 30 min | predictive 2-30 min + RTC' ]]
+}
+
+@test "monitor wires the predictive wait and the RTC wake stage" {
+  run grep -c "self.wait_minutes\|('rtc', self._schedule_wake)\|PREDICTIVE_WAIT" "${PROJECT_ROOT}/auto-suspend-monitor.py"
+  [ "${status}" -eq 0 ]
+  [ "${output}" -ge 5 ]
+}
@@ -0,0 +1,100 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/procacct.py (per-service CPU/GPU attribution) against a fake /proc tree
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}"
+  WORK_DIR="$(mktemp -d)"
+  export WORK_DIR
+}
+
+teardown() {
+  rm -rf "${WORK_DIR}"
+}
+
+@test "procacct.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/procacct.py" ]
+}
+
+@test "cgroup paths map to services, containers and slices" {
+  run python3 - <<'PY'
+from nodectl.procacct import cgroup_group
+
+print(cgroup_group('0::/system.slice/ollama.service\n'))
+print(cgroup_group('0::/system.slice/docker-0123456789abcdef0123.scope\n'))
+print(cgroup_group('0::/system.slice/docker-0123456789abcdef0123.scope\n', {'0123456789abcdef0123': 'localai'}))
+print(cgroup_group('12:cpu:/docker/fedcba9876543210\n1:name=systemd:/docker/fedcba9876543210\n'))
+print(cgroup_group('0::/user.slice/user-1000.slice/session-3.scope\n'))
+print(cgroup_group('0::/\n'))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'ollama.service\ndocker:0123456789ab\ndocker:localai\ndocker:fedcba987654\nuser-1000.slice\nroot' ]]
+}
+
+@test "CPU and GPU usage are summed per group and filtered to useful work" {
+  run python3 - <<'PY'
+import os
+from nodectl.procacct import ProcessAccounting
+
+proc = os.path.join(os.environ['WORK_DIR'], 'proc')
+
+def process(pid, comm, cgroup, ticks, started=100):
+    os.makedirs(os.path.join(proc, str(pid)), exist_ok=True)
+    fields = ['S'] + ['0'] * 10 + [str(ticks), '0'] + ['0'] * 6 + [str(started), '0']
+    with open(os.path.join(proc, str(pid), 'stat'), 'w') as f:
+        f.write(f"{pid} ({comm}) " + ' '.join(fields) + "\n")
+    with open(os.path.join(proc, str(pid), 'cgroup'), 'w') as f:
+        f.write(f"0::{cgroup}\n")
+
+class FakeGpu:
+    def processes(self):
+        return [{'gpu': 0, 'pid': 10, 'memory_used': 4096.0, 'sm': 35.0}]
+
+process(10, 'ollama runner', '/system.slice/ollama.service', 0)
+process(11, 'ollama', '/system.slice/ollama.service', 0)
+process(20, 'rsync', '/system.slice/backup.service', 0)
+os.makedirs(os.path.join(proc, 'self'))
+
+accounting = ProcessAccounting(proc, gpu=FakeGpu())
+accounting.clock_ticks = 100
+print(accounting.sample(now=0)['valid'])
+process(10, 'ollama runner', '/system.slice/ollama.service', 50)
+process(11, 'ollama', '/system.slice/ollama.service', 10)
+process(20, 'rsync', '/system.slice/backup.service', 180)
+result = accounting.sample(now=2)
+print(result['valid'], result['gpu_attributed'], {name: round(group['cpu_percent']) for name, group in result['groups'].items()})
+load = ProcessAccounting.useful_load(result, ['ollama.service', 'docker:*'])
+print(round(load['cpu_percent']), round(load['max_process_cpu']), load['processes'], load['gpu_memory'], load['gpu_sm'])
+print([(group['name'], group['useful']) for group in ProcessAccounting.top_groups(result, ['ollama.service'])])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'False\nTrue True {\'ollama.service\': 30, \'backup.service\': 90}\n30 25 2 4096.0 35.0\n[(\'backup.service\', False), (\'ollama.service\', True)]' ]]
+}
+
+@test "a reused pid is not charged for its predecessor's CPU time" {
+  run python3 - <<'PY'
+import os
+from nodectl.procacct import ProcessAccounting
+
+proc = os.path.join(os.environ['WORK_DIR'], 'proc')
+def process(ticks, started):
+    os.makedirs(os.path.join(proc, '30'), exist_ok=True)
+    fields = ['S'] + ['0'] * 10 + [str(ticks), '0'] + ['0'] * 6 + [str(started), '0']
+    with open(os.path.join(proc, '30', 'stat'), 'w') as f:
+        f.write("30 (a) b) " + ' '.join(fields) + "\n")
+    with open(os.path.join(proc, '30', 'cgroup'), 'w') as f:
+        f.write("0::/system.slice/job.service\n")
+
+accounting = ProcessAccounting(proc)
+accounting.clock_ticks = 100
+process(5000, 1)
+accounting.sample(now=0)
+process(20, 2)
+print(accounting.sample(now=1)['groups']['job.service']['cpu_percent'])
+process(120, 2)
+print(accounting.sample(now=2)['groups']['job.service']['cpu_percent'])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'0.0\n100.0' ]]
+}
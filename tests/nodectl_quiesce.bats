@@ -0,0 +1,122 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/quiesce.py (staged suspend pipeline and request draining)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}:${TEST_DIR}/fixtures"
+  WORK_DIR="$(mktemp -d)"
+  export WORK_DIR
+}
+
+teardown() {
+  rm -rf "${WORK_DIR}"
+}
+
+@test "quiesce.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/quiesce.py" ]
+}
+
+@test "pipeline times every stage, stops at the first abort and always cleans up" {
+  run python3 - <<'PY'
+import logging
+from nodectl.quiesce import SuspendPipeline
+
+logging.disable(logging.CRITICAL)
+ran = []
+def stage(name, reason=None):
+    def run():
+        ran.append(name)
+        return reason
+    return (name, run)
+
+def broken():
+    raise RuntimeError('disk gone')
+
+cleaned = []
+result = SuspendPipeline([stage('a'), stage('b', 'busy'), stage('c')], cleanup=lambda: cleaned.append(1)).run()
+print(ran, result['completed'], result['aborted_by'], result['reason'], sorted(result['durations']), cleaned)
+result = SuspendPipeline([stage('a'), ('b', broken)]).run()
+print(result['completed'], result['reason'])
+print(SuspendPipeline([stage('a')]).run()['completed'])
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'[\'a\', \'b\'] False b busy [\'a\', \'b\'] [1]\nFalse b failed: disk gone\nTrue' ]]
+}
+
+@test "drain waits for connections to close and aborts on a new one" {
+  run python3 - <<'PY'
+import logging
+from nodectl.quiesce import Drainer
+
+logging.disable(logging.CRITICAL)
+counts = iter([{8080: 2}, {8080: 1}, {8080: 0}])
+print(Drainer(lambda: next(counts), poll_interval=0.01).drain())
+counts = iter([{8080: 1}, {8080: 1}, {8080: 2}])
+print(Drainer(lambda: next(counts), poll_interval=0.01).drain())
+print(Drainer(lambda: {11434: 1}, timeout=0.05, poll_interval=0.01).drain())
+print(Drainer(lambda: {}, stay_awake_active=lambda: True).drain())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'None\nnew connection on port 8080\nNone\nstay-awake lease' ]]
+}
+
+@test "drain waits for LocalAI in-flight requests and aborts on a new request" {
+  run python3 - <<'PY'
+import threading
+from fake_model_servers import FakeModelServer
+from nodectl.inference import InferenceActivity
+from nodectl.quiesce import Drainer
+
+server = FakeModelServer()
+server.in_flight = 1
+probe = InferenceActivity(ollama_url=None, localai_url=server.url)
+probe.sample()
+threading.Timer(0.1, lambda: setattr(server, 'in_flight', 0)).start()
+print(Drainer(lambda: {}, inference=probe, timeout=5, poll_interval=0.02).drain())
+server.calls += 1
+print(Drainer(lambda: {}, inference=probe, timeout=5, poll_interval=0.02).drain())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'None\nnew inference request' ]]
+}
+
+@test "drain does not wait for the monitor's own keep-alive connection to the model server" {
+  run python3 - <<'PY'
+import time
+from fake_model_servers import FakeModelServer
+from nodectl.conntrack import ConnectionTracker
+from nodectl.inference import InferenceActivity
+from nodectl.quiesce import Drainer
+
+server = FakeModelServer()
+port = server.server_address[1]
+tracker = ConnectionTracker([port])
+probe = InferenceActivity(ollama_url=server.url, localai_url=None)
+probe.sample()
+print(tracker.established_counts())
+started = time.monotonic()
+# Every drain poll samples (and so reconnects to) the server; neither the open connection nor the reconnects count
+print(Drainer(tracker.established_counts, inference=probe, timeout=5, poll_interval=0.05).drain(),
+      time.monotonic() - started < 1)
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == *$'\nNone True' ]]
+  [[ "${lines[0]}" =~ \{[0-9]+:\ 1\} ]]
+}
+
+@test "drain flag is written and cleared" {
+  run python3 - <<'PY'
+import os
+from nodectl.quiesce import clear_drain_flag, is_draining, write_drain_flag
+
+path = os.path.join(os.environ['WORK_DIR'], 'run', 'draining')
+write_drain_flag(path, 1700000000.5)
+print(is_draining(path), open(path).read())
+clear_drain_flag(path)
+clear_drain_flag(path)
+print(is_draining(path))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'True 1700000000\nFalse' ]]
+}
@@ -0,0 +1,192 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/relay.py (wake-on-request TCP proxy, splice relaying, upstream pool)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}:${TEST_DIR}/fixtures"
+}
+
+@test "relay.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/relay.py" ]
+}
+
+@test "spliced and copied relays move large payloads intact in both directions" {
+  run python3 - <<'PY'
+import asyncio
+import hashlib
+import os
+import socket
+from nodectl.relay import HAS_SPLICE, connect, relay
+
+payload = os.urandom(4 * 1024 * 1024)
+
+async def echo(loop, listener):
+    # Upstream: echo everything back, then close after the client's half-close
+    sock, _ = await loop.sock_accept(listener)
+    sock.setblocking(False)
+    while True:
+        data = await loop.sock_recv(sock, 65536)
+        if not data:
+            break
+        await loop.sock_sendall(sock, data)
+    sock.close()
+
+async def run(zero_copy):
+    loop = asyncio.get_running_loop()
+    upstream_listener = socket.create_server(('127.0.0.1', 0))
+    upstream_listener.setblocking(False)
+    front = socket.create_server(('127.0.0.1', 0))
+    front.setblocking(False)
+    echo_task = asyncio.ensure_future(echo(loop, upstream_listener))
+
+    async def proxy():
+        client, _ = await loop.sock_accept(front)
+        client.setblocking(False)
+        upstream = await connect('127.0.0.1', upstream_listener.getsockname()[1])
+        moved = await relay(client, upstream, zero_copy)
+        client.close()
+        upstream.close()
+        return moved
+
+    proxy_task = asyncio.ensure_future(proxy())
+    sock = await connect('127.0.0.1', front.getsockname()[1])
+
+    async def send():
+        await loop.sock_sendall(sock, payload)
+        sock.shutdown(socket.SHUT_WR)
+
+    async def receive():
+        chunks = []
+        while True:
+            data = await loop.sock_recv(sock, 65536)
+            if not data:
+                return b''.join(chunks)
+            chunks.append(data)
+
+    _, echoed = await asyncio.gather(send(), receive())
+    moved = await proxy_task
+    await echo_task
+    sock.close()
+    return hashlib.sha256(echoed).digest() == hashlib.sha256(payload).digest(), moved == (len(payload),) * 2
+
+print(HAS_SPLICE, asyncio.run(run(True)) if HAS_SPLICE else (True, True), asyncio.run(run(False)))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == *"(True, True) (True, True)" ]]
+}
+
+@test "the first connection wakes the node and clients are held until it has booted" {
+  run python3 - <<'PY'
+import asyncio
+import http.client
+import json
+import logging
+import time
+from fake_fleet_node import FakeFleetNode
+from nodectl.relay import WakeProxy
+
+logging.disable(logging.CRITICAL)
+node = FakeFleetNode('gpu1', '02:00:00:00:00:01', awake=False, boot_seconds=0.5)
+config = node.config()
+proxy = WakeProxy('127.0.0.1', node.mac, ports=[config['ports']['ollama']], health_port=config['stay_awake_port'],
+                  broadcast='127.0.0.1', wol_port=config['wol_port'], wake_poll_seconds=0.1, wake_timeout=5)
+
+def post(port, model):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('POST', '/api/generate', body=json.dumps({'model': model}))
+    response = conn.getresponse()
+    return response.status, json.loads(response.read())['model']
+
+async def main():
+    loop = asyncio.get_running_loop()
+    listeners = await proxy.start('127.0.0.1', {0: config['ports']['ollama']})
+    port = listeners[0].getsockname()[1]
+    print(await proxy.check(), proxy.awake)
+    started = time.monotonic()
+    results = await asyncio.gather(*(loop.run_in_executor(None, post, port, model) for model in ('a', 'b', 'c')))
+    waited = time.monotonic() - started
+    print(sorted(results), sorted(node.ollama.loaded), len(node.packets), 0.5 <= waited < 5)
+    stats = proxy.status()
+    print(stats['connections'], stats['held'], stats['wakes'], stats['failed'], proxy.awake)
+
+asyncio.run(main())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'False False\n[(200, \'a\'), (200, \'b\'), (200, \'c\')] [\'a\', \'b\', \'c\'] 1 True\n3 3 1 0 True' ]]
+}
+
+@test "awake nodes get pooled connections that a drain releases" {
+  run python3 - <<'PY'
+import asyncio
+import http.client
+import json
+import logging
+from fake_fleet_node import FakeFleetNode
+from nodectl.relay import WakeProxy
+
+logging.disable(logging.CRITICAL)
+node = FakeFleetNode('gpu1', '02:00:00:00:00:01')
+config = node.config()
+api_port = config['ports']['ollama']
+proxy = WakeProxy('127.0.0.1', node.mac, ports=[api_port], health_port=config['stay_awake_port'], pool_size=2)
+
+def post(port):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('POST', '/api/generate', body=json.dumps({'model': 'a'}))
+    return conn.getresponse().status
+
+async def main():
+    loop = asyncio.get_running_loop()
+    port = (await proxy.start('127.0.0.1', {0: api_port}))[0].getsockname()[1]
+    poller = asyncio.ensure_future(proxy.poll_forever(0.2))
+    await asyncio.sleep(0.1)
+    print(len(proxy.pool), proxy.awake)
+    print(await loop.run_in_executor(None, post, port), proxy.pool.hits, len(proxy.pool))
+    await asyncio.sleep(0.3)
+    print(len(proxy.pool), node.packets)
+    # The monitor starts draining: pooled connections are closed and not replaced
+    node.health.draining = True
+    await asyncio.sleep(0.5)
+    print(len(proxy.pool), proxy.draining, proxy.awake)
+    # Clients still go straight through to the draining node (cancelling its suspend is their call)
+    print(await loop.run_in_executor(None, post, port), proxy.status()['held'])
+    poller.cancel()
+
+asyncio.run(main())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'2 True\n200 1 1\n2 []\n0 True True\n200 0' ]]
+}
+
+@test "a node that never wakes closes the held connection" {
+  run python3 - <<'PY'
+import asyncio
+import logging
+from fake_fleet_node import FakeFleetNode
+from nodectl.relay import WakeProxy, connect
+
+logging.disable(logging.CRITICAL)
+node = FakeFleetNode('gpu1', '02:00:00:00:00:01', awake=False, boot_seconds=60)
+config = node.config()
+proxy = WakeProxy('127.0.0.1', node.mac, ports=[config['ports']['ollama']], health_port=config['stay_awake_port'],
+                  broadcast='127.0.0.1', wol_port=config['wol_port'], wake_poll_seconds=0.1, wake_timeout=0.5)
+
+async def main():
+    loop = asyncio.get_running_loop()
+    port = (await proxy.start('127.0.0.1', {0: config['ports']['ollama']}))[0].getsockname()[1]
+    sock = await connect('127.0.0.1', port)
+    await loop.sock_sendall(sock, b'GET /api/tags HTTP/1.1\r\nHost: x\r\n\r\n')
+    # The request was never read, so the close arrives as a reset
+    try:
+        print(await asyncio.wait_for(loop.sock_recv(sock, 1024), 5))
+    except ConnectionResetError:
+        print('reset')
+    stats = proxy.status()
+    print(stats['failed'], stats['wakes'], len(node.packets) >= 1)
+
+asyncio.run(main())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'reset\n1 1 True' ]]
+}
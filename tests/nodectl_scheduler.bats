@@ -0,0 +1,64 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/scheduler.py (adaptive delay between auto-suspend checks)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}"
+}
+
+@test "scheduler.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/scheduler.py" ]
+}
+
+@test "a busy system is checked at the busy interval, an undecided one at the normal interval" {
+  run python3 - <<'PY'
+from nodectl.scheduler import CheckScheduler
+
+scheduler = CheckScheduler(wait_seconds=1800, interval=60, min_interval=5, busy_interval=300,
+                           busy_gpu_usage=50, busy_cpu_idle=20)
+print(scheduler.next_delay({'gpu_usage': 80.0, 'cpu_idle': 95.0}, None, 0))
+print(scheduler.next_delay({'gpu_usage': 0.0, 'cpu_idle': 10.0}, None, 0))
+print(scheduler.next_delay({'gpu_usage': 10.0, 'cpu_idle': 60.0}, None, 0))
+print(scheduler.next_delay({}, None, 0))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'300\n300\n60\n60' ]]
+}
+
+@test "the step halves toward the idle threshold and the last check lands on it" {
+  run python3 - <<'PY'
+from nodectl.scheduler import CheckScheduler
+
+scheduler = CheckScheduler(wait_seconds=1800, interval=60, min_interval=5, busy_interval=300,
+                           busy_gpu_usage=50, busy_cpu_idle=20)
+# Idle since t=0: the threshold is at t=1800; busy conditions no longer matter once idle
+print(scheduler.next_delay({'gpu_usage': 80.0}, 0, 0))
+now, delays = 1700.0, []
+while now < 1800:
+    delay = scheduler.next_delay({}, 0, now)
+    delays.append(delay)
+    now += delay
+print(delays, now)
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'60\n[50.0, 25.0, 12.5, 6.25, 5, 1.25] 1800.0' ]]
+}
+
+@test "intervals are clamped and never drop below MIN_DELAY" {
+  run python3 - <<'PY'
+from nodectl.scheduler import MIN_DELAY, CheckScheduler
+
+# min_interval above interval and busy_interval below it are clamped to interval
+scheduler = CheckScheduler(wait_seconds=600, interval=30, min_interval=90, busy_interval=10,
+                           busy_gpu_usage=50, busy_cpu_idle=20)
+print(scheduler.min_interval, scheduler.busy_interval, scheduler.next_delay({'gpu_usage': 90.0}, None, 0))
+scheduler = CheckScheduler(wait_seconds=600, interval=30, min_interval=5, busy_interval=120,
+                           busy_gpu_usage=50, busy_cpu_idle=20)
+# At, just before and past the threshold the next check is MIN_DELAY away
+print(MIN_DELAY, scheduler.next_delay({}, 0, 599.5), scheduler.next_delay({}, 0, 600), scheduler.next_delay({}, 0, 700))
+print(scheduler.next_delay({}, 0, 597))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'30 30 30\n1.0 1.0 1.0 1.0\n3' ]]
+}
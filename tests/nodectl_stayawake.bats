@@ -0,0 +1,103 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/stayawake.py (cached stay-awake deadline, inotify and polling watchers, expiry)
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}:${TEST_DIR}/fixtures"
+  WORK_DIR="$(mktemp -d)"
+  export WORK_DIR
+}
+
+teardown() {
+  rm -rf "${WORK_DIR}"
+}
+
+@test "stayawake.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/stayawake.py" ]
+}
+
+@test "inotify picks up a lease store replaced by the server" {
+  run python3 - <<'PY'
+import os
+import queue
+import time
+from nodectl.leases import format_store
+from nodectl.stayawake import StayAwakeWatcher
+
+path = os.path.join(os.environ['WORK_DIR'], 'run', 'stay_awake_until')
+changes = queue.Queue()
+# A polling fallback would not notice anything within the test's timeouts
+watcher = StayAwakeWatcher(path, on_change=changes.put, poll_interval=60)
+print(watcher.deadline, watcher.active())
+watcher.start()
+
+def publish(leases):
+    # Written like the stay-awake server does: temporary file, then rename
+    with open(f'{path}.tmp', 'w') as f:
+        f.write(format_store(leases))
+    os.replace(f'{path}.tmp', path)
+
+deadline = int(time.time()) + 3600
+publish({'job': deadline})
+print(changes.get(timeout=2) == deadline, watcher.active(), 3590 < watcher.remaining() <= 3600)
+os.remove(path)
+print(changes.get(timeout=2), watcher.active())
+watcher.stop()
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'0 False\nTrue True True\n0 False' ]]
+}
+
+@test "polling fallback reloads when inotify is unavailable" {
+  run python3 - <<'PY'
+import logging
+import os
+import queue
+import time
+from nodectl.leases import format_store
+from nodectl.stayawake import StayAwakeWatcher
+
+logging.disable(logging.CRITICAL)
+path = os.path.join(os.environ['WORK_DIR'], 'stay_awake_until')
+changes = queue.Queue()
+watcher = StayAwakeWatcher(path, on_change=changes.put, poll_interval=0.05)
+
+def no_inotify():
+    raise OSError(38, 'Function not implemented')
+
+watcher._inotify_open = no_inotify
+watcher.start()
+deadline = int(time.time()) + 600
+with open(path, 'w') as f:
+    f.write(format_store({'a': deadline}))
+print(changes.get(timeout=2) == deadline, watcher.active())
+watcher.stop()
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "True True" ]]
+}
+
+@test "expiry clears the cached deadline and leaves the server's lease store alone" {
+  run python3 - <<'PY'
+import logging
+import os
+import queue
+import time
+from nodectl.leases import format_store
+from nodectl.stayawake import StayAwakeWatcher
+
+logging.disable(logging.CRITICAL)
+path = os.path.join(os.environ['WORK_DIR'], 'stay_awake_until')
+deadline = int(time.time()) + 2
+with open(path, 'w') as f:
+    f.write(format_store({'short': deadline}))
+changes = queue.Queue()
+watcher = StayAwakeWatcher(path, on_change=changes.put)
+print(changes.get(timeout=1) == deadline, watcher.active())
+print(changes.get(timeout=4), watcher.active(), watcher.remaining(), os.path.exists(path))
+watcher.stop()
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'True True\n0 False 0 True' ]]
+}
@@ -0,0 +1,92 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/tsdb.py (mmap ring metrics store with rollups); queries need numpy
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}"
+  export STORE_DIR="$(mktemp -d)"
+}
+
+teardown() {
+  rm -rf "${STORE_DIR}"
+}
+
+require_numpy() {
+  python3 -c 'import numpy' 2>/dev/null || skip "numpy not installed"
+}
+
+@test "tsdb.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/tsdb.py" ]
+}
+
+@test "ring keeps the newest samples in time order after wrapping" {
+  require_numpy
+  run python3 - <<'PY'
+import os
+from nodectl.tsdb import MetricsStore
+
+store = MetricsStore(os.environ['STORE_DIR'], raw_capacity=10)
+for i in range(25):
+    store.record(1000 + i, 90, i, 40, 100)
+ts = store.query()['ts']
+print((ts - 1000).tolist(), store.query(1017, 1020)['gpu_util'].tolist())
+print(os.path.getsize(os.path.join(os.environ['STORE_DIR'], 'raw.ring')))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'[15, 16, 17, 18, 19, 20, 21, 22, 23, 24] [17, 18, 19]\n132' ]]
+}
+
+@test "rollups are time weighted and ignore gaps across suspend" {
+  require_numpy
+  run python3 - <<'PY'
+import os
+from nodectl.tsdb import FLAG_GPU_IDLE, MetricsStore
+
+store = MetricsStore(os.environ['STORE_DIR'])
+# 120s of 10s samples, GPU idle for the second minute, then a suspend gap
+for i in range(13):
+    store.record(3600 + i * 10, 95, 80 if i < 6 else 0, flags=FLAG_GPU_IDLE if i >= 6 else 0)
+store.record(3600 + 5000, 95, 0, flags=FLAG_GPU_IDLE)
+store.close()
+
+store = MetricsStore(os.environ['STORE_DIR'], writable=False)
+minutes = store.query(resolution='1m')
+print([(int(m['ts']) - 3600, int(m['samples']), int(m['seconds']), int(m['gpu_idle_seconds'])) for m in minutes])
+hour = store.query(resolution='1h')
+print(len(hour), int(hour['seconds'][0]), int(hour['gpu_util_max'][0]))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'[(0, 6, 50, 0), (60, 6, 60, 60), (120, 1, 10, 10), (4980, 1, 0, 0)]\n2 120 80' ]]
+}
+
+@test "reopening continues the last rollup bucket instead of duplicating it" {
+  require_numpy
+  run python3 - <<'PY'
+import os
+from nodectl.tsdb import MetricsStore
+
+for start in (0, 20):
+    store = MetricsStore(os.environ['STORE_DIR'])
+    for i in range(2):
+        store.record(7200 + start + i * 10, 90, 50)
+    store.close()
+
+minutes = MetricsStore(os.environ['STORE_DIR'], writable=False).query(resolution='1m')
+print(len(minutes), int(minutes['samples'][0]), int(minutes['seconds'][0]))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "1 4 30" ]]
+}
+
+@test "a second writer is refused" {
+  run python3 - <<'PY'
+import os
+from nodectl.tsdb import MetricsStore, open_store
+
+first = MetricsStore(os.environ['STORE_DIR'])
+print(open_store(os.environ['STORE_DIR']))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == *"None" ]]
+}
@@ -0,0 +1,130 @@
+#!/usr/bin/env bats
+# Unit tests for nodectl/warmcache.py (model usage ranking and resume warm-up) against a stub Ollama
+
+setup() {
+  TEST_DIR="$(cd "$(dirname "$BATS_TEST_FILENAME")" && pwd)"
+  PROJECT_ROOT="$(dirname "${TEST_DIR}")"
+  export PYTHONPATH="${PROJECT_ROOT}:${TEST_DIR}/fixtures"
+  WORK_DIR="$(mktemp -d)"
+  export WORK_DIR
+}
+
+teardown() {
+  rm -rf "${WORK_DIR}"
+}
+
+@test "warmcache.py exists" {
+  [ -f "${PROJECT_ROOT}/nodectl/warmcache.py" ]
+}
+
+@test "usage is counted per request and survives a reload" {
+  run python3 - <<'PY'
+import os
+from nodectl.warmcache import ModelUsage
+
+path = os.path.join(os.environ['WORK_DIR'], 'models.json')
+usage = ModelUsage(path)
+usage.observe({'model_sizes': {'a:1b': 100}, 'requested_models': ['a:1b']}, now=10)
+usage.observe({'model_sizes': {'a:1b': 100}, 'requested_models': ['a:1b']}, now=20)
+print(usage.observe({'model_sizes': {'a:1b': 100}, 'requested_models': []}, now=30))
+usage.observe({'model_sizes': {}, 'requested_models': ['b:7b']}, now=40, exclude=['b:7b'])
+usage.save()
+print(ModelUsage(path).models)
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'False\n{\'a:1b\': {\'uses\': 2, \'last_used\': 20, \'size\': 100}}' ]]
+}
+
+@test "plan prefers models resident at suspend, then usage, within the VRAM budget" {
+  run python3 - <<'PY'
+import os
+from nodectl.warmcache import ModelUsage
+
+usage = ModelUsage(os.path.join(os.environ['WORK_DIR'], 'models.json'))
+usage.models = {
+    'big:70b': {'uses': 50, 'last_used': 5, 'size': 40},
+    'often:8b': {'uses': 9, 'last_used': 1, 'size': 5},
+    'recent:8b': {'uses': 9, 'last_used': 9, 'size': 5},
+    'sleepy:3b': {'uses': 1, 'last_used': 1, 'size': 2},
+}
+usage.mark_suspend(['sleepy:3b'])
+print(usage.plan(3, 20))
+print(usage.plan(1, 0))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'[\'sleepy:3b\', \'recent:8b\', \'often:8b\']\n[\'sleepy:3b\']' ]]
+}
+
+@test "warm-up prefetches manifest blobs and loads models through /api/generate" {
+  run python3 - <<'PY'
+import json
+import os
+from fake_model_servers import FakeModelServer
+from nodectl.warmcache import ModelWarmer
+
+models_dir = os.path.join(os.environ['WORK_DIR'], 'models')
+manifest_dir = os.path.join(models_dir, 'manifests', 'registry.ollama.ai', 'library', 'llama3')
+os.makedirs(manifest_dir)
+os.makedirs(os.path.join(models_dir, 'blobs'))
+with open(os.path.join(models_dir, 'blobs', 'sha256-aa'), 'wb') as f:
+    f.write(b'w' * 3000)
+with open(os.path.join(models_dir, 'blobs', 'sha256-bb'), 'wb') as f:
+    f.write(b'{}')
+with open(os.path.join(manifest_dir, '8b'), 'w') as f:
+    json.dump({'config': {'digest': 'sha256:bb'}, 'layers': [{'digest': 'sha256:aa'}, {'digest': 'sha256:missing'}]}, f)
+
+server = FakeModelServer()
+warmer = ModelWarmer(server.url, models_dir=models_dir)
+print([os.path.basename(path) for path in warmer.blob_paths('llama3:8b')])
+summary = warmer.warm(['llama3:8b', 'other:1b'])
+print(summary['loaded'], summary['prefetched_bytes'], server.loaded, sorted(warmer.recently_loaded()))
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == $'[\'sha256-aa\', \'sha256-bb\']\n[\'llama3:8b\', \'other:1b\'] 3002 [\'llama3:8b\', \'other:1b\'] [\'llama3:8b\', \'other:1b\']' ]]
+}
+
+@test "a load answered with a malformed response fails instead of raising" {
+  run python3 - <<'PY'
+import logging
+import socket
+import threading
+from nodectl.warmcache import ModelWarmer
+
+logging.disable(logging.CRITICAL)
+listener = socket.create_server(('127.0.0.1', 0))
+
+def garbage():
+    while True:
+        conn, _ = listener.accept()
+        conn.recv(65536)
+        conn.sendall(b'not http at all\r\n\r\n')
+        conn.close()
+
+threading.Thread(target=garbage, daemon=True).start()
+warmer = ModelWarmer(f"http://127.0.0.1:{listener.getsockname()[1]}", models_dir='/nonexistent')
+print(warmer.load('llama3:8b'), warmer.recently_loaded())
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "False []" ]]
+}
+
+@test "resume watcher fires when suspended time jumps" {
+  run python3 - <<'PY'
+import time
+from nodectl import warmcache
+
+offset = [0.0]
+real = warmcache.suspended_seconds
+warmcache.suspended_seconds = lambda: real() + offset[0]
+fired = []
+watcher = warmcache.ResumeWatcher(fired.append, poll_interval=0.05)
+watcher.start()
+time.sleep(0.2)
+offset[0] = 600.0
+time.sleep(0.3)
+watcher.stop()
+print(len(fired), round(fired[0]) if fired else None)
+PY
+  [ "${status}" -eq 0 ]
+  [[ "${output}" == "1 600" ]]
+}
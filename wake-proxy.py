@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Wake-on-Request Proxy
+Always-on TCP proxy for a suspended AI server's API ports that wakes it on the first connection
+"""
+
+import asyncio
+import os
+import logging
+import signal
+
+from nodectl.fleet import STAY_AWAKE_PORT
+from nodectl.relay import API_PORTS, POOL_SIZE, WakeProxy
+from nodectl.wol import BROADCAST
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+NODE_HOST = os.getenv('NODE_HOST', '')
+NODE_MAC = os.getenv('NODE_MAC', '')
+NODE_PORTS = [int(port) for port in os.getenv('NODE_PORTS', ','.join(map(str, API_PORTS))).split(',') if port.strip()]
+HEALTH_PORT = int(os.getenv('HEALTH_PORT', str(STAY_AWAKE_PORT)))
+WOL_BROADCAST = os.getenv('WOL_BROADCAST', BROADCAST)
+BIND = os.getenv('PROXY_BIND', '0.0.0.0')
+# Keep this well below the node's DRAIN_TIMEOUT so pooled connections never hold up a suspend
+POLL_INTERVAL = float(os.getenv('POLL_INTERVAL', '5'))
+WAKE_TIMEOUT = float(os.getenv('WAKE_TIMEOUT', '180'))
+PROXY_POOL_SIZE = int(os.getenv('POOL_SIZE', str(POOL_SIZE)))
+
+
+async def serve():
+    """Relay the node's API ports until stopped"""
+    proxy = WakeProxy(NODE_HOST, NODE_MAC, NODE_PORTS, health_port=HEALTH_PORT, broadcast=WOL_BROADCAST,
+                      wake_timeout=WAKE_TIMEOUT, pool_size=PROXY_POOL_SIZE)
+    await proxy.start(BIND)
+    logger.info(f"Node {NODE_HOST} ({NODE_MAC}), {'splice' if proxy.zero_copy else 'copy'} relaying")
+    # SIGUSR1 logs the counters
+    asyncio.get_running_loop().add_signal_handler(
+        signal.SIGUSR1, lambda: logger.info(f"Proxy status: {proxy.status()}")
+    )
+    await proxy.poll_forever(POLL_INTERVAL)
+
+
+def main():
+    """Start the wake-on-request proxy"""
+    if not NODE_HOST or not NODE_MAC:
+        logger.error("NODE_HOST and NODE_MAC must be set")
+        raise SystemExit(1)
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        logger.info("Shutting down wake-on-request proxy")
+
+
+if __name__ == '__main__':
+    main()